@@ -1,37 +1,81 @@
 """Menu books API endpoints."""
 
+import json
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+from typing import Any
+
+import anyio
+from anyio.streams.memory import MemoryObjectSendStream
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
 
-from app.core.exceptions import AppException
+from app.api.v1.user_state import UserId
+from app.core.exceptions import AppException, NotFoundError
+from app.core.metrics import server_timing_header, track_request_timings
 from app.models import (
     GenerateMenuBookRequest,
     MenuBook,
+    MenuBookJob,
     ModifyMenuBookRequest,
     UserPreferences,
 )
-from app.services import get_menu_service
+from app.repositories import DEFAULT_USER_ID, get_async_user_state_repository
+from app.services import (
+    MenuService,
+    get_menu_book_job_queue,
+    get_menu_book_precomputer,
+    get_menu_service,
+    get_shopping_service,
+)
 
 router = APIRouter()
 
 
+def _to_preferences(request: GenerateMenuBookRequest) -> UserPreferences:
+    return UserPreferences(
+        specificPreferences=request.specificPreferences,
+        specificDisliked=request.specificDisliked,
+        numPeople=request.numPeople,
+        budget=request.budget,
+        difficulty=request.difficulty,
+        cookSchedule=request.cookSchedule,
+    )
+
+
+async def _take_precomputed(preferences: UserPreferences, user_id: str) -> MenuBook | None:
+    """Record the user as active and claim their precomputed book, if any."""
+    precomputer = get_menu_book_precomputer()
+    if not precomputer.enabled:
+        return None
+    await get_async_user_state_repository().mark_seen(user_id)
+    return await precomputer.take(preferences, user_id)
+
+
 @router.post("/generate", response_model=MenuBook)
-async def generate_menu_book(request: GenerateMenuBookRequest) -> MenuBook:
-    """Generate a new weekly menu book based on user preferences."""
+async def generate_menu_book(
+    request: GenerateMenuBookRequest, user_id: UserId = DEFAULT_USER_ID
+) -> MenuBook:
+    """Generate a new weekly menu book based on user preferences.
+
+    A book precomputed off-peak for the same preferences is served
+    instead of generating one, shopping list included.
+    """
     try:
-        preferences = UserPreferences(
-            specificPreferences=request.specificPreferences,
-            specificDisliked=request.specificDisliked,
-            numPeople=request.numPeople,
-            budget=request.budget,
-            difficulty=request.difficulty,
-            cookSchedule=request.cookSchedule,
-        )
+        preferences = _to_preferences(request)
+        precomputed = await _take_precomputed(preferences, user_id)
+        if precomputed is not None:
+            return precomputed
 
         service = get_menu_service()
         return await service.generate(preferences)
 
     except AppException as exc:
-        raise HTTPException(status_code=exc.status_code, detail=exc.to_dict()) from exc
+        raise HTTPException(
+            status_code=exc.status_code, detail=exc.to_dict(), headers=exc.headers
+        ) from exc
     except Exception as exc:  # pragma: no cover
         raise HTTPException(
             status_code=500,
@@ -39,21 +83,149 @@ async def generate_menu_book(request: GenerateMenuBookRequest) -> MenuBook:
         ) from exc
 
 
+@router.post("/generate/stream")
+async def stream_menu_book(
+    request: GenerateMenuBookRequest, user_id: UserId = DEFAULT_USER_ID
+) -> StreamingResponse:
+    """Generate a menu book, streaming progress as Server-Sent Events.
+
+    Emits ``outline``, ``draft_shopping_list``, a ``day`` event per
+    normalized day, ``structured``, then ``complete`` with the MenuBook
+    (or ``error`` with code and message). A precomputed book is sent as
+    ``complete`` straight away. A final ``timing`` event carries the stage
+    timings as a ``Server-Timing`` value, since the response headers are
+    sent before generation starts.
+    """
+    service = get_menu_service()
+    return _EventStreamResponse(
+        partial(_menu_book_events, service, _to_preferences(request), user_id)
+    )
+
+
+class _EventStreamResponse(StreamingResponse):
+    """Server-Sent Events written by a producer task to a memory stream.
+
+    The producer runs in a task group owned by the response, and the
+    body is the stream's receive side, so no generator yields from inside
+    a task group. Once the response ends, including when the client
+    disconnects mid-stream, the producer is cancelled.
+    """
+
+    def __init__(self, produce: Callable[[MemoryObjectSendStream[str]], Awaitable[None]]) -> None:
+        self._produce = produce
+        self._events, self._received = anyio.create_memory_object_stream[str](16)
+        super().__init__(
+            self._received,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(self._produce, self._events)
+            try:
+                await super().__call__(scope, receive, send)
+            finally:
+                tg.cancel_scope.cancel()
+                self._received.close()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _menu_book_events(
+    service: MenuService,
+    preferences: UserPreferences,
+    user_id: str,
+    events: MemoryObjectSendStream[str],
+) -> None:
+    """Generate a menu book, sending each progress stage as an SSE event."""
+    async with events:
+
+        async def on_progress(stage: str, payload: dict[str, Any]) -> None:
+            await events.send(_sse(stage, payload))
+
+        start = time.perf_counter()
+        with track_request_timings() as timings:
+            try:
+                book = await _take_precomputed(preferences, user_id)
+                if book is None:
+                    book = await service.generate(preferences, on_progress=on_progress)
+                await events.send(_sse("complete", book.model_dump(mode="json")))
+            except AppException as exc:
+                await events.send(_sse("error", exc.to_dict()))
+            except Exception as exc:  # pragma: no cover
+                await events.send(_sse("error", {"code": "INTERNAL_ERROR", "message": str(exc)}))
+        timings.append(("total", time.perf_counter() - start))
+        await events.send(_sse("timing", {"serverTiming": server_timing_header(timings)}))
+
+
 @router.post("/{book_id}/modify", response_model=MenuBook)
 async def modify_menu_book(book_id: str, request: ModifyMenuBookRequest) -> MenuBook:
-    """Modify an existing menu book based on user feedback."""
+    """Modify an existing menu book based on user feedback.
+
+    With ``updateShoppingList`` set, the book's shopping list is updated
+    locally for the changed dishes instead of being left as it was.
+    """
     try:
         service = get_menu_service()
-        return await service.modify(
+        book = await service.modify(
             book_id=book_id,
             modification=request.modification,
             current_book=request.currentMenuBook,
+            incremental=request.incremental,
         )
+        if request.updateShoppingList:
+            shopping_list = get_shopping_service().update(
+                shopping_list=request.currentMenuBook.shoppingList,
+                previous_menus=request.currentMenuBook.menus,
+                menus=book.menus,
+            )
+            book = book.model_copy(update={"shoppingList": shopping_list})
+        return book
 
     except AppException as exc:
-        raise HTTPException(status_code=exc.status_code, detail=exc.to_dict()) from exc
+        raise HTTPException(
+            status_code=exc.status_code, detail=exc.to_dict(), headers=exc.headers
+        ) from exc
     except Exception as exc:  # pragma: no cover
         raise HTTPException(
             status_code=500,
             detail={"code": "INTERNAL_ERROR", "message": str(exc)},
         ) from exc
+
+
+@router.post("/jobs", response_model=MenuBookJob, status_code=202)
+async def submit_menu_book_job(
+    request: GenerateMenuBookRequest, user_id: UserId = DEFAULT_USER_ID
+) -> MenuBookJob:
+    """Queue background generation and return a placeholder menu book.
+
+    The returned job's ``menuBook`` has status ``generating``; poll
+    ``GET /jobs/{jobId}`` for progress and the finished book. A
+    precomputed book is returned as an already finished job.
+    """
+    try:
+        preferences = _to_preferences(request)
+        queue = get_menu_book_job_queue()
+        precomputed = await _take_precomputed(preferences, user_id)
+        if precomputed is not None:
+            return await queue.complete(precomputed)
+        return await queue.submit(preferences)
+
+    except AppException as exc:
+        raise HTTPException(
+            status_code=exc.status_code, detail=exc.to_dict(), headers=exc.headers
+        ) from exc
+
+
+@router.get("/jobs/{job_id}", response_model=MenuBookJob)
+async def get_menu_book_job(job_id: str) -> MenuBookJob:
+    """Return progress, result or error of a menu book generation job."""
+    queue = get_menu_book_job_queue()
+    job = await queue.get(job_id)
+    if job is None:
+        exc = NotFoundError(f"Job {job_id} not found")
+        raise HTTPException(status_code=exc.status_code, detail=exc.to_dict())
+    return job
@@ -3,7 +3,7 @@
 from fastapi import APIRouter, HTTPException
 
 from app.core.exceptions import AppException
-from app.models import GenerateShoppingListRequest, ShoppingList
+from app.models import GenerateShoppingListRequest, ShoppingList, UpdateShoppingListRequest
 from app.services import get_shopping_service
 
 router = APIRouter()
@@ -20,7 +20,31 @@ async def generate_shopping_list(request: GenerateShoppingListRequest) -> Shoppi
         )
 
     except AppException as exc:
-        raise HTTPException(status_code=exc.status_code, detail=exc.to_dict()) from exc
+        raise HTTPException(
+            status_code=exc.status_code, detail=exc.to_dict(), headers=exc.headers
+        ) from exc
+    except Exception as exc:  # pragma: no cover
+        raise HTTPException(
+            status_code=500,
+            detail={"code": "INTERNAL_ERROR", "message": str(exc)},
+        ) from exc
+
+
+@router.post("/update", response_model=ShoppingList)
+async def update_shopping_list(request: UpdateShoppingListRequest) -> ShoppingList:
+    """Update a shopping list for changed menus without regenerating it."""
+    try:
+        service = get_shopping_service()
+        return service.update(
+            shopping_list=request.shoppingList,
+            previous_menus=request.previousMenus,
+            menus=request.menus,
+        )
+
+    except AppException as exc:
+        raise HTTPException(
+            status_code=exc.status_code, detail=exc.to_dict(), headers=exc.headers
+        ) from exc
     except Exception as exc:  # pragma: no cover
         raise HTTPException(
             status_code=500,
@@ -1,23 +1,113 @@
 """User state API endpoints."""
 
-from fastapi import APIRouter
+from typing import Annotated
 
-from app.models import UserState
-from app.repositories import get_user_state_repository
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+
+from app.core.exceptions import NotFoundError, PreconditionFailedError
+from app.models import (
+    MenuBook,
+    MenuBookPage,
+    ShoppingItem,
+    UpdateCurrentDayRequest,
+    UpdateShoppingItemRequest,
+    UserState,
+)
+from app.repositories import DEFAULT_USER_ID, get_async_user_state_repository, state_etag
+from app.services import get_menu_book_precomputer
 
 router = APIRouter()
 
+# Optional per-user key; single-user deployments can omit the header.
+UserId = Annotated[
+    str,
+    Header(alias="X-User-Id", pattern=r"^[A-Za-z0-9_-]{1,64}$"),
+]
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` list against an ETag."""
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
 
 @router.get("", response_model=UserState)
-async def get_user_state() -> UserState:
-    """Retrieve the current user state."""
-    repository = get_user_state_repository()
-    return repository.load()
+async def get_user_state(
+    response: Response,
+    user_id: UserId = DEFAULT_USER_ID,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> UserState | Response:
+    """Retrieve the current user state; 304 when the client's copy is current."""
+    repository = get_async_user_state_repository()
+    state = await repository.load(user_id)
+    if get_menu_book_precomputer().enabled:
+        await repository.mark_seen(user_id)
+    etag = state_etag(state)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return state
 
 
 @router.put("", response_model=UserState)
-async def save_user_state(state: UserState) -> UserState:
-    """Save user state to persistent storage."""
-    repository = get_user_state_repository()
-    repository.save(state)
+async def save_user_state(
+    state: UserState,
+    response: Response,
+    user_id: UserId = DEFAULT_USER_ID,
+    if_match: Annotated[str | None, Header()] = None,
+) -> UserState:
+    """Save user state; with ``If-Match``, only if it is unchanged since read."""
+    repository = get_async_user_state_repository()
+    try:
+        response.headers["ETag"] = await repository.save(state, user_id, if_match=if_match)
+    except PreconditionFailedError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.to_dict()) from exc
     return state
+
+
+@router.patch("/current-day", response_model=UpdateCurrentDayRequest)
+async def update_current_day(
+    request: UpdateCurrentDayRequest, user_id: UserId = DEFAULT_USER_ID
+) -> UpdateCurrentDayRequest:
+    """Change the selected day without resending the whole state."""
+    repository = get_async_user_state_repository()
+    await repository.set_current_day_index(request.currentDayIndex, user_id)
+    return request
+
+
+@router.get("/menu-books", response_model=MenuBookPage)
+async def list_menu_books(
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    user_id: UserId = DEFAULT_USER_ID,
+) -> MenuBookPage:
+    """List stored menu books, newest first."""
+    repository = get_async_user_state_repository()
+    books, total = await repository.list_menu_books(offset, limit, user_id)
+    return MenuBookPage(items=books, total=total, offset=offset, limit=limit)
+
+
+@router.post("/menu-books", response_model=MenuBook, status_code=201)
+async def append_menu_book(book: MenuBook, user_id: UserId = DEFAULT_USER_ID) -> MenuBook:
+    """Add a menu book to the history, replacing one with the same id."""
+    repository = get_async_user_state_repository()
+    await repository.append_menu_book(book, user_id)
+    return book
+
+
+@router.patch(
+    "/menu-books/{book_id}/shopping-items/{item_id}", response_model=ShoppingItem
+)
+async def update_shopping_item(
+    book_id: str,
+    item_id: str,
+    request: UpdateShoppingItemRequest,
+    user_id: UserId = DEFAULT_USER_ID,
+) -> ShoppingItem:
+    """Mark one shopping item as purchased or not."""
+    repository = get_async_user_state_repository()
+    item = await repository.set_item_purchased(book_id, item_id, request.purchased, user_id)
+    if item is None:
+        exc = NotFoundError(f"Shopping item {item_id} not found in menu book {book_id}")
+        raise HTTPException(status_code=exc.status_code, detail=exc.to_dict())
+    return item
@@ -3,12 +3,17 @@
 from app.core.config import settings
 from app.core.exceptions import (
     AppException,
+    GeminiCircuitOpenError,
     GeminiError,
     GeminiOverloadedError,
     GeminiQuotaExceededError,
     GeminiSafetyError,
     GeminiTimeoutError,
+    GeminiTruncatedError,
+    NotFoundError,
     ParseError,
+    PreconditionFailedError,
+    QueueFullError,
     ValidationError,
 )
 
@@ -19,7 +24,12 @@ __all__ = [
     "GeminiTimeoutError",
     "GeminiSafetyError",
     "GeminiOverloadedError",
+    "GeminiCircuitOpenError",
     "GeminiQuotaExceededError",
+    "GeminiTruncatedError",
+    "NotFoundError",
     "ParseError",
+    "PreconditionFailedError",
+    "QueueFullError",
     "ValidationError",
 ]
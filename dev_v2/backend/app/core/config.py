@@ -16,6 +16,76 @@ class Settings(BaseSettings):
     gemini_model: str = "gemini-3-flash-preview"
     gemini_timeout_seconds: float = 120.0
 
+    # Gemini response cache ("none", "memory" or "sqlite")
+    gemini_cache_backend: str = "none"
+    gemini_cache_ttl_seconds: float = 3600.0
+    gemini_cache_max_entries: int = 256
+    gemini_cache_path: Path | None = None
+
+    # Share one upstream call among concurrent identical requests
+    gemini_single_flight: bool = True
+
+    # Retry Gemini 503/429 responses with jittered exponential backoff
+    gemini_max_attempts: int = 3
+    gemini_retry_base_seconds: float = 0.5
+    gemini_retry_max_seconds: float = 8.0
+    # Send a duplicate request once a call outlasts this latency quantile of recent calls (0 = off)
+    gemini_hedge_quantile: float = 0.0
+    # Admission control: concurrent Gemini calls, and calls allowed to queue for a slot
+    gemini_max_concurrency: int = 8
+    gemini_max_queued: int = 32
+    # Idle time before pooled keep-alive connections to Gemini are closed
+    gemini_http_keepalive_seconds: float = 60.0
+    # Client-side quota per API key and model, delaying calls that would exceed it (0 = unlimited)
+    gemini_rpm_limit: int = 0
+    gemini_tpm_limit: int = 0
+    # Quota bucket storage ("memory" per process, or "sqlite" shared by all workers)
+    gemini_rate_limit_backend: str = "memory"
+    gemini_rate_limit_path: Path | None = None
+    # Fail fast after this many consecutive upstream failures per model (0 = off)
+    gemini_breaker_threshold: int = 5
+    gemini_breaker_reset_seconds: float = 30.0
+
+    # Step 2 fan-out: days per structured-menu request (0 = whole week at once)
+    menu_fanout_group_size: int = 0
+    menu_fanout_concurrency: int = 4
+    # Wall-clock budget shared by all Gemini calls of one menu book generation (0 = none)
+    menu_generate_deadline_seconds: float = 0.0
+
+    # Modify menu books via a patch of changed meal slots instead of a full week
+    menu_modify_incremental: bool = False
+
+    # Reuse recipes of earlier generated dishes whose names match the outline, so
+    # Step 2 only writes new dishes; similarity is the minimum estimated name Jaccard
+    dish_library_enabled: bool = False
+    dish_library_similarity: float = 0.8
+    dish_library_path: Path | None = None
+
+    # Estimated input-token cap per prompt; leaner plan encodings are tried first (0 = no cap)
+    prompt_max_tokens: int = 0
+
+    # Ask Gemini to merge ingredients the local shopping aggregator cannot reconcile
+    shopping_llm_fallback: bool = False
+
+    # Background menu book generation jobs
+    menu_job_workers: int = 2
+    menu_job_max_pending: int = 16
+    # Delete finished jobs this many hours after their last update (0 = keep forever)
+    menu_job_retention_hours: float = 24.0
+
+    # Precompute next week's menu book during the off-peak window [start, end) in
+    # server-local hours, for users with saved preferences active within the last days
+    menu_precompute_enabled: bool = False
+    menu_precompute_start_hour: int = 2
+    menu_precompute_end_hour: int = 6
+    menu_precompute_active_days: float = 14.0
+
+    # User state storage ("json" file or "sqlite"; sqlite imports state.json once)
+    user_state_backend: str = "json"
+    user_state_db_path: Path | None = None
+    # Coalesce user state saves arriving within this window into one write (0 = write through)
+    user_state_write_behind_seconds: float = 0.0
+
     # CORS settings - Include common Vite dev ports
     cors_origins: list[str] | str = Field(
         default_factory=lambda: [
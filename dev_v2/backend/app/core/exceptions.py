@@ -1,5 +1,6 @@
 """Centralized exception hierarchy for the application."""
 
+import math
 from typing import Any
 
 
@@ -15,6 +16,11 @@ class AppException(Exception):
     def to_dict(self) -> dict[str, Any]:
         return {"code": self.code, "message": self.message}
 
+    @property
+    def headers(self) -> dict[str, str] | None:
+        """Extra HTTP headers to send with the error response."""
+        return None
+
 
 class ValidationError(AppException):
     """Raised when data validation fails."""
@@ -30,6 +36,36 @@ class ParseError(AppException):
         super().__init__(message, code="PARSE_ERROR", status_code=500)
 
 
+class NotFoundError(AppException):
+    """Raised when a requested resource does not exist."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, code="NOT_FOUND", status_code=404)
+
+
+class PreconditionFailedError(AppException):
+    """Raised when a conditional write targets a stale version of a resource."""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message, code="PRECONDITION_FAILED", status_code=412)
+
+
+class QueueFullError(AppException):
+    """Raised when a bounded work queue cannot accept more work."""
+
+    def __init__(
+        self,
+        message: str = "Server is busy, please retry shortly.",
+        retry_after_seconds: int = 30,
+    ) -> None:
+        super().__init__(message, code="QUEUE_FULL", status_code=429)
+        self.retry_after_seconds = retry_after_seconds
+
+    @property
+    def headers(self) -> dict[str, str] | None:
+        return {"Retry-After": str(self.retry_after_seconds)}
+
+
 # --- Gemini API Exceptions ---
 
 
@@ -49,6 +85,23 @@ class GeminiTimeoutError(GeminiError):
         self.status_code = 504
 
 
+class GeminiTruncatedError(GeminiError):
+    """Raised when Gemini stops at the max token limit mid-response.
+
+    ``partial_text`` holds the text generated before the cut-off so
+    callers can salvage the complete parts of it.
+    """
+
+    def __init__(
+        self,
+        message: str = "Gemini response reached the max token limit.",
+        partial_text: str = "",
+    ) -> None:
+        super().__init__(message)
+        self.code = "GEMINI_TRUNCATED"
+        self.partial_text = partial_text
+
+
 class GeminiSafetyError(GeminiError):
     """Raised when Gemini blocks content due to safety filters."""
 
@@ -58,19 +111,53 @@ class GeminiSafetyError(GeminiError):
         self.status_code = 422
 
 
-class GeminiOverloadedError(GeminiError):
+class _RetryAfterMixin:
+    """Sends the upstream's retry-after hint on to the API client."""
+
+    retry_after_seconds: float | None
+
+    @property
+    def headers(self) -> dict[str, str] | None:
+        if self.retry_after_seconds is None:
+            return None
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after_seconds)))}
+
+
+class GeminiOverloadedError(_RetryAfterMixin, GeminiError):
     """Raised when Gemini service is temporarily unavailable."""
 
-    def __init__(self, message: str = "Gemini service unavailable.") -> None:
+    def __init__(
+        self,
+        message: str = "Gemini service unavailable.",
+        retry_after_seconds: float | None = None,
+    ) -> None:
         super().__init__(message)
         self.code = "GEMINI_OVERLOADED"
         self.status_code = 503
+        self.retry_after_seconds = retry_after_seconds
+
+
+class GeminiCircuitOpenError(GeminiOverloadedError):
+    """Raised without calling Gemini while its circuit breaker is open."""
+
+    def __init__(
+        self,
+        message: str = "Gemini is failing; not sending requests for now.",
+        retry_after_seconds: float | None = None,
+    ) -> None:
+        super().__init__(message, retry_after_seconds)
+        self.code = "GEMINI_CIRCUIT_OPEN"
 
 
-class GeminiQuotaExceededError(GeminiError):
+class GeminiQuotaExceededError(_RetryAfterMixin, GeminiError):
     """Raised when Gemini quota limits are exceeded."""
 
-    def __init__(self, message: str = "Gemini quota exceeded.") -> None:
+    def __init__(
+        self,
+        message: str = "Gemini quota exceeded.",
+        retry_after_seconds: float | None = None,
+    ) -> None:
         super().__init__(message)
         self.code = "GEMINI_QUOTA_EXCEEDED"
         self.status_code = 429
+        self.retry_after_seconds = retry_after_seconds
@@ -0,0 +1,278 @@
+"""In-process metrics with Prometheus text exposition and Server-Timing support."""
+
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from threading import Lock
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+# Stage timings of the current request, rendered into its Server-Timing header.
+_request_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms keyed by name and labels.
+
+    Metrics are created on first use; ``describe`` attaches the HELP text
+    and type shown by ``render``, which emits the Prometheus text format.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._types: dict[str, str] = {}
+        self._help: dict[str, str] = {}
+        self._values: dict[str, dict[LabelKey, float]] = {}
+        self._histograms: dict[str, dict[LabelKey, _Histogram]] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+
+    def describe(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Declare a metric's type (counter, gauge or histogram) and help text."""
+        with self._lock:
+            self._types[name] = kind
+            self._help[name] = help_text
+            if kind == "histogram":
+                self._buckets[name] = buckets
+
+    def inc(self, name: str, value: float = 1.0, **labels: object) -> None:
+        """Add ``value`` to a counter."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+            self._types.setdefault(name, "counter")
+
+    def set(self, name: str, value: float, **labels: object) -> None:
+        """Set a gauge."""
+        key = self._key(labels)
+        with self._lock:
+            self._values.setdefault(name, {})[key] = value
+            self._types.setdefault(name, "gauge")
+
+    def observe(self, name: str, value: float, **labels: object) -> None:
+        """Record one observation in a histogram."""
+        key = self._key(labels)
+        with self._lock:
+            self._types.setdefault(name, "histogram")
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._buckets.get(name, DEFAULT_BUCKETS))
+            histogram.observe(value)
+
+    def value(self, name: str, **labels: object) -> float:
+        """Current value of a counter or gauge series (0 if never recorded)."""
+        with self._lock:
+            return self._values.get(name, {}).get(self._key(labels), 0.0)
+
+    def histogram_count(self, name: str, **labels: object) -> int:
+        """Number of observations in a histogram series."""
+        with self._lock:
+            histogram = self._histograms.get(name, {}).get(self._key(labels))
+            return histogram.count if histogram else 0
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: list[str] = []
+        with self._lock:
+            names = sorted(set(self._values) | set(self._histograms))
+            for name in names:
+                kind = self._types.get(name, "untyped")
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._values.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                for key, histogram in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        labels = _format_labels(key + (("le", _format_value(bound)),))
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    labels = _format_labels(key + (("le", "+Inf"),))
+                    lines.append(f"{name}_bucket{labels} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _key(labels: dict[str, object]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in key
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+@lru_cache
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    registry = MetricsRegistry()
+    registry.describe(
+        "omenu_stage_duration_seconds", "histogram", "Wall time of pipeline stages."
+    )
+    registry.describe(
+        "omenu_gemini_requests_total", "counter", "Gemini responses by model and finish reason."
+    )
+    registry.describe(
+        "omenu_gemini_errors_total", "counter", "Failed Gemini requests by model and error code."
+    )
+    registry.describe(
+        "omenu_gemini_cache_hits_total", "counter", "Gemini requests served from the response cache."
+    )
+    registry.describe(
+        "omenu_gemini_cache_misses_total", "counter", "Gemini requests not found in the response cache."
+    )
+    registry.describe(
+        "omenu_gemini_single_flight_total", "counter", "Gemini requests that led or joined an identical in-flight call."
+    )
+    registry.describe(
+        "omenu_gemini_chars_total", "counter", "Prompt and response characters sent to and received from Gemini."
+    )
+    registry.describe(
+        "omenu_gemini_tokens_total", "counter", "Tokens reported by Gemini usage metadata."
+    )
+    registry.describe(
+        "omenu_retries_total", "counter", "Retried or continued requests by operation and reason."
+    )
+    registry.describe(
+        "omenu_gemini_hedges_total", "counter", "Hedged Gemini requests by which copy answered first."
+    )
+    registry.describe(
+        "omenu_gemini_circuit_open", "gauge", "1 while a model's circuit breaker is open."
+    )
+    registry.describe(
+        "omenu_gemini_in_flight", "gauge", "Gemini calls holding an admission slot."
+    )
+    registry.describe(
+        "omenu_gemini_queue_depth", "gauge", "Gemini calls waiting for an admission slot."
+    )
+    registry.describe(
+        "omenu_gemini_queue_wait_seconds", "histogram", "Time Gemini calls waited for an admission slot."
+    )
+    registry.describe(
+        "omenu_gemini_rejected_total", "counter", "Gemini calls rejected because the wait queue was full."
+    )
+    registry.describe(
+        "omenu_gemini_quota_headroom", "gauge", "Fraction of the RPM/TPM quota bucket left after the last call."
+    )
+    registry.describe(
+        "omenu_gemini_quota_wait_seconds_total", "counter", "Time Gemini calls were delayed to stay within quota."
+    )
+    registry.describe(
+        "omenu_dish_library_lookups_total", "counter", "Outline dishes looked up in the dish library by outcome."
+    )
+    registry.describe(
+        "omenu_precompute_total", "counter", "Off-peak menu book precomputations by outcome."
+    )
+    registry.describe(
+        "omenu_precompute_served_total", "counter", "Generate requests by precomputed book outcome."
+    )
+    registry.describe(
+        "omenu_parse_chars_total", "counter", "Characters of model output parsed as JSON."
+    )
+    return registry
+
+
+@contextmanager
+def track_request_timings() -> Iterator[list[tuple[str, float]]]:
+    """Collect stage timings recorded while handling the current request."""
+    timings: list[tuple[str, float]] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def server_timing_header(timings: list[tuple[str, float]]) -> str:
+    """Render timings as a ``Server-Timing`` value, summing repeated stages."""
+    totals: dict[str, float] = {}
+    counts: dict[str, int] = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+        counts[stage] = counts.get(stage, 0) + 1
+    entries = []
+    for stage, seconds in totals.items():
+        entry = f"{stage};dur={seconds * 1000:.1f}"
+        if counts[stage] > 1:
+            entry += f';desc="{counts[stage]} calls"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+@contextmanager
+def timed_stage(stage: str, **labels: object) -> Iterator[None]:
+    """Time a block as ``stage`` in the stage histogram and Server-Timing.
+
+    Failed blocks are recorded too, with ``outcome="error"``.
+    """
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start, outcome=outcome, **labels)
+
+
+def record_stage(stage: str, seconds: float, outcome: str = "ok", **labels: object) -> None:
+    """Record a stage duration measured by the caller."""
+    get_metrics().observe(
+        "omenu_stage_duration_seconds", seconds, stage=stage, outcome=outcome, **labels
+    )
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def record_retry(operation: str, reason: str) -> None:
+    """Count a retried or continued request."""
+    get_metrics().inc("omenu_retries_total", operation=operation, reason=reason)
@@ -1,22 +1,50 @@
 """OMenu API - AI-powered menu planning backend."""
 
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
-from fastapi import FastAPI
+import anyio
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api import api_router
 from app.core.config import configure_logging, settings
+from app.core.metrics import get_metrics, server_timing_header, track_request_timings
+from app.repositories import get_async_user_state_repository
+from app.services import get_menu_book_job_queue, get_menu_book_precomputer
+from app.services.ai import get_gemini_client
 
 # Configure logging
 configure_logging()
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Run background workers for the lifetime of the application."""
+    user_state = get_async_user_state_repository()
+    async with anyio.create_task_group() as tg:
+        await get_menu_book_job_queue().start(tg)
+        await user_state.start(tg)
+        await get_menu_book_precomputer().start(tg)
+        try:
+            yield
+        finally:
+            with anyio.CancelScope(shield=True):
+                await user_state.flush()
+                await get_gemini_client().aclose()
+            tg.cancel_scope.cancel()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="OMenu API",
     description="AI-powered menu planning backend",
     version="1.0.0",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -26,8 +54,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After", "Server-Timing"],
 )
 
+
+@app.middleware("http")
+async def server_timing(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Report the pipeline stages a request ran in a ``Server-Timing`` header.
+
+    Headers go out before a streaming body runs, so stages timed while
+    streaming are missing here; SSE routes send them in a ``timing`` event.
+    """
+    start = time.perf_counter()
+    with track_request_timings() as timings:
+        response = await call_next(request)
+    timings.append(("total", time.perf_counter() - start))
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
 # Include API routes
 app.include_router(api_router)
 
@@ -40,3 +86,12 @@ async def health_check() -> dict[str, str]:
         "version": app.version,
         "timestamp": datetime.now(timezone.utc).isoformat(),
     }
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Expose pipeline metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        get_metrics().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
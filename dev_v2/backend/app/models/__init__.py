@@ -3,20 +3,25 @@
 This module re-exports all models for convenient importing.
 """
 
-from app.models.dish import Dish, Ingredient
+from app.models.dish import Dish, Ingredient, LibraryDish
 from app.models.enums import (
     Difficulty,
     DishSource,
     IngredientCategory,
     MenuBookStatus,
 )
+from app.models.jobs import MenuBookJob, PrecomputedMenuBook
 from app.models.menu import Menu, MenuBook, WeekMenus
 from app.models.requests import (
     ErrorDetail,
     ErrorResponse,
     GenerateMenuBookRequest,
     GenerateShoppingListRequest,
+    MenuBookPage,
     ModifyMenuBookRequest,
+    UpdateCurrentDayRequest,
+    UpdateShoppingItemRequest,
+    UpdateShoppingListRequest,
 )
 from app.models.shopping import ShoppingItem, ShoppingList
 from app.models.state import UserState
@@ -31,6 +36,7 @@ __all__ = [
     # Dish models
     "Ingredient",
     "Dish",
+    "LibraryDish",
     # User models
     "MealSelection",
     "CookSchedule",
@@ -39,6 +45,9 @@ __all__ = [
     "Menu",
     "WeekMenus",
     "MenuBook",
+    # Job models
+    "MenuBookJob",
+    "PrecomputedMenuBook",
     # Shopping models
     "ShoppingItem",
     "ShoppingList",
@@ -48,6 +57,10 @@ __all__ = [
     "GenerateMenuBookRequest",
     "ModifyMenuBookRequest",
     "GenerateShoppingListRequest",
+    "UpdateShoppingListRequest",
+    "UpdateCurrentDayRequest",
+    "UpdateShoppingItemRequest",
+    "MenuBookPage",
     "ErrorDetail",
     "ErrorResponse",
 ]
@@ -1,8 +1,9 @@
 """Dish and ingredient domain models."""
 
+from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.models.enums import Difficulty, DishSource, IngredientCategory
 
@@ -29,3 +30,13 @@ class Dish(BaseModel):
     totalCalories: int
     source: DishSource
     notes: Optional[str] = None
+
+
+class LibraryDish(BaseModel):
+    """A generated dish kept in the dish library for later menu books."""
+
+    key: str  # normalized dish name
+    dish: Dish
+    meals: list[str] = Field(default_factory=list)  # meals it has been served at
+    uses: int = 1
+    updatedAt: datetime
@@ -0,0 +1,38 @@
+"""Background generation job models."""
+
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.models.enums import MenuBookStatus
+from app.models.menu import MenuBook
+from app.models.requests import ErrorResponse
+
+
+class MenuBookJob(BaseModel):
+    """A background menu book generation job and its current outcome."""
+
+    jobId: str
+    status: MenuBookStatus
+    stage: str = "queued"
+    progress: float = 0.0  # 0.0 - 1.0
+    menuBook: MenuBook
+    error: Optional[ErrorResponse] = None
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class PrecomputedMenuBook(BaseModel):
+    """Next week's menu book generated ahead of time for a user.
+
+    ``preferencesDigest`` identifies the preferences it was generated
+    from; the book is only served while they are unchanged, and only
+    around the week starting on ``weekStart`` (a Monday).
+    """
+
+    userId: str
+    preferencesDigest: str
+    weekStart: date
+    menuBook: MenuBook
+    createdAt: datetime
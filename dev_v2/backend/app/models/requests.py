@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 
 from app.models.enums import Difficulty
 from app.models.menu import MenuBook, WeekMenus
+from app.models.shopping import ShoppingList
 from app.models.user import CookSchedule
 
 
@@ -25,6 +26,8 @@ class ModifyMenuBookRequest(BaseModel):
 
     modification: str = Field(max_length=200)
     currentMenuBook: MenuBook
+    incremental: Optional[bool] = None
+    updateShoppingList: bool = False
 
 
 class GenerateShoppingListRequest(BaseModel):
@@ -34,6 +37,35 @@ class GenerateShoppingListRequest(BaseModel):
     menus: WeekMenus
 
 
+class UpdateShoppingListRequest(BaseModel):
+    """Request to update a shopping list after its menus changed."""
+
+    shoppingList: ShoppingList
+    previousMenus: WeekMenus
+    menus: WeekMenus
+
+
+class UpdateCurrentDayRequest(BaseModel):
+    """Request to change the selected day of the week."""
+
+    currentDayIndex: int = Field(ge=0, le=6)
+
+
+class UpdateShoppingItemRequest(BaseModel):
+    """Request to mark a shopping item as purchased or not."""
+
+    purchased: bool
+
+
+class MenuBookPage(BaseModel):
+    """One page of the menu book history, newest first."""
+
+    items: list[MenuBook]
+    total: int
+    offset: int
+    limit: int
+
+
 class ErrorDetail(BaseModel):
     """Details about a specific error."""
 
@@ -1,5 +1,40 @@
 """Repository layer for data access."""
 
-from app.repositories.user_state import UserStateRepository, get_user_state_repository
+from app.repositories.dish_library import (
+    IDishLibraryRepository,
+    SQLiteDishLibraryRepository,
+    get_dish_library_repository,
+)
+from app.repositories.etags import check_precondition, state_etag
+from app.repositories.jobs import MenuBookJobRepository, get_menu_book_job_repository
+from app.repositories.precomputed import (
+    PrecomputedMenuBookRepository,
+    get_precomputed_menu_book_repository,
+)
+from app.repositories.sqlite_user_state import DEFAULT_USER_ID, SQLiteUserStateRepository
+from app.repositories.user_state import (
+    AsyncUserStateRepository,
+    IUserStateRepository,
+    UserStateRepository,
+    get_async_user_state_repository,
+    get_user_state_repository,
+)
 
-__all__ = ["UserStateRepository", "get_user_state_repository"]
+__all__ = [
+    "IDishLibraryRepository",
+    "SQLiteDishLibraryRepository",
+    "get_dish_library_repository",
+    "MenuBookJobRepository",
+    "get_menu_book_job_repository",
+    "PrecomputedMenuBookRepository",
+    "get_precomputed_menu_book_repository",
+    "DEFAULT_USER_ID",
+    "AsyncUserStateRepository",
+    "IUserStateRepository",
+    "SQLiteUserStateRepository",
+    "UserStateRepository",
+    "get_async_user_state_repository",
+    "get_user_state_repository",
+    "check_precondition",
+    "state_etag",
+]
@@ -0,0 +1,109 @@
+"""Dish library repository for reusing generated recipes."""
+
+import logging
+import sqlite3
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.dish import LibraryDish
+
+logger = logging.getLogger(__name__)
+
+
+class IDishLibraryRepository(Protocol):
+    """Interface for dish library persistence."""
+
+    def list_since(self, cursor: int = 0) -> tuple[list[LibraryDish], int]:
+        """Return dishes saved after ``cursor``, oldest first, and the new cursor."""
+        ...
+
+    def save_many(self, dishes: list[LibraryDish]) -> None:
+        """Insert or replace dishes by key."""
+        ...
+
+
+class SQLiteDishLibraryRepository:
+    """Dish library in a SQLite file shared by every worker process on the host.
+
+    Every upsert stamps the dish with the next value of an indexed ``seq``
+    column. Writers are serialized by ``BEGIN IMMEDIATE``, so ``seq``
+    only grows in commit order and each worker can pick up dishes added
+    by the others without reloading the whole library, whatever the
+    hosts' clocks say.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dishes ("
+                "key TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, "
+                "seq INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(dishes)")}
+            if "seq" not in columns:
+                # Libraries created before ``seq`` existed: number rows in save order.
+                conn.execute("ALTER TABLE dishes ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+                conn.execute(
+                    "UPDATE dishes SET seq = (SELECT COUNT(*) FROM dishes AS older "
+                    "WHERE older.updated_at <= dishes.updated_at)"
+                )
+            conn.execute("DROP INDEX IF EXISTS idx_dishes_updated_at")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_dishes_seq ON dishes (seq)")
+
+    def _connect(self) -> closing[sqlite3.Connection]:
+        return closing(sqlite3.connect(self._db_path, timeout=10.0, isolation_level=None))
+
+    def list_since(self, cursor: int = 0) -> tuple[list[LibraryDish], int]:
+        """Return dishes saved after ``cursor``, oldest first, and the new cursor."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, data, seq FROM dishes WHERE seq > ? ORDER BY seq",
+                (cursor,),
+            ).fetchall()
+        dishes = []
+        for key, data, seq in rows:
+            cursor = max(cursor, seq)
+            try:
+                dishes.append(LibraryDish.model_validate_json(data))
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid library dish {key}: {e}")
+        return dishes, cursor
+
+    def save_many(self, dishes: list[LibraryDish]) -> None:
+        """Insert or replace dishes by key in one transaction."""
+        if not dishes:
+            return
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (last_seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM dishes").fetchone()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO dishes (key, data, updated_at, seq) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (dish.key, dish.model_dump_json(), dish.updatedAt.timestamp(), seq)
+                        for seq, dish in enumerate(dishes, start=last_seq + 1)
+                    ],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+
+@lru_cache
+def get_dish_library_repository() -> IDishLibraryRepository:
+    """Get cached dish library repository instance."""
+    return SQLiteDishLibraryRepository(
+        settings.dish_library_path or (settings.data_dir / "dishes.sqlite3")
+    )
@@ -0,0 +1,64 @@
+"""Entity tags and conditional-save checks shared by user state stores."""
+
+import hashlib
+import json
+
+from app.core.exceptions import PreconditionFailedError
+from app.models.state import UserState
+
+
+def content_digest(data: str) -> str:
+    """SHA-256 hex digest of a serialized document, e.g. one menu book."""
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def compose_etag(
+    preferences: str | None,
+    current_week_id: str | None,
+    current_day_index: int,
+    is_menu_open: bool,
+    book_digests: list[str],
+) -> str:
+    """Entity tag of a state given its scalar fields and per-book digests."""
+    header = json.dumps([preferences, current_week_id, current_day_index, is_menu_open])
+    combined = hashlib.sha256("\n".join([header, *book_digests]).encode("utf-8")).hexdigest()
+    return f'"{combined[:32]}"'
+
+
+def state_etag(state: UserState) -> str:
+    """Strong HTTP entity tag derived from the state's content.
+
+    The tag is built from the scalar fields and one digest per menu book,
+    the same digests the SQLite store keeps per row, so a store can
+    recompute it without deserializing the books.
+    """
+    return compose_etag(
+        state.preferences.model_dump_json() if state.preferences else None,
+        state.currentWeekId,
+        state.currentDayIndex,
+        state.isMenuOpen,
+        [content_digest(book.model_dump_json()) for book in state.menuBooks],
+    )
+
+
+def check_precondition(current_etag: str, if_match: str | None) -> None:
+    """Refuse a conditional save when the stored state is not the one the caller saw.
+
+    ``if_match`` may list several tags separated by commas; a ``W/``
+    prefix is ignored, and the save proceeds when any tag is ``*`` or
+    ``current_etag``.
+
+    Raises:
+        PreconditionFailedError: When no listed tag matches.
+    """
+    if if_match is None:
+        return
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in ("*", current_etag):
+            return
+    raise PreconditionFailedError(
+        "User state was modified by another client; reload and retry."
+    )
@@ -0,0 +1,156 @@
+"""Menu book job repository for durable background generation."""
+
+import logging
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.enums import MenuBookStatus
+from app.models.jobs import MenuBookJob
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class MenuBookJobRepository:
+    """Stores one JSON document per job so jobs survive process restarts.
+
+    A job being processed is claimed with an exclusive ``.lock`` file
+    holding the owner's PID, so several workers sharing the directory do
+    not run the same job twice. The lock is written to a temporary file
+    and hard-linked into place, so it never exists without its owner.
+    """
+
+    def __init__(self, jobs_dir: Path | None = None) -> None:
+        self._jobs_dir = jobs_dir or (settings.data_dir / "jobs")
+        self._lock = Lock()
+        self._claimed: set[str] = set()
+
+    def _job_path(self, job_id: str) -> Path:
+        return self._jobs_dir / f"{job_id}.json"
+
+    def _lock_path(self, job_id: str) -> Path:
+        return self._jobs_dir / f"{job_id}.lock"
+
+    def get(self, job_id: str) -> Optional[MenuBookJob]:
+        """Load a job by ID, or None if it does not exist."""
+        if not _JOB_ID_PATTERN.match(job_id):
+            return None
+        path = self._job_path(job_id)
+        if not path.exists():
+            return None
+        try:
+            return MenuBookJob.model_validate_json(path.read_text(encoding="utf-8"))
+        except (OSError, ValidationError) as e:
+            logger.warning(f"Failed to load job {job_id}: {e}")
+            return None
+
+    def save(self, job: MenuBookJob) -> None:
+        """Atomically write a job document."""
+        with self._lock:
+            self._jobs_dir.mkdir(parents=True, exist_ok=True)
+            path = self._job_path(job.jobId)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(job.model_dump_json(), encoding="utf-8")
+            os.replace(tmp_path, path)
+
+    def delete(self, job_id: str) -> None:
+        """Remove a job and its claim."""
+        self._job_path(job_id).unlink(missing_ok=True)
+        self._lock_path(job_id).unlink(missing_ok=True)
+
+    def list_pending(self) -> list[MenuBookJob]:
+        """Return jobs that have not finished, oldest first."""
+        if not self._jobs_dir.exists():
+            return []
+        jobs = []
+        for path in self._jobs_dir.glob("*.json"):
+            job = self.get(path.stem)
+            if job is not None and job.status == MenuBookStatus.generating:
+                jobs.append(job)
+        return sorted(jobs, key=lambda job: job.createdAt)
+
+    def delete_finished(self, updated_before: datetime) -> int:
+        """Delete finished jobs last updated before ``updated_before``; return how many.
+
+        Claim files whose job no longer exists are removed too, once no
+        live process holds them.
+        """
+        if not self._jobs_dir.exists():
+            return 0
+        deleted = 0
+        for path in self._jobs_dir.glob("*.json"):
+            job = self.get(path.stem)
+            if job is None or job.status == MenuBookStatus.generating:
+                continue
+            if job.updatedAt < updated_before:
+                self.delete(job.jobId)
+                deleted += 1
+        for lock_path in self._jobs_dir.glob("*.lock"):
+            job_id = lock_path.stem
+            if not self._job_path(job_id).exists() and self._is_stale(job_id, lock_path):
+                lock_path.unlink(missing_ok=True)
+        return deleted
+
+    def claim(self, job_id: str) -> bool:
+        """Claim a job for this process; False if a live process owns it."""
+        self._jobs_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self._lock_path(job_id)
+        tmp_path = self._jobs_dir / f"{job_id}.lock.{os.getpid()}.tmp"
+        tmp_path.write_text(str(os.getpid()), encoding="utf-8")
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, lock_path)
+                except FileExistsError:
+                    if not self._is_stale(job_id, lock_path):
+                        return False
+                    lock_path.unlink(missing_ok=True)
+                    continue
+                self._claimed.add(job_id)
+                return True
+            return False
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def release(self, job_id: str) -> None:
+        """Release this process's claim on a job."""
+        self._claimed.discard(job_id)
+        self._lock_path(job_id).unlink(missing_ok=True)
+
+    def _is_stale(self, job_id: str, lock_path: Path) -> bool:
+        try:
+            owner = lock_path.read_text(encoding="utf-8").strip()
+        except OSError:
+            return False
+        if not owner:
+            # Locks written by older code may briefly exist without a PID.
+            return False
+        try:
+            pid = int(owner)
+        except ValueError:
+            return True
+        if pid == os.getpid():
+            # Same PID but not claimed here: left over from a previous run.
+            return job_id not in self._claimed
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+
+@lru_cache
+def get_menu_book_job_repository() -> MenuBookJobRepository:
+    """Get cached menu book job repository instance."""
+    return MenuBookJobRepository()
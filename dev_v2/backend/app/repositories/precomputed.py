@@ -0,0 +1,156 @@
+"""Repository for menu books precomputed ahead of the user asking."""
+
+import logging
+import os
+import re
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.jobs import PrecomputedMenuBook
+
+logger = logging.getLogger(__name__)
+
+_USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Claim files held by this process, shared by every repository instance.
+_process_claims: set[Path] = set()
+
+
+class PrecomputedMenuBookRepository:
+    """Stores at most one precomputed menu book per user as a JSON document.
+
+    ``take`` renames the document before reading it, so when several
+    workers share the directory only one of them serves a given book.
+    Generating a user's book for a week is claimed with an exclusive
+    ``.claim`` file, so the week is generated once across workers.
+    """
+
+    def __init__(self, books_dir: Path | None = None) -> None:
+        self._books_dir = books_dir or (settings.data_dir / "precomputed")
+        self._lock = Lock()
+
+    def _book_path(self, user_id: str) -> Path:
+        return self._books_dir / f"{user_id}.json"
+
+    def get(self, user_id: str) -> Optional[PrecomputedMenuBook]:
+        """Load a user's precomputed book, or None if there is none."""
+        if not _USER_ID_PATTERN.match(user_id):
+            return None
+        return self._read(self._book_path(user_id))
+
+    def save(self, precomputed: PrecomputedMenuBook) -> None:
+        """Atomically write a user's precomputed book, replacing any previous one."""
+        with self._lock:
+            self._books_dir.mkdir(parents=True, exist_ok=True)
+            path = self._book_path(precomputed.userId)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(precomputed.model_dump_json(), encoding="utf-8")
+            os.replace(tmp_path, path)
+
+    def delete(self, user_id: str) -> None:
+        """Remove a user's precomputed book."""
+        if _USER_ID_PATTERN.match(user_id):
+            self._book_path(user_id).unlink(missing_ok=True)
+
+    def take(self, user_id: str) -> Optional[PrecomputedMenuBook]:
+        """Remove and return a user's precomputed book, or None if there is none."""
+        if not _USER_ID_PATTERN.match(user_id):
+            return None
+        path = self._book_path(user_id)
+        taken_path = path.with_suffix(f".{os.getpid()}.taken")
+        try:
+            os.replace(path, taken_path)
+        except FileNotFoundError:
+            return None
+        try:
+            return self._read(taken_path)
+        finally:
+            taken_path.unlink(missing_ok=True)
+
+    def claim(self, user_id: str, week_start: date, digest: str) -> bool:
+        """Claim generating a user's book for a week and preferences digest.
+
+        Returns False if the claim is already held. The claim file holds
+        the owner's PID while generating and ``done`` once the book is
+        saved. Claims left by dead processes are taken over; the user's
+        other claims are removed.
+        """
+        if not _USER_ID_PATTERN.match(user_id):
+            return False
+        self._books_dir.mkdir(parents=True, exist_ok=True)
+        claim_path = self._claim_path(user_id, week_start, digest)
+        for _ in range(2):
+            try:
+                fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._is_stale(claim_path):
+                    return False
+                claim_path.unlink(missing_ok=True)
+                continue
+            with os.fdopen(fd, "w") as handle:
+                handle.write(str(os.getpid()))
+            _process_claims.add(claim_path)
+            for old_claim in self._books_dir.glob(f"{user_id}.*.claim"):
+                if old_claim != claim_path:
+                    old_claim.unlink(missing_ok=True)
+            return True
+        return False
+
+    def complete_claim(self, user_id: str, week_start: date, digest: str) -> None:
+        """Mark a claimed week as generated so no process generates it again."""
+        claim_path = self._claim_path(user_id, week_start, digest)
+        claim_path.write_text("done", encoding="utf-8")
+        _process_claims.discard(claim_path)
+
+    def release_claim(self, user_id: str, week_start: date, digest: str) -> None:
+        """Give up a claim, e.g. after a failed generation, so it can be retried."""
+        claim_path = self._claim_path(user_id, week_start, digest)
+        _process_claims.discard(claim_path)
+        claim_path.unlink(missing_ok=True)
+
+    def _claim_path(self, user_id: str, week_start: date, digest: str) -> Path:
+        return self._books_dir / f"{user_id}.{week_start.isoformat()}-{digest[:16]}.claim"
+
+    def _is_stale(self, claim_path: Path) -> bool:
+        try:
+            owner = claim_path.read_text(encoding="utf-8").strip()
+        except OSError:
+            return True
+        if owner in ("done", ""):
+            # Finished, or just created and the PID not yet written.
+            return False
+        try:
+            pid = int(owner)
+        except ValueError:
+            return True
+        if pid == os.getpid():
+            # Same PID but not claimed here: left over from a previous run.
+            return claim_path not in _process_claims
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def _read(self, path: Path) -> Optional[PrecomputedMenuBook]:
+        if not path.exists():
+            return None
+        try:
+            return PrecomputedMenuBook.model_validate_json(path.read_text(encoding="utf-8"))
+        except (OSError, ValidationError) as e:
+            logger.warning(f"Failed to load precomputed menu book {path.name}: {e}")
+            return None
+
+
+@lru_cache
+def get_precomputed_menu_book_repository() -> PrecomputedMenuBookRepository:
+    """Get cached precomputed menu book repository instance."""
+    return PrecomputedMenuBookRepository()
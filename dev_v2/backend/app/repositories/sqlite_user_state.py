@@ -0,0 +1,418 @@
+"""SQLite-backed user state repository."""
+
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from pydantic import ValidationError
+
+from app.models.menu import MenuBook
+from app.models.shopping import ShoppingItem
+from app.models.state import UserState
+from app.models.user import UserPreferences
+from app.repositories.etags import (
+    check_precondition,
+    compose_etag,
+    content_digest,
+    state_etag,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_ID = "default"
+
+
+class SQLiteUserStateRepository:
+    """User state stored per user in SQLite, one row per menu book.
+
+    WAL journaling lets several uvicorn workers read while one writes,
+    and every save runs in a ``BEGIN IMMEDIATE`` transaction so writers
+    from different processes are serialized by SQLite itself. Saving only
+    rewrites menu books whose content changed.
+
+    When ``json_path`` points at an existing ``state.json`` and the
+    database has not been seeded yet, that file is imported once for the
+    default user.
+    """
+
+    def __init__(self, db_path: Path, json_path: Path | None = None) -> None:
+        self._db_path = db_path
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "user_id TEXT PRIMARY KEY, "
+                "preferences TEXT, "
+                "current_week_id TEXT, "
+                "current_day_index INTEGER NOT NULL DEFAULT 0, "
+                "is_menu_open INTEGER NOT NULL DEFAULT 1, "
+                "updated_at REAL NOT NULL, "
+                "etag TEXT, "
+                "last_seen REAL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+            if "etag" not in columns:
+                conn.execute("ALTER TABLE users ADD COLUMN etag TEXT")
+            if "last_seen" not in columns:
+                conn.execute("ALTER TABLE users ADD COLUMN last_seen REAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS menu_books ("
+                "user_id TEXT NOT NULL, "
+                "book_id TEXT NOT NULL, "
+                "position INTEGER NOT NULL, "
+                "digest TEXT NOT NULL, "
+                "data TEXT NOT NULL, "
+                "PRIMARY KEY (user_id, book_id))"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_menu_books_position "
+                "ON menu_books (user_id, position)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        if json_path is not None:
+            self.migrate_from_json(json_path)
+
+    def _connect(self) -> closing[sqlite3.Connection]:
+        return closing(sqlite3.connect(self._db_path, timeout=10.0, isolation_level=None))
+
+    def load(self, user_id: str = DEFAULT_USER_ID) -> UserState:
+        """Load a user's state; empty state if the user has none.
+
+        Both selects run in one read transaction, so a save committed by
+        another worker in between cannot mix its rows into the result.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            try:
+                return self._load(conn, user_id)
+            finally:
+                conn.execute("COMMIT")
+
+    def _load(self, conn: sqlite3.Connection, user_id: str) -> UserState:
+        user = conn.execute(
+            "SELECT preferences, current_week_id, current_day_index, is_menu_open "
+            "FROM users WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        if user is None:
+            return UserState()
+        rows = conn.execute(
+            "SELECT book_id, data FROM menu_books WHERE user_id = ? ORDER BY position",
+            (user_id,),
+        ).fetchall()
+
+        preferences_json, current_week_id, current_day_index, is_menu_open = user
+        menu_books = []
+        for book_id, data in rows:
+            try:
+                menu_books.append(MenuBook.model_validate_json(data))
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid menu book {book_id}: {e}")
+        try:
+            preferences = (
+                UserPreferences.model_validate_json(preferences_json)
+                if preferences_json
+                else None
+            )
+        except ValidationError as e:
+            logger.warning(f"Failed to load preferences for {user_id}: {e}")
+            preferences = None
+        return UserState(
+            preferences=preferences,
+            menuBooks=menu_books,
+            currentWeekId=current_week_id,
+            currentDayIndex=current_day_index,
+            isMenuOpen=bool(is_menu_open),
+        )
+
+    def save(
+        self,
+        state: UserState,
+        user_id: str = DEFAULT_USER_ID,
+        if_match: str | None = None,
+    ) -> None:
+        """Save a user's state, writing only menu books that changed.
+
+        The ETag stored with the user's row is compared against
+        ``if_match`` inside the write transaction, so a concurrent save
+        from another worker cannot slip in between the check and the
+        write, and the stored books are never loaded for the check.
+        Saving a state identical to the stored one writes nothing.
+
+        Raises:
+            PreconditionFailedError: If ``if_match`` does not match the
+                stored state's ETag.
+        """
+        books = [
+            (book.id, position, book.model_dump_json())
+            for position, book in enumerate(state.menuBooks)
+        ]
+        preferences = state.preferences.model_dump_json() if state.preferences else None
+        etag = compose_etag(
+            preferences,
+            state.currentWeekId,
+            state.currentDayIndex,
+            state.isMenuOpen,
+            [content_digest(data) for _, _, data in books],
+        )
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                current = self._current_etag(conn, user_id)
+                check_precondition(current, if_match)
+                if current == etag:
+                    conn.execute("COMMIT")
+                    logger.debug("User state unchanged; skipping save")
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO users (user_id, preferences, current_week_id, "
+                    "current_day_index, is_menu_open, updated_at, etag) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        user_id,
+                        preferences,
+                        state.currentWeekId,
+                        state.currentDayIndex,
+                        int(state.isMenuOpen),
+                        time.time(),
+                        etag,
+                    ),
+                )
+                stored = {
+                    book_id: (position, digest)
+                    for book_id, position, digest in conn.execute(
+                        "SELECT book_id, position, digest FROM menu_books WHERE user_id = ?",
+                        (user_id,),
+                    )
+                }
+                for book_id, position, data in books:
+                    digest = content_digest(data)
+                    previous = stored.pop(book_id, None)
+                    if previous == (position, digest):
+                        continue
+                    if previous is not None and previous[1] == digest:
+                        conn.execute(
+                            "UPDATE menu_books SET position = ? WHERE user_id = ? AND book_id = ?",
+                            (position, user_id, book_id),
+                        )
+                        continue
+                    conn.execute(
+                        "INSERT OR REPLACE INTO menu_books "
+                        "(user_id, book_id, position, digest, data) VALUES (?, ?, ?, ?, ?)",
+                        (user_id, book_id, position, digest, data),
+                    )
+                conn.executemany(
+                    "DELETE FROM menu_books WHERE user_id = ? AND book_id = ?",
+                    [(user_id, book_id) for book_id in stored],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.debug("User state saved successfully")
+
+    def set_current_day_index(self, index: int, user_id: str = DEFAULT_USER_ID) -> None:
+        """Update only the selected day."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._touch(conn, user_id)
+                conn.execute(
+                    "UPDATE users SET current_day_index = ? WHERE user_id = ?",
+                    (index, user_id),
+                )
+                self._refresh_etag(conn, user_id)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def set_item_purchased(
+        self,
+        book_id: str,
+        item_id: str,
+        purchased: bool,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> ShoppingItem | None:
+        """Set one shopping item's ``purchased`` flag, rewriting only its book."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT data FROM menu_books WHERE user_id = ? AND book_id = ?",
+                    (user_id, book_id),
+                ).fetchone()
+                book = MenuBook.model_validate_json(row[0]) if row else None
+                found = None
+                for item in book.shoppingList.items if book else []:
+                    if item.id == item_id:
+                        item.purchased = purchased
+                        found = item
+                        break
+                if found is not None:
+                    data = book.model_dump_json()
+                    conn.execute(
+                        "UPDATE menu_books SET digest = ?, data = ? "
+                        "WHERE user_id = ? AND book_id = ?",
+                        (content_digest(data), data, user_id, book_id),
+                    )
+                    self._touch(conn, user_id)
+                    self._refresh_etag(conn, user_id)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return found
+
+    def append_menu_book(self, book: MenuBook, user_id: str = DEFAULT_USER_ID) -> None:
+        """Add a menu book after the existing ones, replacing one with the same id."""
+        data = book.model_dump_json()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._touch(conn, user_id)
+                conn.execute(
+                    "INSERT INTO menu_books (user_id, book_id, position, digest, data) "
+                    "VALUES (?, ?, (SELECT COALESCE(MAX(position) + 1, 0) "
+                    "FROM menu_books WHERE user_id = ?), ?, ?) "
+                    "ON CONFLICT (user_id, book_id) DO UPDATE SET "
+                    "digest = excluded.digest, data = excluded.data",
+                    (user_id, book.id, user_id, content_digest(data), data),
+                )
+                self._refresh_etag(conn, user_id)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def list_menu_books(
+        self, offset: int = 0, limit: int = 20, user_id: str = DEFAULT_USER_ID
+    ) -> tuple[list[MenuBook], int]:
+        """Return a page of menu books, newest first, and the total count."""
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            try:
+                (total,) = conn.execute(
+                    "SELECT COUNT(*) FROM menu_books WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                rows = conn.execute(
+                    "SELECT book_id, data FROM menu_books WHERE user_id = ? "
+                    "ORDER BY position DESC LIMIT ? OFFSET ?",
+                    (user_id, limit, offset),
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        books = []
+        for book_id, data in rows:
+            try:
+                books.append(MenuBook.model_validate_json(data))
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid menu book {book_id}: {e}")
+        return books, total
+
+    def mark_seen(self, user_id: str = DEFAULT_USER_ID) -> None:
+        """Record that the user used the app just now, even without saving."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE users SET last_seen = ? WHERE user_id = ?", (time.time(), user_id)
+            )
+
+    def list_user_preferences(self, active_since: float = 0.0) -> list[tuple[str, UserPreferences]]:
+        """Return ``(user_id, preferences)`` for users with saved preferences.
+
+        Only users last seen or saved at or after the UNIX timestamp
+        ``active_since`` are included.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT user_id, preferences FROM users "
+                "WHERE preferences IS NOT NULL "
+                "AND MAX(updated_at, COALESCE(last_seen, 0)) >= ? ORDER BY user_id",
+                (active_since,),
+            ).fetchall()
+        users = []
+        for user_id, preferences_json in rows:
+            try:
+                users.append((user_id, UserPreferences.model_validate_json(preferences_json)))
+            except ValidationError as e:
+                logger.warning(f"Skipping invalid preferences for {user_id}: {e}")
+        return users
+
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, user_id: str) -> None:
+        """Create the user's row if missing and bump its ``updated_at``."""
+        conn.execute(
+            "INSERT INTO users (user_id, updated_at) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (user_id, time.time()),
+        )
+
+    @classmethod
+    def _current_etag(cls, conn: sqlite3.Connection, user_id: str) -> str:
+        """The stored state's ETag, from the user's row when it has one."""
+        row = conn.execute(
+            "SELECT etag FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return state_etag(UserState())
+        return row[0] or cls._compute_etag(conn, user_id)
+
+    @staticmethod
+    def _compute_etag(conn: sqlite3.Connection, user_id: str) -> str:
+        """Rebuild the ETag from the user's row and the stored book digests."""
+        preferences, current_week_id, current_day_index, is_menu_open = conn.execute(
+            "SELECT preferences, current_week_id, current_day_index, is_menu_open "
+            "FROM users WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        digests = [
+            digest
+            for (digest,) in conn.execute(
+                "SELECT digest FROM menu_books WHERE user_id = ? ORDER BY position",
+                (user_id,),
+            )
+        ]
+        return compose_etag(
+            preferences, current_week_id, current_day_index, bool(is_menu_open), digests
+        )
+
+    @classmethod
+    def _refresh_etag(cls, conn: sqlite3.Connection, user_id: str) -> None:
+        """Store the ETag after a partial update changed the user's rows."""
+        conn.execute(
+            "UPDATE users SET etag = ? WHERE user_id = ?",
+            (cls._compute_etag(conn, user_id), user_id),
+        )
+
+    def migrate_from_json(self, json_path: Path, user_id: str = DEFAULT_USER_ID) -> bool:
+        """Import a legacy ``state.json`` once; returns True if it was imported."""
+        marker = f"migrated:{user_id}"
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                return False
+            has_user = conn.execute(
+                "SELECT 1 FROM users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+
+        imported = False
+        if not has_user and json_path.exists():
+            try:
+                state = UserState.model_validate_json(json_path.read_text(encoding="utf-8"))
+            except (OSError, ValidationError) as e:
+                logger.warning(f"Skipping state migration from {json_path}: {e}")
+            else:
+                self.save(state, user_id)
+                imported = True
+                logger.info(f"Migrated user state from {json_path} into {self._db_path}")
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (marker, str(json_path)),
+            )
+        return imported
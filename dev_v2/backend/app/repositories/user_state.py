@@ -2,67 +2,532 @@
 
 import json
 import logging
+import os
+import re
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 from functools import lru_cache
 from pathlib import Path
 from threading import Lock
-from typing import Protocol
+from typing import Callable, Protocol, TypeVar
 
+import anyio
+from anyio.abc import TaskGroup
 from pydantic import ValidationError
 
 from app.core.config import settings
+from app.models.menu import MenuBook
+from app.models.shopping import ShoppingItem
 from app.models.state import UserState
+from app.models.user import UserPreferences
+from app.repositories.etags import check_precondition, state_etag
+from app.repositories.sqlite_user_state import DEFAULT_USER_ID, SQLiteUserStateRepository
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+_USER_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Activity only matters to the day for precomputation, so reads record it hourly.
+_SEEN_RESOLUTION_SECONDS = 3600.0
+
 
 class IUserStateRepository(Protocol):
     """Interface for user state persistence."""
 
-    def load(self) -> UserState:
+    def load(self, user_id: str = DEFAULT_USER_ID) -> UserState:
         """Load user state from storage."""
         ...
 
-    def save(self, state: UserState) -> None:
-        """Save user state to storage."""
+    def save(
+        self,
+        state: UserState,
+        user_id: str = DEFAULT_USER_ID,
+        if_match: str | None = None,
+    ) -> None:
+        """Save user state to storage.
+
+        Raises:
+            PreconditionFailedError: If ``if_match`` is given and does not
+                match the stored state's ETag.
+        """
+        ...
+
+    def set_current_day_index(self, index: int, user_id: str = DEFAULT_USER_ID) -> None:
+        """Update only the selected day."""
+        ...
+
+    def set_item_purchased(
+        self,
+        book_id: str,
+        item_id: str,
+        purchased: bool,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> ShoppingItem | None:
+        """Set one shopping item's ``purchased`` flag; None if it does not exist."""
+        ...
+
+    def append_menu_book(self, book: MenuBook, user_id: str = DEFAULT_USER_ID) -> None:
+        """Add a menu book after the existing ones, replacing one with the same id."""
+        ...
+
+    def list_menu_books(
+        self, offset: int = 0, limit: int = 20, user_id: str = DEFAULT_USER_ID
+    ) -> tuple[list[MenuBook], int]:
+        """Return a page of menu books, newest first, and the total count."""
+        ...
+
+    def mark_seen(self, user_id: str = DEFAULT_USER_ID) -> None:
+        """Record that the user used the app just now, even without saving."""
+        ...
+
+    def list_user_preferences(self, active_since: float = 0.0) -> list[tuple[str, UserPreferences]]:
+        """Return ``(user_id, preferences)`` for users with saved preferences.
+
+        Only users last seen or saved at or after the UNIX timestamp
+        ``active_since`` are included.
+        """
         ...
 
 
 class UserStateRepository:
-    """JSON file-based user state repository with thread-safe operations."""
+    """JSON file-based user state repository with thread-safe operations.
+
+    The default user's state lives in ``data_path`` (``state.json``);
+    every other user gets a sibling file named after them, e.g.
+    ``state.alice.json``.
+
+    The ETag of each file this process read or wrote is remembered
+    together with the file's inode, size and modification time, so
+    conditional saves only re-read a file another process replaced.
+    """
 
     def __init__(self, data_path: Path | None = None) -> None:
         self._data_path = data_path or (settings.data_dir / "state.json")
         self._lock = Lock()
+        self._etags: dict[Path, tuple[tuple[int, int, int], str]] = {}
 
-    def load(self) -> UserState:
+    def _user_path(self, user_id: str) -> Path:
+        """State file of a user.
+
+        Raises:
+            ValueError: If ``user_id`` is not usable in a file name.
+        """
+        if user_id == DEFAULT_USER_ID:
+            return self._data_path
+        if not _USER_ID_PATTERN.match(user_id):
+            raise ValueError(f"Invalid user id {user_id!r}")
+        return self._data_path.with_name(
+            f"{self._data_path.stem}.{user_id}{self._data_path.suffix}"
+        )
+
+    @contextmanager
+    def _file_lock(self, path: Path) -> Iterator[None]:
+        """Hold the in-process lock and, where available, an exclusive ``flock``.
+
+        The ``flock`` on a sidecar ``.lock`` file serializes
+        read-modify-write cycles across worker processes.
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            lock_path = path.with_name(f"{path.name}.lock")
+            with lock_path.open("a") as handle:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def load(self, user_id: str = DEFAULT_USER_ID) -> UserState:
         """Load user state from JSON file.
 
         Returns empty UserState if file doesn't exist or is invalid.
         """
+        path = self._user_path(user_id)
         with self._lock:
-            if not self._data_path.exists():
-                logger.debug("State file not found, returning empty state")
-                return UserState()
+            return self._read(path)
+
+    def save(
+        self,
+        state: UserState,
+        user_id: str = DEFAULT_USER_ID,
+        if_match: str | None = None,
+    ) -> None:
+        """Save user state to JSON file.
+
+        The stored ETag is compared against ``if_match`` under the file
+        lock; an unchanged state is not rewritten.
+
+        Raises:
+            PreconditionFailedError: If ``if_match`` does not match the
+                stored state's ETag.
+        """
+        path = self._user_path(user_id)
+        with self._file_lock(path):
+            current = self._current_etag(path)
+            check_precondition(current, if_match)
+            if current == state_etag(state):
+                logger.debug("User state unchanged; skipping save")
+                return
+            self._write(state, path)
+
+    def set_current_day_index(self, index: int, user_id: str = DEFAULT_USER_ID) -> None:
+        """Update only the selected day."""
+
+        def mutate(state: UserState) -> None:
+            state.currentDayIndex = index
+
+        self._update(mutate, user_id)
+
+    def set_item_purchased(
+        self,
+        book_id: str,
+        item_id: str,
+        purchased: bool,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> ShoppingItem | None:
+        """Set one shopping item's ``purchased`` flag; None if it does not exist."""
+
+        def mutate(state: UserState) -> ShoppingItem | None:
+            for book in state.menuBooks:
+                if book.id != book_id:
+                    continue
+                for item in book.shoppingList.items:
+                    if item.id == item_id:
+                        item.purchased = purchased
+                        return item
+            return None
+
+        return self._update(mutate, user_id)
+
+    def append_menu_book(self, book: MenuBook, user_id: str = DEFAULT_USER_ID) -> None:
+        """Add a menu book after the existing ones, replacing one with the same id."""
+
+        def mutate(state: UserState) -> None:
+            for index, existing in enumerate(state.menuBooks):
+                if existing.id == book.id:
+                    state.menuBooks[index] = book
+                    return
+            state.menuBooks.append(book)
+
+        self._update(mutate, user_id)
+
+    def list_menu_books(
+        self, offset: int = 0, limit: int = 20, user_id: str = DEFAULT_USER_ID
+    ) -> tuple[list[MenuBook], int]:
+        """Return a page of menu books, newest first, and the total count."""
+        books = self.load(user_id).menuBooks
+        newest_first = books[::-1]
+        return newest_first[offset : offset + limit], len(books)
+
+    def mark_seen(self, user_id: str = DEFAULT_USER_ID) -> None:
+        """Record that the user used the app just now, even without saving.
+
+        The time is kept as the modification time of a ``.seen`` file
+        next to the user's state file, so reads never rewrite the state.
+        """
+        path = self._seen_path(user_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def list_user_preferences(self, active_since: float = 0.0) -> list[tuple[str, UserPreferences]]:
+        """Return ``(user_id, preferences)`` for users with saved preferences.
+
+        Only users whose state file was written, or who were marked seen,
+        at or after the UNIX timestamp ``active_since`` are included.
+        """
+        stem, suffix = self._data_path.stem, self._data_path.suffix
+        user_ids = [DEFAULT_USER_ID] + sorted(
+            path.name[len(stem) + 1 : -len(suffix) or None]
+            for path in self._data_path.parent.glob(f"{stem}.*{suffix}")
+        )
+        users = []
+        for user_id in user_ids:
+            if user_id != DEFAULT_USER_ID and not _USER_ID_PATTERN.match(user_id):
+                continue
             try:
-                payload = json.loads(self._data_path.read_text(encoding="utf-8"))
-                return UserState.model_validate(payload)
-            except (json.JSONDecodeError, ValidationError) as e:
-                logger.warning(f"Failed to load state file: {e}")
-                return UserState()
-
-    def save(self, state: UserState) -> None:
-        """Save user state to JSON file."""
-        with self._lock:
-            self._data_path.parent.mkdir(parents=True, exist_ok=True)
-            payload = state.model_dump(mode="json")
-            self._data_path.write_text(
-                json.dumps(payload, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-            logger.debug("User state saved successfully")
+                saved_at = self._user_path(user_id).stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if max(saved_at, _mtime(self._seen_path(user_id))) < active_since:
+                continue
+            preferences = self.load(user_id).preferences
+            if preferences is not None:
+                users.append((user_id, preferences))
+        return users
+
+    def _seen_path(self, user_id: str) -> Path:
+        return self._user_path(user_id).with_suffix(".seen")
+
+    def _update(self, mutate: Callable[[UserState], T], user_id: str) -> T:
+        """Apply ``mutate`` to a user's stored state and write it back atomically."""
+        path = self._user_path(user_id)
+        with self._file_lock(path):
+            state = self._read(path)
+            result = mutate(state)
+            self._write(state, path)
+            return result
+
+    def _current_etag(self, path: Path) -> str:
+        """ETag of the stored state, re-reading the file only if it changed."""
+        key = _stat_key(path)
+        cached = self._etags.get(path)
+        if key is not None and cached is not None and cached[0] == key:
+            return cached[1]
+        etag = state_etag(self._read(path))
+        if key is not None:
+            self._etags[path] = (key, etag)
+        return etag
+
+    def _read(self, path: Path) -> UserState:
+        if not path.exists():
+            logger.debug("State file not found, returning empty state")
+            return UserState()
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            return UserState.model_validate(payload)
+        except (json.JSONDecodeError, ValidationError) as e:
+            logger.warning(f"Failed to load state file {path.name}: {e}")
+            return UserState()
+
+    def _write(self, state: UserState, path: Path) -> None:
+        """Write to a temporary file and rename it over the state file.
+
+        The rename is atomic, so a crash mid-write leaves the previous
+        ``state.json`` intact rather than a truncated one.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = state.model_dump(mode="json")
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                handle.write(json.dumps(payload, ensure_ascii=False, indent=2))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        key = _stat_key(path)
+        if key is not None:
+            self._etags[path] = (key, state_etag(state))
+        logger.debug("User state saved successfully")
+
+
+def _mtime(path: Path) -> float:
+    """A file's modification time; 0 if it does not exist."""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def _stat_key(path: Path) -> tuple[int, int, int] | None:
+    """Identity of a file's current content; None if it does not exist.
+
+    Writes replace the file rather than modifying it, so a new write
+    always shows up as a different inode.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class AsyncUserStateRepository:
+    """Awaitable facade over a user state repository.
+
+    File and SQLite access, JSON decoding and Pydantic validation all run
+    in a worker thread, so request handlers never block the event loop.
+
+    With a positive ``write_behind_seconds`` and the flusher started,
+    ``save`` only records the latest state per user; a burst of saves is
+    written once when the window elapses. Reads see buffered state, other
+    writes flush the user's buffer first, and ``flush`` writes everything
+    still pending (called on shutdown).
+    """
+
+    def __init__(
+        self,
+        repository: IUserStateRepository,
+        write_behind_seconds: float | None = None,
+    ) -> None:
+        self._repository = repository
+        self._window = (
+            settings.user_state_write_behind_seconds
+            if write_behind_seconds is None
+            else write_behind_seconds
+        )
+        self._pending: dict[str, UserState] = {}
+        self._seen: dict[str, float] = {}
+        self._dirty = anyio.Event()
+        self._write_lock = anyio.Lock()
+        self._running = False
+
+    @property
+    def repository(self) -> IUserStateRepository:
+        """The wrapped synchronous repository."""
+        return self._repository
+
+    @property
+    def buffering(self) -> bool:
+        """Whether saves are currently coalesced instead of written through."""
+        return self._running and self._window > 0
+
+    async def start(self, task_group: TaskGroup) -> None:
+        """Start the background flusher when write-behind is enabled."""
+        if self._window > 0:
+            task_group.start_soon(self._flusher)
+            self._running = True
+
+    async def flush(self, user_id: str | None = None) -> None:
+        """Write buffered state for one user, or for everyone."""
+        async with self._write_lock:
+            await self._flush_locked(user_id)
+
+    async def _flush_locked(self, user_id: str | None) -> None:
+        """Write buffered state; the caller holds ``_write_lock``."""
+        if user_id is None:
+            pending, self._pending = self._pending, {}
+        elif user_id in self._pending:
+            pending = {user_id: self._pending.pop(user_id)}
+        else:
+            return
+        unwritten = dict(pending)
+        for pending_user, state in pending.items():
+            try:
+                await anyio.to_thread.run_sync(self._repository.save, state, pending_user)
+            except BaseException:
+                # Keep every state not yet written buffered, unless a newer
+                # save replaced it meanwhile.
+                for unwritten_user, unwritten_state in unwritten.items():
+                    self._pending.setdefault(unwritten_user, unwritten_state)
+                raise
+            del unwritten[pending_user]
+        if pending:
+            logger.debug(f"Flushed buffered user state for {len(pending)} user(s)")
+
+    async def load(self, user_id: str = DEFAULT_USER_ID) -> UserState:
+        """Load user state, including saves not yet written."""
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            return pending.model_copy(deep=True)
+        return await anyio.to_thread.run_sync(self._repository.load, user_id)
+
+    async def save(
+        self,
+        state: UserState,
+        user_id: str = DEFAULT_USER_ID,
+        if_match: str | None = None,
+    ) -> str:
+        """Save user state and return its new ETag.
+
+        Args:
+            state: State to store.
+            user_id: Owner of the state.
+            if_match: ETag the caller last saw; the save is refused with
+                PreconditionFailedError when the stored state differs.
+                Conditional saves are never buffered: the backend checks
+                the ETag in the same transaction as the write, so workers
+                sharing the store cannot overwrite each other.
+        """
+        async with self._write_lock:
+            if if_match is not None:
+                await self._flush_locked(user_id)
+                await anyio.to_thread.run_sync(
+                    self._repository.save, state, user_id, if_match
+                )
+            elif self.buffering:
+                self._pending[user_id] = state.model_copy(deep=True)
+                self._dirty.set()
+            else:
+                await anyio.to_thread.run_sync(self._repository.save, state, user_id)
+        return state_etag(state)
+
+    async def set_current_day_index(self, index: int, user_id: str = DEFAULT_USER_ID) -> None:
+        """Update only the selected day."""
+        await self.flush(user_id)
+        await anyio.to_thread.run_sync(self._repository.set_current_day_index, index, user_id)
+
+    async def set_item_purchased(
+        self,
+        book_id: str,
+        item_id: str,
+        purchased: bool,
+        user_id: str = DEFAULT_USER_ID,
+    ) -> ShoppingItem | None:
+        """Set one shopping item's ``purchased`` flag; None if it does not exist."""
+        await self.flush(user_id)
+        return await anyio.to_thread.run_sync(
+            self._repository.set_item_purchased, book_id, item_id, purchased, user_id
+        )
+
+    async def append_menu_book(self, book: MenuBook, user_id: str = DEFAULT_USER_ID) -> None:
+        """Add a menu book after the existing ones, replacing one with the same id."""
+        await self.flush(user_id)
+        await anyio.to_thread.run_sync(self._repository.append_menu_book, book, user_id)
+
+    async def list_menu_books(
+        self, offset: int = 0, limit: int = 20, user_id: str = DEFAULT_USER_ID
+    ) -> tuple[list[MenuBook], int]:
+        """Return a page of menu books, newest first, and the total count."""
+        await self.flush(user_id)
+        return await anyio.to_thread.run_sync(
+            self._repository.list_menu_books, offset, limit, user_id
+        )
+
+    async def mark_seen(self, user_id: str = DEFAULT_USER_ID) -> None:
+        """Record that the user used the app, at most once per ``_SEEN_RESOLUTION_SECONDS``."""
+        now = time.monotonic()
+        last = self._seen.get(user_id)
+        if last is not None and now - last < _SEEN_RESOLUTION_SECONDS:
+            return
+        self._seen[user_id] = now
+        await anyio.to_thread.run_sync(self._repository.mark_seen, user_id)
+
+    async def list_user_preferences(
+        self, active_since: float = 0.0
+    ) -> list[tuple[str, UserPreferences]]:
+        """Return ``(user_id, preferences)`` for users seen or saved since then."""
+        await self.flush()
+        return await anyio.to_thread.run_sync(
+            self._repository.list_user_preferences, active_since
+        )
+
+    async def _flusher(self) -> None:
+        while True:
+            await self._dirty.wait()
+            await anyio.sleep(self._window)
+            self._dirty = anyio.Event()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered user state, retrying")
+                self._dirty.set()
+
+
+@lru_cache
+def get_user_state_repository() -> IUserStateRepository:
+    """Get cached user state repository instance for the configured backend."""
+    json_path = settings.data_dir / "state.json"
+    if settings.user_state_backend == "sqlite":
+        db_path = settings.user_state_db_path or (settings.data_dir / "state.sqlite3")
+        return SQLiteUserStateRepository(db_path, json_path=json_path)
+    return UserStateRepository(json_path)
 
 
 @lru_cache
-def get_user_state_repository() -> UserStateRepository:
-    """Get cached user state repository instance."""
-    return UserStateRepository()
+def get_async_user_state_repository() -> AsyncUserStateRepository:
+    """Get the awaitable facade over the configured user state repository."""
+    return AsyncUserStateRepository(get_user_state_repository())
@@ -1,12 +1,26 @@
 """Business logic services."""
 
+from app.services.dish_library import DishLibrary, get_dish_library
+from app.services.ingredient_classifier import IngredientClassifier, get_ingredient_classifier
+from app.services.job_queue import MenuBookJobQueue, get_menu_book_job_queue
 from app.services.menu_service import MenuService, get_menu_service
+from app.services.precompute import MenuBookPrecomputer, get_menu_book_precomputer
+from app.services.shopping_aggregator import ShoppingAggregator
 from app.services.shopping_service import ShoppingService, get_shopping_service
 from app.services.validators import MenuValidator, ShoppingValidator
 
 __all__ = [
+    "DishLibrary",
+    "get_dish_library",
+    "IngredientClassifier",
+    "get_ingredient_classifier",
+    "MenuBookJobQueue",
+    "get_menu_book_job_queue",
     "MenuService",
     "get_menu_service",
+    "MenuBookPrecomputer",
+    "get_menu_book_precomputer",
+    "ShoppingAggregator",
     "ShoppingService",
     "get_shopping_service",
     "MenuValidator",
@@ -1,12 +1,34 @@
 """AI services for content generation."""
 
-from app.services.ai.client import GeminiClient, get_gemini_client
+from app.services.ai.admission import (
+    AdmissionController,
+    Priority,
+    gemini_priority,
+    get_admission_controller,
+)
+from app.services.ai.cache import ResponseCache, get_response_cache
+from app.services.ai.client import GeminiClient, discard_on_parse_error, get_gemini_client
+from app.services.ai.encoding import MenuEncoding, estimate_tokens
 from app.services.ai.parser import ResponseParser
 from app.services.ai.prompts import PromptBuilder
+from app.services.ai.rate_limit import RateLimiter, get_rate_limiter
+from app.services.ai.singleflight import SingleFlight
 
 __all__ = [
     "GeminiClient",
+    "discard_on_parse_error",
     "get_gemini_client",
+    "AdmissionController",
+    "Priority",
+    "gemini_priority",
+    "get_admission_controller",
+    "ResponseCache",
+    "get_response_cache",
+    "MenuEncoding",
+    "estimate_tokens",
     "ResponseParser",
     "PromptBuilder",
+    "RateLimiter",
+    "get_rate_limiter",
+    "SingleFlight",
 ]
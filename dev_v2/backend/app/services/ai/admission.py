@@ -0,0 +1,166 @@
+"""Admission control for Gemini calls: a concurrency cap with a priority queue."""
+
+import heapq
+import itertools
+import math
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from functools import lru_cache
+
+import anyio
+
+from app.core.config import settings
+from app.core.exceptions import QueueFullError
+from app.core.metrics import get_metrics
+
+
+class Priority(IntEnum):
+    """Order in which waiting Gemini calls are admitted (lowest first)."""
+
+    interactive = 0
+    standard = 1
+    background = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("gemini_priority", default=Priority.standard)
+
+
+@contextmanager
+def gemini_priority(priority: Priority) -> Iterator[None]:
+    """Admit Gemini calls made inside the block with ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "event", "granted", "abandoned")
+
+    def __init__(self, priority: Priority) -> None:
+        self.priority = priority
+        self.event = anyio.Event()
+        self.granted = False
+        self.abandoned = False
+
+
+class AdmissionController:
+    """Caps concurrent Gemini calls and queues the excess by priority.
+
+    At most ``max_concurrent`` calls hold a slot; up to ``max_queued`` more
+    wait and are admitted by priority, first come first served within a
+    priority. Calls arriving at a full queue are rejected at once with
+    ``QueueFullError`` and a Retry-After estimate. Blocking SDK calls run
+    on ``limiter`` so they never occupy the default worker-thread pool.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queued: int = 32) -> None:
+        self._max_concurrent = max(1, max_concurrent)
+        self._max_queued = max(0, max_queued)
+        self._limiter = anyio.CapacityLimiter(self._max_concurrent)
+        self._active = 0
+        self._queued = 0
+        self._heap: list[tuple[int, int, _Waiter]] = []
+        self._order = itertools.count()
+        self._mean_hold: float | None = None
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        """Worker-thread limiter for blocking Gemini SDK calls."""
+        return self._limiter
+
+    @property
+    def has_capacity(self) -> bool:
+        """Whether a call would be admitted without waiting."""
+        return self._active < self._max_concurrent and not self._queued
+
+    def stats(self) -> dict[str, int]:
+        return {"active": self._active, "queued": self._queued}
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority | None = None) -> AsyncIterator[None]:
+        """Hold one of the concurrent Gemini call slots for the block.
+
+        Raises:
+            QueueFullError: When the wait queue is full.
+        """
+        priority = _priority.get() if priority is None else priority
+        await self._acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            self._mean_hold = held if self._mean_hold is None else 0.8 * self._mean_hold + 0.2 * held
+            self._release()
+
+    async def _acquire(self, priority: Priority) -> None:
+        metrics = get_metrics()
+        if self.has_capacity:
+            self._active += 1
+            metrics.observe("omenu_gemini_queue_wait_seconds", 0.0, priority=priority.name)
+            self._report()
+            return
+        if self._queued >= self._max_queued:
+            metrics.inc("omenu_gemini_rejected_total", priority=priority.name)
+            raise QueueFullError(
+                "Too many AI requests in progress, please retry shortly.",
+                retry_after_seconds=self._retry_after(),
+            )
+
+        waiter = _Waiter(priority)
+        heapq.heappush(self._heap, (priority, next(self._order), waiter))
+        self._queued += 1
+        self._report()
+        started = time.monotonic()
+        try:
+            await waiter.event.wait()
+        except BaseException:
+            if waiter.granted:
+                # The slot was handed over as we were cancelled; pass it on.
+                self._release()
+            else:
+                waiter.abandoned = True
+                self._queued -= 1
+                self._report()
+            raise
+        metrics.observe(
+            "omenu_gemini_queue_wait_seconds", time.monotonic() - started, priority=priority.name
+        )
+
+    def _release(self) -> None:
+        while self._heap:
+            _, _, waiter = heapq.heappop(self._heap)
+            if waiter.abandoned:
+                continue
+            # Hand the slot straight to the next waiter; ``_active`` is unchanged.
+            waiter.granted = True
+            self._queued -= 1
+            waiter.event.set()
+            self._report()
+            return
+        self._active -= 1
+        self._report()
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new caller."""
+        mean_hold = self._mean_hold or 5.0
+        return max(1, math.ceil(mean_hold * (self._queued + 1) / self._max_concurrent))
+
+    def _report(self) -> None:
+        metrics = get_metrics()
+        metrics.set("omenu_gemini_in_flight", self._active)
+        metrics.set("omenu_gemini_queue_depth", self._queued)
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Process-wide admission controller for Gemini calls."""
+    return AdmissionController(
+        max_concurrent=settings.gemini_max_concurrency,
+        max_queued=settings.gemini_max_queued,
+    )
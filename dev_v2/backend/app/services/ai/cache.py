@@ -0,0 +1,250 @@
+"""Content-addressed response cache for Gemini generations."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Any, Optional, Protocol
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ICacheBackend(Protocol):
+    """Interface for response cache storage."""
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing/expired."""
+        ...
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value under key."""
+        ...
+
+    def delete(self, key: str) -> None:
+        """Remove the value stored under key, if any."""
+        ...
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """SQLite-backed LRU cache shared across worker processes.
+
+    Uses WAL journaling so concurrent uvicorn workers can read while
+    another writes. Recency is tracked with an ``accessed_at`` column.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600.0,
+    ) -> None:
+        self._db_path = db_path
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+            )
+
+    def _connect(self) -> closing[sqlite3.Connection]:
+        return closing(sqlite3.connect(self._db_path, timeout=5.0, isolation_level=None))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, now + self._ttl_seconds, now),
+                )
+                conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self._max_entries,),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """Cache of Gemini text responses keyed on a hash of the request."""
+
+    def __init__(self, backend: ICacheBackend) -> None:
+        self._backend = backend
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        model_name: str,
+        prompt: str,
+        config: dict[str, Any],
+        response_schema: Any | None = None,
+    ) -> str:
+        """Build a content-addressed key for a generation request."""
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "config": {k: v for k, v in config.items() if k != "response_schema"},
+            "schema": _schema_fingerprint(response_schema),
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=repr)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response, recording a hit or miss."""
+        try:
+            value = self._backend.get(key)
+        except Exception:  # pragma: no cover
+            logger.warning("Response cache lookup failed", exc_info=True)
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response; storage failures are logged, never raised."""
+        try:
+            self._backend.set(key, value)
+        except Exception:  # pragma: no cover
+            logger.warning("Response cache write failed", exc_info=True)
+
+    def delete(self, key: str) -> None:
+        """Evict a response, e.g. one the caller could not parse."""
+        try:
+            self._backend.delete(key)
+        except Exception:  # pragma: no cover
+            logger.warning("Response cache delete failed", exc_info=True)
+
+    def clear(self) -> None:
+        self._backend.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def _schema_fingerprint(schema: Any | None) -> Any:
+    """Return a JSON-serializable representation of a response schema."""
+    if schema is None:
+        return None
+    model_json_schema = getattr(schema, "model_json_schema", None)
+    if callable(model_json_schema):
+        return model_json_schema()
+    return schema
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache | None:
+    """Get the configured response cache, or None when caching is disabled."""
+    backend_name = settings.gemini_cache_backend.lower()
+    if backend_name == "memory":
+        backend: ICacheBackend = MemoryCacheBackend(
+            max_entries=settings.gemini_cache_max_entries,
+            ttl_seconds=settings.gemini_cache_ttl_seconds,
+        )
+    elif backend_name == "sqlite":
+        backend = SQLiteCacheBackend(
+            settings.gemini_cache_path or (settings.data_dir / "gemini_cache.sqlite3"),
+            max_entries=settings.gemini_cache_max_entries,
+            ttl_seconds=settings.gemini_cache_ttl_seconds,
+        )
+    else:
+        return None
+    return ResponseCache(backend)
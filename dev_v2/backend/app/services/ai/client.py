@@ -1,45 +1,106 @@
 """Gemini API client for AI content generation."""
 
 import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
 from functools import lru_cache, partial
 from typing import Any, Optional
 
 import anyio
+import httpx
 from anyio import fail_after
 from google.api_core import exceptions as google_exceptions
 
 from app.core.config import settings
 from app.core.exceptions import (
+    AppException,
     GeminiError,
     GeminiOverloadedError,
     GeminiQuotaExceededError,
     GeminiSafetyError,
     GeminiTimeoutError,
+    GeminiTruncatedError,
+    ParseError,
+    QueueFullError,
 )
+from app.core.metrics import get_metrics, record_retry, timed_stage
+from app.services.ai.admission import AdmissionController, get_admission_controller
+from app.services.ai.cache import ResponseCache, get_response_cache
+from app.services.ai.rate_limit import RateLimiter, get_rate_limiter
+from app.services.ai.resilience import (
+    BREAKER_ERRORS,
+    RESPONDED_ERRORS,
+    RETRYABLE_ERRORS,
+    CircuitBreaker,
+    LatencyTracker,
+    RetryPolicy,
+    get_circuit_breaker,
+    get_retry_policy,
+    remaining_budget,
+)
+from app.services.ai.singleflight import SingleFlight
 
 # Prefer modern SDK; fall back to legacy if unavailable
 try:
     import google.genai as genai  # type: ignore
+    from google.genai import errors as genai_errors  # type: ignore
+    from google.genai import types as genai_types  # type: ignore
 
     _USING_NEW_SDK = True
 except ImportError:  # pragma: no cover
     import google.generativeai as genai  # type: ignore
 
+    genai_errors = None
     _USING_NEW_SDK = False
 
 logger = logging.getLogger(__name__)
 
 
 class GeminiClient:
-    """Client for interacting with Google's Gemini API."""
+    """Client for interacting with Google's Gemini API.
+
+    Transient failures (503, 429) are retried with jittered exponential
+    backoff, honouring retry-after hints. A per-model circuit breaker
+    fails fast while the upstream keeps failing, slow calls can be hedged
+    with a duplicate request, and every attempt is bounded by the
+    enclosing ``deadline_budget``, if any. Upstream calls wait for a slot
+    from the admission controller, after the rate limiter (if any) has
+    made room for it within the RPM/TPM quota.
+
+    With the modern SDK requests go through its async client over one
+    pooled keep-alive HTTP connection pool, so a timeout or cancellation
+    aborts the request itself. The legacy SDK is blocking and runs on the
+    admission controller's worker-thread limiter instead.
+    """
 
     def __init__(
         self,
         model_name: str | None = None,
         timeout_seconds: float | None = None,
+        cache: ResponseCache | None = None,
+        single_flight: SingleFlight[str] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        hedge_quantile: float | None = None,
+        admission: AdmissionController | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         self._model_name = model_name or settings.gemini_model
         self._timeout_seconds = timeout_seconds or settings.gemini_timeout_seconds
+        self._cache = cache
+        self._single_flight = single_flight
+        self._retry_policy = retry_policy or get_retry_policy()
+        self._breaker = breaker or get_circuit_breaker(self._model_name)
+        self._hedge_quantile = (
+            settings.gemini_hedge_quantile if hedge_quantile is None else hedge_quantile
+        )
+        self._latencies = LatencyTracker()
+        self._admission = admission or get_admission_controller()
+        self._http = http_client
+        self._owns_http = http_client is None
+        self._rate_limiter = rate_limiter
         self._model: Optional[Any] = None
         self._client: Optional[Any] = None
 
@@ -53,15 +114,57 @@ class GeminiClient:
             self._model = genai.GenerativeModel(self._model_name)
         return self._model
 
+    @property
+    def cache(self) -> ResponseCache | None:
+        """Response cache in use, if any."""
+        return self._cache
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        """Client-side quota limiter in use, if any."""
+        return self._rate_limiter
+
+    @property
+    def single_flight(self) -> SingleFlight[str] | None:
+        """In-flight request registry in use, if any."""
+        return self._single_flight
+
     @property
     def client(self) -> Any:
         """Lazy-loaded Client instance (modern SDK)."""
         if not _USING_NEW_SDK:
             raise GeminiError("google.genai client unavailable in legacy SDK mode.")
         if self._client is None:
-            self._client = genai.Client(api_key=settings.gemini_api_key)
+            self._client = genai.Client(
+                api_key=settings.gemini_api_key, http_options=self._http_options()
+            )
         return self._client
 
+    def _http_options(self) -> Any:
+        """HTTP options that share one pooled async connection pool across calls."""
+        if "httpx_async_client" not in genai_types.HttpOptions.model_fields:
+            return None  # Older SDKs keep their own pooled client.
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=settings.gemini_max_concurrency,
+                    keepalive_expiry=settings.gemini_http_keepalive_seconds,
+                ),
+                timeout=None,
+            )
+        return genai_types.HttpOptions(httpx_async_client=self._http)
+
+    async def aclose(self) -> None:
+        """Close pooled connections; later calls open a new pool."""
+        client, self._client = self._client, None
+        if client is not None:
+            aclose = getattr(getattr(client, "aio", None), "aclose", None)
+            if aclose is not None:
+                await aclose()
+        if self._http is not None and self._owns_http:
+            await self._http.aclose()
+            self._http = None
+
     async def generate(
         self,
         prompt: str,
@@ -72,6 +175,10 @@ class GeminiClient:
     ) -> str:
         """Generate content using Gemini API.
 
+        Identical requests are served from the response cache when one
+        is configured, and concurrent identical requests share a single
+        upstream call when single-flight coalescing is enabled.
+
         Args:
             prompt: The prompt to send to the model.
             timeout_seconds: Optional timeout override.
@@ -85,68 +192,421 @@ class GeminiClient:
             GeminiSafetyError: On content blocked.
             GeminiQuotaExceededError: On quota exceeded.
             GeminiOverloadedError: On service unavailable.
+            GeminiTruncatedError: On hitting the max token limit; carries
+                the partial text.
+            GeminiCircuitOpenError: While the model's circuit breaker is open.
+            QueueFullError: When too many calls are already waiting.
         """
         if not settings.gemini_api_key:
             raise GeminiError("GEMINI_API_KEY is not configured.")
 
         timeout = timeout_seconds or self._timeout_seconds
-        base_config: dict[str, Any] = {
-            "temperature": 0.7,
-            "max_output_tokens": 65536,
-        }
-        base_config.update(self._thinking_config())
-        if response_mime_type:
-            base_config["response_mime_type"] = response_mime_type
-        if response_schema:
-            base_config["response_schema"] = response_schema
+        base_config = self._build_config(response_mime_type, response_schema)
 
-        try:
-            with fail_after(timeout):
-                if _USING_NEW_SDK:
-                    response = await anyio.to_thread.run_sync(
-                        partial(
-                            self.client.models.generate_content,
-                            model=self._model_name,
-                            contents=prompt,
-                            config=base_config,
-                        )
-                    )
-                else:
-                    response = await anyio.to_thread.run_sync(
-                        partial(
-                            self.model.generate_content,
-                            prompt,
-                            generation_config={
-                                "temperature": 0.7,
-                                "max_output_tokens": 65536,
-                            },
-                        )
+        request_key = ResponseCache.make_key(
+            self._model_name, prompt, base_config, response_schema
+        )
+        if self._cache is not None:
+            cached = await anyio.to_thread.run_sync(self._cache.get, request_key)
+            if cached is not None:
+                logger.debug("Gemini response cache hit")
+                get_metrics().inc("omenu_gemini_cache_hits_total", model=self._model_name)
+                return cached
+            get_metrics().inc("omenu_gemini_cache_misses_total", model=self._model_name)
+
+        async def fetch() -> str:
+            text = await self._call_resilient(prompt, base_config, timeout)
+            if self._cache is not None:
+                await anyio.to_thread.run_sync(self._cache.set, request_key, text)
+            return text
+
+        if self._single_flight is not None:
+            return await self._single_flight.do(request_key, fetch)
+        return await fetch()
+
+    async def _call_resilient(
+        self, prompt: str, base_config: dict[str, Any], timeout: float
+    ) -> str:
+        """Call the model through the circuit breaker, retrying transient failures."""
+        attempt = 1
+        while True:
+            attempt_timeout = self._attempt_timeout(timeout)
+            self._breaker.before_call()
+            try:
+                text = await self._call_hedged(prompt, base_config, attempt_timeout)
+            except GeminiError as exc:
+                self._record_outcome(exc, budget_limited=attempt_timeout < timeout)
+                if not await self._backoff(exc, attempt, "gemini"):
+                    raise
+                attempt += 1
+                continue
+            self._record_outcome(None)
+            return text
+
+    async def _call_hedged(
+        self, prompt: str, base_config: dict[str, Any], timeout: float
+    ) -> str:
+        """Run one attempt, racing a duplicate if it outlasts the hedge delay.
+
+        The delay is the configured quantile of recent call latencies; the
+        first copy to succeed wins and the other is cancelled. A duplicate
+        the admission queue rejects is dropped rather than failing the
+        attempt.
+        """
+        hedge_after = (
+            self._latencies.quantile(self._hedge_quantile) if self._hedge_quantile else None
+        )
+        if hedge_after is None or hedge_after >= timeout:
+            return await self._measured_call(prompt, base_config, timeout)
+
+        results: list[str] = []
+        errors: list[AppException] = []
+        launched = 0
+
+        async with anyio.create_task_group() as tg:
+
+            async def run(hedge: bool) -> None:
+                nonlocal launched
+                launched += 1
+                try:
+                    text = await self._measured_call(prompt, base_config, timeout)
+                except AppException as exc:
+                    if hedge and isinstance(exc, QueueFullError):
+                        # The capacity check before launching can race other
+                        # callers; a rejected hedge simply never ran.
+                        launched -= 1
+                    else:
+                        errors.append(exc)
+                    if errors and len(errors) == launched:
+                        tg.cancel_scope.cancel()
+                    return
+                if not results and launched > 1:
+                    get_metrics().inc(
+                        "omenu_gemini_hedges_total",
+                        model=self._model_name,
+                        winner="hedge" if hedge else "primary",
                     )
+                results.append(text)
+                tg.cancel_scope.cancel()
+
+            async def run_hedge() -> None:
+                await anyio.sleep(hedge_after)
+                if not self._admission.has_capacity:
+                    return
+                record_retry("gemini", "hedge")
+                await run(True)
 
-            self._check_safety_feedback(response)
-            text = self._extract_text(response)
+            tg.start_soon(run, False)
+            tg.start_soon(run_hedge)
 
-            if not text:
-                raise GeminiError("Empty response from Gemini")
+        if results:
+            return results[0]
+        raise errors[0]
 
+    async def _measured_call(
+        self, prompt: str, base_config: dict[str, Any], timeout: float
+    ) -> str:
+        await self._wait_for_quota(prompt)
+        async with self._admission.slot():
+            started = time.perf_counter()
+            text = await self._call_model(prompt, base_config, timeout)
+            self._latencies.record(time.perf_counter() - started)
             return text
 
-        except TimeoutError as exc:
-            raise GeminiTimeoutError() from exc
-        except GeminiError:
-            raise
-        except google_exceptions.ResourceExhausted as exc:
-            raise GeminiQuotaExceededError() from exc
-        except google_exceptions.ServiceUnavailable as exc:
-            raise GeminiOverloadedError() from exc
-        except google_exceptions.DeadlineExceeded as exc:
-            raise GeminiTimeoutError() from exc
-        except google_exceptions.PermissionDenied as exc:
-            raise GeminiSafetyError() from exc
-        except google_exceptions.GoogleAPICallError as exc:
-            raise GeminiError(exc.message or str(exc)) from exc
-        except Exception as exc:  # pragma: no cover
-            raise GeminiError(f"Gemini API error: {exc}") from exc
+    async def _wait_for_quota(self, prompt: str) -> None:
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire(settings.gemini_api_key, self._model_name, prompt)
+
+    def _attempt_timeout(self, timeout: float) -> float:
+        """Per-attempt timeout, shortened to what is left of the deadline budget."""
+        remaining = remaining_budget()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise GeminiTimeoutError("Gemini deadline budget exhausted.")
+        return min(timeout, remaining)
+
+    async def _backoff(self, exc: GeminiError, attempt: int, operation: str) -> bool:
+        """Sleep before retrying ``exc``, or return False if it should not be retried.
+
+        Only transient errors are retried, up to the policy's attempt
+        count and never past the deadline budget.
+        """
+        if not isinstance(exc, RETRYABLE_ERRORS) or attempt >= self._retry_policy.max_attempts:
+            return False
+        delay = self._retry_policy.backoff(attempt, exc.retry_after_seconds)
+        remaining = remaining_budget()
+        if remaining is not None and delay >= remaining:
+            return False
+        logger.warning(
+            f"Gemini request failed with {exc.code}; retry {attempt} in {delay:.2f}s"
+        )
+        record_retry(operation, exc.code.lower())
+        await anyio.sleep(delay)
+        return True
+
+    def _record_outcome(self, exc: GeminiError | None, budget_limited: bool = False) -> None:
+        """Feed an attempt's outcome to the circuit breaker.
+
+        Only a response from the upstream counts as a success. Quota
+        errors, and timeouts of an attempt cut short by the caller's
+        deadline budget, say nothing about the upstream's health and
+        leave the breaker as it is.
+        """
+        if exc is None or isinstance(exc, RESPONDED_ERRORS):
+            self._breaker.record_success()
+        elif isinstance(exc, BREAKER_ERRORS) and not (
+            budget_limited and isinstance(exc, GeminiTimeoutError)
+        ):
+            self._breaker.record_failure()
+        get_metrics().set(
+            "omenu_gemini_circuit_open", float(self._breaker.is_open), model=self._model_name
+        )
+
+    async def _call_model(
+        self, prompt: str, base_config: dict[str, Any], timeout: float
+    ) -> str:
+        """Send a single request upstream and map SDK errors."""
+        with timed_stage("gemini", model=self._model_name):
+            try:
+                with fail_after(timeout):
+                    response = await self._send(prompt, base_config)
+
+                text = self._extract_text(response)
+                self._record_response(prompt, response, text)
+                try:
+                    self._check_safety_feedback(response)
+                except GeminiTruncatedError as exc:
+                    exc.partial_text = text
+                    raise
+
+                if not text:
+                    raise GeminiError("Empty response from Gemini")
+
+                return text
+
+            except GeminiError as exc:
+                self._record_error(exc)
+                raise
+            except Exception as exc:
+                error = self._translate_error(exc)
+                self._record_error(error)
+                raise error from exc
+
+    async def _send(self, prompt: str, base_config: dict[str, Any]) -> Any:
+        """Send one non-streaming request and return the SDK response."""
+        if _USING_NEW_SDK:
+            return await self.client.aio.models.generate_content(
+                model=self._model_name,
+                contents=prompt,
+                config=base_config,
+            )
+        return await anyio.to_thread.run_sync(
+            partial(
+                self.model.generate_content,
+                prompt,
+                generation_config={
+                    "temperature": 0.7,
+                    "max_output_tokens": 65536,
+                },
+            ),
+            abandon_on_cancel=True,
+            limiter=self._admission.limiter,
+        )
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        timeout_seconds: float | None = None,
+        *,
+        response_mime_type: str | None = None,
+        response_schema: Any | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream generated text chunks as Gemini produces them.
+
+        A cached response is yielded as a single chunk; a completed
+        stream is written back to the cache. The timeout applies to the
+        whole stream.
+
+        Raises:
+            Same errors as ``generate``.
+        """
+        if not settings.gemini_api_key:
+            raise GeminiError("GEMINI_API_KEY is not configured.")
+
+        timeout = timeout_seconds or self._timeout_seconds
+        base_config = self._build_config(response_mime_type, response_schema)
+        request_key = ResponseCache.make_key(
+            self._model_name, prompt, base_config, response_schema
+        )
+        if self._cache is not None:
+            cached = await anyio.to_thread.run_sync(self._cache.get, request_key)
+            if cached is not None:
+                logger.debug("Gemini response cache hit")
+                get_metrics().inc("omenu_gemini_cache_hits_total", model=self._model_name)
+                yield cached
+                return
+            get_metrics().inc("omenu_gemini_cache_misses_total", model=self._model_name)
+
+        parts: list[str] = []
+        attempt = 1
+        while True:
+            attempt_timeout = self._attempt_timeout(timeout)
+            self._breaker.before_call()
+            try:
+                await self._wait_for_quota(prompt)
+                async with self._admission.slot():
+                    async for text in self._stream_model(prompt, base_config, attempt_timeout):
+                        parts.append(text)
+                        yield text
+            except GeminiError as exc:
+                self._record_outcome(exc, budget_limited=attempt_timeout < timeout)
+                # Chunks already yielded cannot be taken back, so only retry before the first.
+                if parts or not await self._backoff(exc, attempt, "gemini_stream"):
+                    raise
+                attempt += 1
+                continue
+            self._record_outcome(None)
+            break
+
+        if self._cache is not None:
+            await anyio.to_thread.run_sync(self._cache.set, request_key, "".join(parts).strip())
+
+    async def _stream_model(
+        self, prompt: str, base_config: dict[str, Any], timeout: float
+    ) -> AsyncIterator[str]:
+        """Stream a single upstream request and map SDK errors."""
+        deadline = anyio.current_time() + timeout
+        parts: list[str] = []
+        last_chunk: Any = None
+        with timed_stage("gemini_stream", model=self._model_name):
+            try:
+                with fail_after(timeout):
+                    chunks = await self._open_stream(prompt, base_config)
+                try:
+                    while True:
+                        with fail_after(max(0.0, deadline - anyio.current_time())):
+                            chunk = await anext(chunks, None)
+                        if chunk is None:
+                            break
+                        last_chunk = chunk
+                        text = self._chunk_text(chunk)
+                        try:
+                            self._check_safety_feedback(chunk)
+                        except GeminiTruncatedError as exc:
+                            exc.partial_text = "".join(parts) + text
+                            self._record_response(prompt, chunk, exc.partial_text)
+                            raise
+                        if text:
+                            parts.append(text)
+                            yield text
+                finally:
+                    # Release the HTTP connection even when abandoned or cancelled.
+                    aclose = getattr(chunks, "aclose", None)
+                    if aclose is not None:
+                        with anyio.CancelScope(shield=True):
+                            await aclose()
+            except GeminiError as exc:
+                self._record_error(exc)
+                raise
+            except Exception as exc:
+                error = self._translate_error(exc)
+                self._record_error(error)
+                raise error from exc
+
+        full_text = "".join(parts).strip()
+        self._record_response(prompt, last_chunk, full_text)
+        if not full_text:
+            raise GeminiError("Empty response from Gemini")
+
+    async def _open_stream(
+        self, prompt: str, base_config: dict[str, Any]
+    ) -> AsyncIterator[Any]:
+        """Start a streaming request and return its chunks."""
+        if _USING_NEW_SDK:
+            return await self.client.aio.models.generate_content_stream(
+                model=self._model_name,
+                contents=prompt,
+                config=base_config,
+            )
+        chunks = await anyio.to_thread.run_sync(
+            partial(
+                self.model.generate_content,
+                prompt,
+                generation_config={
+                    "temperature": 0.7,
+                    "max_output_tokens": 65536,
+                },
+                stream=True,
+            ),
+            abandon_on_cancel=True,
+            limiter=self._admission.limiter,
+        )
+        return _iterate_in_threads(iter(chunks), self._admission.limiter)
+
+    def _record_response(self, prompt: str, response: Any, text: str) -> None:
+        """Count a response's finish reason, sizes and usage-metadata tokens."""
+        metrics = get_metrics()
+        model = self._model_name
+        metrics.inc(
+            "omenu_gemini_requests_total",
+            model=model,
+            finish_reason=self._finish_reason(response),
+        )
+        metrics.inc("omenu_gemini_chars_total", len(prompt), model=model, direction="prompt")
+        metrics.inc("omenu_gemini_chars_total", len(text), model=model, direction="response")
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for kind, field in (
+            ("prompt", "prompt_token_count"),
+            ("response", "candidates_token_count"),
+            ("thoughts", "thoughts_token_count"),
+            ("cached", "cached_content_token_count"),
+        ):
+            count = getattr(usage, field, None)
+            if isinstance(count, int) and count:
+                metrics.inc("omenu_gemini_tokens_total", count, model=model, kind=kind)
+
+    def _record_error(self, exc: GeminiError) -> None:
+        get_metrics().inc("omenu_gemini_errors_total", model=self._model_name, code=exc.code)
+
+    @staticmethod
+    def _finish_reason(response: Any) -> str:
+        """Name of the first candidate's finish reason, e.g. ``STOP``."""
+        candidates = getattr(response, "candidates", None) or []
+        reason = getattr(candidates[0], "finish_reason", None) if candidates else None
+        if reason is None:
+            return "UNKNOWN"
+        return str(getattr(reason, "name", None) or reason).upper()
+
+    def _translate_error(self, exc: Exception) -> GeminiError:
+        """Map SDK and timeout errors onto the application's Gemini errors."""
+        if isinstance(exc, GeminiError):
+            return exc
+        if isinstance(exc, TimeoutError):
+            return GeminiTimeoutError()
+        if isinstance(exc, google_exceptions.ResourceExhausted):
+            return GeminiQuotaExceededError(retry_after_seconds=_retry_after(exc))
+        if isinstance(
+            exc, (google_exceptions.ServiceUnavailable, google_exceptions.InternalServerError)
+        ):
+            return GeminiOverloadedError(retry_after_seconds=_retry_after(exc))
+        if isinstance(exc, google_exceptions.DeadlineExceeded):
+            return GeminiTimeoutError()
+        if isinstance(exc, google_exceptions.PermissionDenied):
+            return GeminiSafetyError()
+        if genai_errors is not None and isinstance(exc, genai_errors.APIError):
+            if exc.code == 429:
+                return GeminiQuotaExceededError(retry_after_seconds=_retry_after(exc))
+            if exc.code in (500, 502, 503):
+                return GeminiOverloadedError(retry_after_seconds=_retry_after(exc))
+            if exc.code == 504:
+                return GeminiTimeoutError()
+            return GeminiError(exc.message or str(exc))
+        if isinstance(exc, google_exceptions.GoogleAPICallError):
+            return GeminiError(exc.message or str(exc))
+        return GeminiError(f"Gemini API error: {exc}")
 
     async def generate_json(
         self,
@@ -163,6 +623,51 @@ class GeminiClient:
             response_schema=response_schema,
         )
 
+    async def discard_json(self, prompt: str, *, response_schema: Any | None = None) -> None:
+        """Evict the cached JSON response to ``prompt`` so the next call asks Gemini again.
+
+        Responses are cached before callers parse them; a caller that
+        rejects one discards it so identical retries do not replay it.
+        """
+        if self._cache is None:
+            return
+        base_config = self._build_config("application/json", response_schema)
+        request_key = ResponseCache.make_key(
+            self._model_name, prompt, base_config, response_schema
+        )
+        await anyio.to_thread.run_sync(self._cache.delete, request_key)
+
+    async def generate_json_stream(
+        self,
+        prompt: str,
+        timeout_seconds: float | None = None,
+        *,
+        response_schema: Any | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream JSON content with explicit JSON response mode."""
+        async for chunk in self.generate_stream(
+            prompt,
+            timeout_seconds=timeout_seconds,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+        ):
+            yield chunk
+
+    def _build_config(
+        self, response_mime_type: str | None, response_schema: Any | None
+    ) -> dict[str, Any]:
+        """Build the generation config for a request."""
+        base_config: dict[str, Any] = {
+            "temperature": 0.7,
+            "max_output_tokens": 65536,
+        }
+        base_config.update(self._thinking_config())
+        if response_mime_type:
+            base_config["response_mime_type"] = response_mime_type
+        if response_schema:
+            base_config["response_schema"] = response_schema
+        return base_config
+
     def _thinking_config(self) -> dict[str, Any]:
         """Reduce model thinking budget to avoid MAX_TOKENS truncation."""
         if not _USING_NEW_SDK:
@@ -200,6 +705,21 @@ class GeminiClient:
             logger.debug("Failed to extract text from Gemini response", exc_info=True)
             return ""
 
+    def _chunk_text(self, chunk: Any) -> str:
+        """Extract unstripped text from all parts of a streamed chunk."""
+        try:
+            candidates = getattr(chunk, "candidates", None)
+            if not candidates:
+                return ""
+            content = getattr(candidates[0], "content", None)
+            parts = getattr(content, "parts", None) if content else None
+            if not parts:
+                return ""
+            return "".join(getattr(part, "text", "") or "" for part in parts)
+        except Exception:  # pragma: no cover
+            logger.debug("Failed to extract text from Gemini chunk", exc_info=True)
+            return ""
+
     def _check_safety_feedback(self, response: Any) -> None:
         """Check for safety blocks or content filters."""
         # Check prompt feedback
@@ -229,12 +749,63 @@ class GeminiClient:
             if "SAFETY" in reason:
                 raise GeminiSafetyError()
             if "MAX_TOKENS" in reason:
-                raise GeminiError(
+                raise GeminiTruncatedError(
                     f"Gemini response reached max token limit for model {self._model_name}"
                 )
 
 
+async def _iterate_in_threads(
+    chunks: Iterator[Any], limiter: anyio.CapacityLimiter
+) -> AsyncIterator[Any]:
+    """Drain a blocking iterator, fetching each item in a worker thread."""
+    while True:
+        chunk = await anyio.to_thread.run_sync(
+            next, chunks, None, abandon_on_cancel=True, limiter=limiter
+        )
+        if chunk is None:
+            return
+        yield chunk
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Retry-after hint of an SDK error, from the header or a ``RetryInfo`` detail."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    details = getattr(exc, "details", None)
+    if isinstance(details, dict):
+        error = details.get("error")
+        details = (error if isinstance(error, dict) else details).get("details")
+    for detail in details if isinstance(details, list) else []:
+        delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return max(0.0, float(delay[:-1]))
+            except ValueError:
+                continue
+    return None
+
+
+@asynccontextmanager
+async def discard_on_parse_error(client: GeminiClient, prompt: str) -> AsyncIterator[None]:
+    """Evict the cached JSON response to ``prompt`` if the block raises ParseError."""
+    try:
+        yield
+    except ParseError:
+        await client.discard_json(prompt)
+        raise
+
+
 @lru_cache
 def get_gemini_client() -> GeminiClient:
     """Get cached Gemini client instance."""
-    return GeminiClient()
+    single_flight = SingleFlight[str]() if settings.gemini_single_flight else None
+    return GeminiClient(
+        cache=get_response_cache(),
+        single_flight=single_flight,
+        rate_limiter=get_rate_limiter(),
+    )
@@ -0,0 +1,179 @@
+"""Compact, schema-declared menu encodings for prompts."""
+
+import math
+import re
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.exceptions import ParseError
+from app.models.menu import Menu, WeekMenus
+
+DAYS = tuple(WeekMenus.model_fields)
+MEALS = tuple(Menu.model_fields)
+
+DISH_FIELDS = (
+    "name",
+    "ingredients",
+    "instructions",
+    "estimatedTime",
+    "servings",
+    "difficulty",
+    "totalCalories",
+    "notes",
+)
+INGREDIENT_FIELDS = ("name", "quantity", "unit", "category")
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the model tokens in ``text`` without a tokenizer.
+
+    Letters count as one token per four characters, each digit run as
+    one token per three digits, and every punctuation mark as a token,
+    which tracks JSON-heavy prompts more closely than a plain
+    characters-divided-by-four rule.
+    """
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+@dataclass(frozen=True)
+class MenuEncoding:
+    """Positional row encoding of a week of dishes.
+
+    Each dish becomes a list of its ``dish_fields`` values in order, with
+    ingredients as lists of ``ingredient_fields`` values; trailing nulls
+    are trimmed and decode as missing fields. Empty meals and
+    days are omitted and fields not listed are dropped, so a prompt only
+    carries what its task needs. ``legend`` describes the columns for the
+    model and ``decode`` restores the usual nested dict shape.
+    """
+
+    dish_fields: tuple[str, ...] = DISH_FIELDS
+    ingredient_fields: tuple[str, ...] = INGREDIENT_FIELDS
+
+    def legend(self) -> str:
+        """Column declaration to place next to encoded data in a prompt."""
+        dish = ",".join(self.dish_fields)
+        ingredient = ",".join(self.ingredient_fields)
+        return f"dish=[{dish}] ingredient=[{ingredient}]"
+
+    def encode(self, menus: Mapping[str, Any]) -> dict[str, dict[str, list[list]]]:
+        """Encode ``{day: {meal: [dish, ...]}}`` into compact rows."""
+        encoded: dict[str, dict[str, list[list]]] = {}
+        for day, meals in menus.items():
+            if not isinstance(meals, Mapping):
+                continue
+            encoded_day = {
+                meal: [self.encode_dish(dish) for dish in dishes if isinstance(dish, Mapping)]
+                for meal, dishes in meals.items()
+                if dishes
+            }
+            if encoded_day:
+                encoded[day] = encoded_day
+        return encoded
+
+    def encode_dish(self, dish: Mapping[str, Any]) -> list:
+        """Encode one dish as a row of its declared fields."""
+        row = []
+        for field in self.dish_fields:
+            value = dish.get(field)
+            if field == "ingredients":
+                value = self.encode_rows(value or [])
+            row.append(value)
+        while row and row[-1] is None:
+            row.pop()
+        return row
+
+    def encode_rows(self, ingredients: Sequence[Mapping[str, Any]]) -> list[list]:
+        """Encode ingredient dicts as rows of the declared ingredient fields."""
+        return [
+            [ingredient.get(field) for field in self.ingredient_fields]
+            for ingredient in ingredients
+            if isinstance(ingredient, Mapping)
+        ]
+
+    def decode(self, encoded: Mapping[str, Any]) -> dict[str, dict[str, list[dict]]]:
+        """Decode compact rows back to ``{day: {meal: [dish dict, ...]}}``.
+
+        Every day and meal is present in the result. A ``menus``/``days``
+        wrapper is unwrapped, and dishes already given as objects are kept
+        as they are, so a model answering in the verbose shape still decodes.
+
+        Raises:
+            ParseError: If a row does not fit the declared columns.
+        """
+        week = encoded.get("menus") or encoded.get("days") or encoded
+        decoded: dict[str, dict[str, list[dict]]] = {}
+        for day in DAYS:
+            meals = week.get(day) if isinstance(week, Mapping) else None
+            if not isinstance(meals, Mapping):
+                meals = {}
+            decoded[day] = {}
+            for meal in MEALS:
+                dishes = meals.get(meal) or []
+                if isinstance(dishes, Mapping):
+                    dishes = [dishes]
+                decoded[day][meal] = [
+                    dish
+                    for dish in (self.decode_dish(row) for row in dishes)
+                    if dish is not None
+                ]
+        return decoded
+
+    def decode_dish(self, row: object) -> dict | None:
+        """Decode one dish row, or None when it is neither a row nor an object.
+
+        Rows may omit trailing columns but never carry more than declared,
+        and the ingredients column must hold rows too; anything else means
+        the columns are misaligned and would decode into the wrong fields.
+
+        Raises:
+            ParseError: If the row does not fit the declared columns.
+        """
+        if isinstance(row, Mapping):
+            return dict(row)
+        if not isinstance(row, list):
+            return None
+        if not row or len(row) > len(self.dish_fields):
+            raise ParseError(
+                f"Dish row has {len(row)} columns, expected up to {len(self.dish_fields)}"
+            )
+        dish = dict(zip(self.dish_fields, row))
+        if "ingredients" in dish:
+            ingredients = dish["ingredients"] or []
+            if not isinstance(ingredients, list):
+                raise ParseError("Dish row ingredients column must be a list")
+            dish["ingredients"] = [
+                self._decode_ingredient(ingredient) for ingredient in ingredients
+            ]
+        return dish
+
+    def _decode_ingredient(self, row: object) -> object:
+        if not isinstance(row, list):
+            return row
+        if len(row) > len(self.ingredient_fields):
+            raise ParseError(
+                f"Ingredient row has {len(row)} columns, "
+                f"expected up to {len(self.ingredient_fields)}"
+            )
+        return dict(zip(self.ingredient_fields, row))
+
+
+# Everything a dish needs to be reproduced, for prompts the model answers in kind.
+FULL_MENU_ENCODING = MenuEncoding()
+# Enough for the model to see what is planned when it only returns new dishes.
+CONTEXT_MENU_ENCODING = MenuEncoding(dish_fields=("name", "ingredients"))
+# Last resort when a plan does not fit the prompt budget.
+NAMES_MENU_ENCODING = MenuEncoding(dish_fields=("name",))
+# Shopping needs ingredient lines only.
+SHOPPING_ENCODING = MenuEncoding(dish_fields=("ingredients",))
@@ -1,9 +1,20 @@
 """Response parsing utilities for AI-generated content."""
 
 import json
+import re
+import time
 from typing import Any
 
 from app.core.exceptions import ParseError
+from app.core.metrics import get_metrics, timed_stage
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_SCALAR = re.compile(r"[^\s,:\]\}]+")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERAL_VALUES = {"true": True, "false": False, "null": None}
+_ARRAY_ROOT = re.compile(r"\s*(?:```(?:json)?\s*)?\[")
+_ROOT_PREAMBLE = re.compile(r"\s*(?:`{1,3}(?:json|jso|js|j)?\s*)?")
 
 
 class ResponseParser:
@@ -25,6 +36,12 @@ class ResponseParser:
         if not text:
             raise ParseError("Empty response from Gemini")
 
+        get_metrics().inc("omenu_parse_chars_total", len(text), mode="document")
+        with timed_stage("parse"):
+            return ResponseParser._decode(text)
+
+    @staticmethod
+    def _decode(text: str) -> Any:
         cleaned = text.strip()
 
         # Remove markdown code block wrappers
@@ -36,16 +53,202 @@ class ResponseParser:
             cleaned = cleaned[:-3]
         cleaned = cleaned.strip()
 
+        # Decode once from the first container; leading prose is skipped
+        # and trailing text after the closing brace is ignored.
+        start = 0
+        if not cleaned.startswith(("{", "[")):
+            start = cleaned.find("{")
+            if start == -1:
+                raise ParseError("Failed to parse JSON: no JSON object found")
         try:
-            return json.loads(cleaned)
+            value, _ = _DECODER.raw_decode(cleaned, start)
         except json.JSONDecodeError as exc:
-            # Attempt to salvage JSON object from surrounding text
-            start = cleaned.find("{")
-            end = cleaned.rfind("}")
-            if start != -1 and end != -1 and end > start:
-                snippet = cleaned[start : end + 1]
-                try:
-                    return json.loads(snippet)
-                except json.JSONDecodeError:
-                    pass
             raise ParseError(f"Failed to parse JSON: {exc}") from exc
+        return value
+
+    @staticmethod
+    def incremental() -> "IncrementalJSONParser":
+        """Create a parser for consuming a streamed response chunk by chunk."""
+        return IncrementalJSONParser()
+
+
+class _Frame:
+    """An object or array still being built by the incremental parser."""
+
+    __slots__ = ("container", "path", "key", "awaiting_value")
+
+    def __init__(self, container: dict | list, path: tuple[str | int, ...]) -> None:
+        self.container = container
+        self.path = path
+        self.key: str | None = None
+        self.awaiting_value = False
+
+
+class IncrementalJSONParser:
+    """Streaming JSON parser that reports containers as soon as they close.
+
+    Each call to ``feed`` consumes a chunk of text and returns
+    ``(path, value)`` pairs for every object or array completed within it,
+    innermost first. Paths are tuples of keys and list indexes from the
+    root, e.g. ``("monday", "lunch", 0)`` for the first lunch dish or
+    ``("items", 3)`` for a shopping item. Text is scanned once: completed
+    tokens are never re-read, and anything before the root (prose, code
+    fences) or after it closes is ignored. As in ``parse_json``, the root
+    is the first ``{`` unless the response opens with a ``[``.
+    ``parse_seconds`` accumulates the time spent inside ``feed``.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._stack: list[_Frame] = []
+        self._root: dict | list | None = None
+        self._done = False
+        self._prose = False
+        self.parse_seconds = 0.0
+
+    @property
+    def done(self) -> bool:
+        """Whether the root value has been closed."""
+        return self._done
+
+    @property
+    def root(self) -> dict | list | None:
+        """The (possibly still incomplete) root value built so far."""
+        return self._root
+
+    def result(self) -> Any:
+        """Return the fully parsed root value.
+
+        Raises:
+            ParseError: If the root value has not been closed yet.
+        """
+        if not self._done:
+            raise ParseError("Failed to parse JSON: response ended before the JSON closed")
+        return self._root
+
+    def feed(self, chunk: str) -> list[tuple[tuple[str | int, ...], Any]]:
+        """Consume a chunk of text and return newly completed containers."""
+        start = time.perf_counter()
+        try:
+            return self._feed(chunk)
+        finally:
+            self.parse_seconds += time.perf_counter() - start
+            get_metrics().inc("omenu_parse_chars_total", len(chunk), mode="incremental")
+
+    def _feed(self, chunk: str) -> list[tuple[tuple[str | int, ...], Any]]:
+        events: list[tuple[tuple[str | int, ...], Any]] = []
+        if self._done:
+            return events
+        buf = self._buffer + chunk
+        pos = 0
+        if self._root is None:
+            # Like parse_json: an array root only counts when the response
+            # opens with it; after any prose the root is the first "{".
+            array_root = None if self._prose else _ARRAY_ROOT.match(buf)
+            if array_root:
+                pos = array_root.end() - 1
+            else:
+                pos = buf.find("{")
+                if pos == -1:
+                    self._prose = self._prose or not _ROOT_PREAMBLE.fullmatch(buf)
+                    self._buffer = "" if self._prose else buf
+                    return events
+
+        length = len(buf)
+        while pos < length:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos >= length:
+                break
+            char = buf[pos]
+            if char == '"':
+                end = self._string_end(buf, pos + 1)
+                if end == -1:
+                    break
+                raw = buf[pos + 1 : end]
+                value = json.loads(buf[pos : end + 1]) if "\\" in raw else raw
+                self._add_scalar(value, is_string=True)
+                pos = end + 1
+            elif char == "{" or char == "[":
+                self._open({} if char == "{" else [])
+                pos += 1
+            elif char == "}" or char == "]":
+                if not self._stack:
+                    raise ParseError(f"Failed to parse JSON: unexpected {char!r}")
+                frame = self._stack.pop()
+                events.append((frame.path, frame.container))
+                pos += 1
+                if not self._stack:
+                    self._done = True
+                    break
+            elif char == ":":
+                self._stack[-1].awaiting_value = True
+                pos += 1
+            elif char == ",":
+                pos += 1
+            else:
+                match = _SCALAR.match(buf, pos)
+                if match.end() >= length:
+                    break  # the literal may continue in the next chunk
+                token = match.group(0)
+                if token in _LITERAL_VALUES:
+                    value = _LITERAL_VALUES[token]
+                elif not _NUMBER.fullmatch(token):
+                    raise ParseError(f"Failed to parse JSON: unexpected {token!r}")
+                elif any(c in token for c in ".eE"):
+                    value = float(token)
+                else:
+                    value = int(token)
+                self._add_scalar(value, is_string=False)
+                pos = match.end()
+
+        self._buffer = "" if self._done else buf[pos:]
+        return events
+
+    @staticmethod
+    def _string_end(buf: str, start: int) -> int:
+        """Index of the closing quote of a string starting at ``start``."""
+        index = buf.find('"', start)
+        while index != -1:
+            backslashes = 0
+            probe = index - 1
+            while probe >= start and buf[probe] == "\\":
+                backslashes += 1
+                probe -= 1
+            if backslashes % 2 == 0:
+                return index
+            index = buf.find('"', index + 1)
+        return -1
+
+    def _child_path(self) -> tuple[str | int, ...]:
+        if not self._stack:
+            return ()
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            return frame.path + (len(frame.container),)
+        return frame.path + (frame.key if frame.key is not None else "",)
+
+    def _attach(self, value: Any) -> None:
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+        else:
+            frame.container[frame.key if frame.key is not None else ""] = value
+            frame.key = None
+            frame.awaiting_value = False
+
+    def _open(self, container: dict | list) -> None:
+        path = self._child_path()
+        if self._stack:
+            self._attach(container)
+        else:
+            self._root = container
+        self._stack.append(_Frame(container, path))
+
+    def _add_scalar(self, value: Any, is_string: bool) -> None:
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict) and not frame.awaiting_value:
+            if not is_string:
+                raise ParseError("Failed to parse JSON: object keys must be strings")
+            frame.key = value
+            return
+        self._attach(value)
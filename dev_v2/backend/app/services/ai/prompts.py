@@ -1,9 +1,23 @@
 """Prompt templates for AI content generation."""
 
 import json
+import logging
+from collections.abc import Callable, Sequence
 
+from app.core.config import settings
 from app.models.user import CookSchedule, UserPreferences
-from app.models.menu import WeekMenus
+from app.services.ai.encoding import (
+    CONTEXT_MENU_ENCODING,
+    DISH_FIELDS,
+    FULL_MENU_ENCODING,
+    INGREDIENT_FIELDS,
+    NAMES_MENU_ENCODING,
+    SHOPPING_ENCODING,
+    MenuEncoding,
+    estimate_tokens,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class PromptBuilder:
@@ -37,6 +51,42 @@ class PromptBuilder:
             return [PromptBuilder._strip_keys(item, keys) for item in value]
         return value
 
+    @staticmethod
+    def estimate_tokens(prompt: str) -> int:
+        """Rough token count of a prompt."""
+        return estimate_tokens(prompt)
+
+    @staticmethod
+    def _fit(
+        name: str,
+        render: Callable[[MenuEncoding], str],
+        encodings: Sequence[MenuEncoding],
+        max_tokens: int | None = None,
+    ) -> str:
+        """Render with the richest encoding whose prompt fits the token budget.
+
+        ``max_tokens`` defaults to ``settings.prompt_max_tokens``; 0 means
+        no cap. When no encoding fits, the leanest one is used anyway.
+        """
+        budget = settings.prompt_max_tokens if max_tokens is None else max_tokens
+        for encoding in encodings:
+            prompt = render(encoding)
+            tokens = estimate_tokens(prompt)
+            if budget <= 0 or tokens <= budget:
+                break
+        else:
+            logger.warning(f"{name} prompt exceeds budget: ~{tokens} > {budget} tokens")
+        PromptBuilder._report(name, prompt, tokens)
+        return prompt
+
+    @staticmethod
+    def _report(name: str, prompt: str, tokens: int | None = None) -> str:
+        """Log a built prompt's size and return the prompt."""
+        if tokens is None:
+            tokens = estimate_tokens(prompt)
+        logger.debug(f"{name} prompt: {len(prompt)} chars, ~{tokens} tokens")
+        return prompt
+
     @classmethod
     def meal_outline(cls, preferences: UserPreferences, ingredient_limit: int) -> str:
         """Generate prompt for meal outline + draft shopping list (Step 1)."""
@@ -62,7 +112,7 @@ class PromptBuilder:
         }
         schema_block = cls._compact(schema_example)
 
-        return (
+        prompt = (
             "You are a professional chef and dietitian tasked with creating a guideline for a weekly meal plan and shopping list based on user preferences and constraints."
             "result: give a rough meal outline for the week (main dish names only, no recipes yet) along with a draft shopping list of  ~{ingredient_limit} unique non-pantry ingredients needed. "
             "Return ONLY JSON with two keys: mealOutline and draftShoppingList.\n"
@@ -83,24 +133,36 @@ class PromptBuilder:
             f"OutputSchema: {schema_block}\n"
             "RETURN ONLY THE RAW JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
         )
+        return cls._report("meal_outline", prompt)
 
     @classmethod
     def structured_menu_from_outline(
-        cls, meal_outline: dict, draft_shopping_list: list[dict], preferences: UserPreferences
+        cls,
+        meal_outline: dict,
+        draft_shopping_list: list[dict],
+        preferences: UserPreferences,
+        days: list[str] | None = None,
     ) -> str:
-        """Generate prompt to convert meal outline + draft list into structured menus (Step 2)."""
+        """Generate prompt to convert meal outline + draft list into structured menus (Step 2).
+
+        When ``days`` is given, the prompt covers only those days so the
+        week can be structured by several concurrent requests.
+        """
+        schedule = cls._schedule_to_array_format(preferences.cookSchedule)
+        if days is not None:
+            meal_outline = {day: meal_outline[day] for day in days if day in meal_outline}
+            schedule = {day: schedule[day] for day in days if day in schedule}
         outline_json = cls._compact(meal_outline)
         list_json = cls._compact(draft_shopping_list)
-        schedule_json = cls._compact(
-            cls._schedule_to_array_format(preferences.cookSchedule)
-        )
+        schedule_json = cls._compact(schedule)
         preferences_json = cls._compact(preferences.specificPreferences)
         disliked_json = cls._compact(preferences.specificDisliked)
         budget_json = cls._compact(preferences.budget)
         people_json = cls._compact(preferences.numPeople)
         difficulty_json = cls._compact(preferences.difficulty)
-        schema_example = {
-            "monday": {
+        example_day = days[0] if days else "monday"
+        schema_example: dict[str, object] = {
+            example_day: {
                 "breakfast": [
                     {
                         "name": "Scrambled Eggs with Tomato",
@@ -127,9 +189,12 @@ class PromptBuilder:
                     }
                 ],
             },
-            "tuesday": "{ ... }",
-            "...": "...",
         }
+        if days is None:
+            schema_example["tuesday"] = "{ ... }"
+            schema_example["..."] = "..."
+        elif len(days) > 1:
+            schema_example["..."] = "{ ... }"
         schema_block = cls._compact(schema_example)
         requirements = (
             "Requirements: "
@@ -143,8 +208,12 @@ class PromptBuilder:
             "6) Ingredient categories: proteins, vegetables, fruits, grains, dairy, seasonings, pantry_staples, others. "
             "7) instructions <=200 characters and include clear steps. "
         )
+        if days is not None:
+            requirements += (
+                f"8) Other days are planned separately: return ONLY these day keys: {cls._compact(days)}. "
+            )
 
-        return (
+        prompt = (
             "Step 2: Create a high-quality, nutritious, and structured weekly meal plan within the ingredient constraints. "
             f"{requirements} RETURN ONLY THE RAW JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
             f"BudgetUSD: {budget_json} "
@@ -157,12 +226,20 @@ class PromptBuilder:
             f"DraftShoppingList: {list_json} "
             f"OutputSchema: {schema_block} "
         )
+        return cls._report("structured_menu", prompt)
 
     @classmethod
-    def modification(
-        cls, modification: str, current_menu: object, preferences: UserPreferences
+    def _modification_context(
+        cls,
+        modification: str,
+        current_menu: object,
+        preferences: UserPreferences,
+        encoding: MenuEncoding | None,
     ) -> str:
-        """Generate prompt for meal plan modification."""
+        """Shared user request, constraints and current plan for modification prompts.
+
+        With no ``encoding`` the plan is sent as verbose dish objects.
+        """
         schedule_json = cls._compact(
             cls._schedule_to_array_format(preferences.cookSchedule)
         )
@@ -171,12 +248,16 @@ class PromptBuilder:
         budget_json = cls._compact(preferences.budget)
         people_json = cls._compact(preferences.numPeople)
         modification_text = cls._compact(modification)
-        sanitized_menu = cls._strip_keys(current_menu, {"id", "source"})
-        current_plan = cls._compact(sanitized_menu)
+        if encoding is None:
+            current_plan = cls._compact(cls._strip_keys(current_menu, {"id", "source"}))
+            plan_format = "PreviousMealPlan is {day: {meal: [dish objects]}}.\n"
+        else:
+            current_plan = cls._compact(encoding.encode(current_menu))
+            plan_format = (
+                "PreviousMealPlan is {day: {meal: [dish rows]}} with columns "
+                f"{encoding.legend()}; omitted meals are empty.\n"
+            )
         return (
-            "Task: Based on user's new input, previous preferences, and meal plan, "
-            "adjust the meal plan accordingly without changing the format. "
-            "Make the minimal modifications needed to satisfy the request.\n"
             "Note: specificPreferences are items the user wants included at least once during the week, "
             "not in every meal. Avoid items in specificDisliked.\n"
             f"UserInput: {modification_text}\n"
@@ -186,40 +267,137 @@ class PromptBuilder:
             f"Preferences: {preferences_json}\n"
             f"Dislikes: {disliked_json}\n"
             f"CookSchedule: {schedule_json}\n"
+            f"{plan_format}"
             f"PreviousMealPlan: {current_plan}\n"
-            "RETURN ONLY THE MODIFIED JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
         )
 
     @classmethod
-    def shopping_list(cls, menus: WeekMenus) -> str:
-        """Generate prompt for shopping list generation."""
-        menus_json = cls._compact(menus.model_dump())
-        output_schema = cls._compact(
+    def modification(
+        cls,
+        modification: str,
+        current_menu: object,
+        preferences: UserPreferences,
+        max_tokens: int | None = None,
+        compact: bool = True,
+    ) -> str:
+        """Generate prompt for meal plan modification.
+
+        The plan is sent in the compact row encoding unless ``compact`` is
+        False, but the answer is always requested as verbose dish objects,
+        so a slip in the model's output cannot shift values into the wrong
+        fields. ``FULL_MENU_ENCODING.decode`` accepts either shape.
+        """
+
+        def render(encoding: MenuEncoding | None) -> str:
+            return (
+                "Task: Based on user's new input, previous preferences, and meal plan, "
+                "adjust the meal plan accordingly. "
+                "Make the minimal modifications needed to satisfy the request.\n"
+                f"{cls._modification_context(modification, current_menu, preferences, encoding)}"
+                "Return the whole modified plan as {day: {meal: [dish objects]}}, each dish an "
+                f"object with the keys {', '.join(DISH_FIELDS)} and each ingredient an object "
+                f"with the keys {', '.join(INGREDIENT_FIELDS)}.\n"
+                "RETURN ONLY THE MODIFIED JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
+            )
+
+        if not compact:
+            return cls._report("modification", render(None))
+        # Unchanged dishes are copied from the prompt, so no field may be dropped.
+        return cls._fit("modification", render, [FULL_MENU_ENCODING], max_tokens)
+
+    @classmethod
+    def modification_patch(
+        cls,
+        modification: str,
+        current_menu: object,
+        preferences: UserPreferences,
+        max_tokens: int | None = None,
+    ) -> str:
+        """Generate prompt asking only for the meal slots a modification changes."""
+        patch_schema = cls._compact(
             {
-                "items": [
+                "changes": [
                     {
-                        "name": "ingredient_name",
-                        "category": "predefined_category",
-                        "totalQuantity": 0,
-                        "unit": "unit",
+                        "day": "tuesday",
+                        "meal": "dinner",
+                        "dishes": [
+                            {
+                                "name": "Dish Name",
+                                "ingredients": [
+                                    {"name": "ingredient", "quantity": 0, "unit": "g", "category": "proteins"}
+                                ],
+                                "instructions": "1. Step one. 2. Step two.",
+                                "estimatedTime": 30,
+                                "servings": preferences.numPeople,
+                                "difficulty": "easy",
+                                "totalCalories": 500,
+                            }
+                        ],
                     }
                 ]
             }
         )
 
-        return (
-            "Step 3: Generate a consolidated shopping list from the structured weekly meal plan.\n"
-            "CRITICAL RULES:\n"
-            "1) MERGE only true duplicates or very close synonyms (e.g., bell pepper/peppers -> bell peppers). "
-            "Do NOT merge clearly different items (spinach vs broccoli, ginger vs garlic, green onion vs onion).\n"
-            "2) UNITS (North America): proteins -> lbs or oz; produce -> count or bunch; "
-            "grains/dairy/pantry_staples/others -> oz/lbs/count as appropriate. Use a single unit per item.\n"
-            "3) Sum quantities across all dishes. For lbs/oz round to 1 decimal; for count/bunch use whole numbers.\n"
-            "4) Valid categories: proteins, vegetables, fruits, grains, dairy, seasonings, pantry_staples, others.\n"
-            "5) Keep names concise (<= 5 words). Avoid brands and extra adjectives.\n"
-            "6) For seasonings (oils/sauces/spices), use totalQuantity 0 and unit \"\".\n"
-            "7) Respond with compact JSON only (no comments or prose).\n"
-            f"MealPlan: {menus_json}\n"
-            f"OutputSchema: {output_schema}\n"
-            "RETURN ONLY THE RAW JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
+        def render(encoding: MenuEncoding) -> str:
+            return (
+                "Task: Based on user's new input, previous preferences, and meal plan, "
+                "decide which meal slots must change to satisfy the request. "
+                "Make the minimal modifications needed.\n"
+                f"{cls._modification_context(modification, current_menu, preferences, encoding)}"
+                "Return ONLY the changed slots as a patch. Each change replaces every dish in that "
+                "day's meal; use an empty dishes list to clear a slot. Do not repeat unchanged slots.\n"
+                f"OutputSchema: {patch_schema}\n"
+                "RETURN ONLY THE RAW JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
+            )
+
+        return cls._fit(
+            "modification_patch",
+            render,
+            [CONTEXT_MENU_ENCODING, NAMES_MENU_ENCODING],
+            max_tokens,
         )
+
+    _SHOPPING_OUTPUT_SCHEMA = {
+        "items": [
+            {
+                "name": "ingredient_name",
+                "category": "predefined_category",
+                "totalQuantity": 0,
+                "unit": "unit",
+            }
+        ]
+    }
+
+    _SHOPPING_RULES = (
+        "CRITICAL RULES:\n"
+        "1) MERGE only true duplicates or very close synonyms (e.g., bell pepper/peppers -> bell peppers). "
+        "Do NOT merge clearly different items (spinach vs broccoli, ginger vs garlic, green onion vs onion).\n"
+        "2) UNITS (North America): proteins -> lbs or oz; produce -> count or bunch; "
+        "grains/dairy/pantry_staples/others -> oz/lbs/count as appropriate. Use a single unit per item.\n"
+        "3) Sum quantities across all dishes. For lbs/oz round to 1 decimal; for count/bunch use whole numbers.\n"
+        "4) Valid categories: proteins, vegetables, fruits, grains, dairy, seasonings, pantry_staples, others.\n"
+        "5) Keep names concise (<= 5 words). Avoid brands and extra adjectives.\n"
+        "6) For seasonings (oils/sauces/spices), use totalQuantity 0 and unit \"\".\n"
+        "7) Respond with compact JSON only (no comments or prose).\n"
+    )
+
+    @classmethod
+    def shopping_list_from_ingredients(
+        cls, ingredients: list[dict], max_tokens: int | None = None
+    ) -> str:
+        """Generate prompt consolidating ingredient rows the local engine could not merge."""
+        output_schema = cls._compact(cls._SHOPPING_OUTPUT_SCHEMA)
+
+        def render(encoding: MenuEncoding) -> str:
+            ingredients_json = cls._compact(encoding.encode_rows(ingredients))
+            columns = ",".join(encoding.ingredient_fields)
+            return (
+                "Consolidate these recipe ingredient lines into shopping list items.\n"
+                f"{cls._SHOPPING_RULES}"
+                f"Ingredients are rows of [{columns}].\n"
+                f"Ingredients: {ingredients_json}\n"
+                f"OutputSchema: {output_schema}\n"
+                "RETURN ONLY THE RAW JSON OBJECT. Do not use Markdown formatting (no ```json blocks)."
+            )
+
+        return cls._fit("shopping_list_from_ingredients", render, [SHOPPING_ENCODING], max_tokens)
@@ -0,0 +1,236 @@
+"""Client-side token buckets keeping Gemini calls under the RPM/TPM quota."""
+
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Protocol
+
+import anyio
+
+from app.core.config import settings
+from app.core.exceptions import GeminiQuotaExceededError
+from app.core.metrics import get_metrics
+from app.services.ai.encoding import estimate_tokens
+from app.services.ai.resilience import remaining_budget
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Requests and tokens allowed per minute; 0 leaves a dimension unlimited."""
+
+    rpm: float = 0.0
+    tpm: float = 0.0
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """Outcome of reserving capacity for one call.
+
+    ``wait_seconds`` is how long the caller must wait before sending;
+    the headroom fields are the fraction of each bucket left afterwards
+    (negative while callers are queued behind the quota).
+    """
+
+    wait_seconds: float
+    request_headroom: float
+    token_headroom: float
+
+
+def _take(
+    levels: tuple[float, float] | None,
+    updated_at: float,
+    now: float,
+    limits: RateLimits,
+    tokens: float,
+) -> tuple[tuple[float, float], Reservation]:
+    """Refill both buckets to ``now`` and take one request and ``tokens``.
+
+    Buckets start full and may go negative: a caller that finds one short
+    still takes its share and waits until the refill covers it, so waiting
+    callers are served in order without retry loops.
+    """
+    capacities = (limits.rpm, limits.tpm)
+    costs = (1.0, min(tokens, limits.tpm) if limits.tpm else tokens)
+    if levels is None:
+        levels = capacities
+    new_levels = []
+    wait = 0.0
+    headroom = []
+    for level, capacity, cost in zip(levels, capacities, costs):
+        if not capacity:
+            new_levels.append(0.0)
+            headroom.append(1.0)
+            continue
+        rate = capacity / 60.0
+        level = min(capacity, level + max(0.0, now - updated_at) * rate) - cost
+        new_levels.append(level)
+        wait = max(wait, -level / rate)
+        headroom.append(level / capacity)
+    return (new_levels[0], new_levels[1]), Reservation(wait, headroom[0], headroom[1])
+
+
+def _admits(reservation: Reservation, max_wait: float | None) -> bool:
+    """Whether a reservation's wait fits within ``max_wait`` (None: any wait)."""
+    return max_wait is None or reservation.wait_seconds <= 0 or reservation.wait_seconds < max_wait
+
+
+class IRateLimitBackend(Protocol):
+    """Interface for token-bucket state storage."""
+
+    def reserve(
+        self, key: str, limits: RateLimits, tokens: float, max_wait: float | None = None
+    ) -> Reservation:
+        """Atomically take one request and ``tokens`` from the buckets of key.
+
+        When the wait would reach ``max_wait`` nothing is taken; the
+        returned reservation still reports that wait.
+        """
+        ...
+
+
+class MemoryRateLimitBackend:
+    """Buckets held in this process only."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, tuple[tuple[float, float], float]] = {}
+        self._lock = Lock()
+
+    def reserve(
+        self, key: str, limits: RateLimits, tokens: float, max_wait: float | None = None
+    ) -> Reservation:
+        now = time.time()
+        with self._lock:
+            levels, updated_at = self._buckets.get(key, (None, now))
+            levels, reservation = _take(levels, updated_at, now, limits, tokens)
+            if _admits(reservation, max_wait):
+                self._buckets[key] = (levels, now)
+        return reservation
+
+
+class SQLiteRateLimitBackend:
+    """Buckets in a SQLite file shared by every worker process on the host."""
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "key TEXT PRIMARY KEY, "
+                "requests REAL NOT NULL, "
+                "tokens REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> closing[sqlite3.Connection]:
+        return closing(sqlite3.connect(self._db_path, timeout=5.0, isolation_level=None))
+
+    def reserve(
+        self, key: str, limits: RateLimits, tokens: float, max_wait: float | None = None
+    ) -> Reservation:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT requests, tokens, updated_at FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                levels = (row[0], row[1]) if row else None
+                updated_at = row[2] if row else now
+                levels, reservation = _take(levels, updated_at, now, limits, tokens)
+                if _admits(reservation, max_wait):
+                    conn.execute(
+                        "INSERT OR REPLACE INTO buckets (key, requests, tokens, updated_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (key, levels[0], levels[1], now),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return reservation
+
+
+class RateLimiter:
+    """Delays Gemini calls so each (API key, model) stays within its quota.
+
+    Tokens are the prompt's estimated input tokens. A call that would
+    exceed the quota waits for the buckets to refill instead of failing;
+    it only fails when that wait would overrun the deadline budget, and
+    then takes nothing from the buckets.
+    """
+
+    def __init__(self, backend: IRateLimitBackend, limits: RateLimits) -> None:
+        self._backend = backend
+        self._limits = limits
+
+    @staticmethod
+    def make_key(api_key: str, model_name: str) -> str:
+        """Bucket key; the API key is hashed so it is never stored."""
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        return f"{model_name}:{digest}"
+
+    async def acquire(self, api_key: str, model_name: str, prompt: str) -> float:
+        """Reserve quota for one call, waiting as needed; return the wait.
+
+        Raises:
+            GeminiQuotaExceededError: When the wait would outlast the
+                deadline budget.
+        """
+        key = self.make_key(api_key, model_name)
+        remaining = remaining_budget()
+        reservation = await anyio.to_thread.run_sync(
+            self._backend.reserve,
+            key,
+            self._limits,
+            float(estimate_tokens(prompt)),
+            remaining,
+        )
+        metrics = get_metrics()
+        metrics.set(
+            "omenu_gemini_quota_headroom",
+            reservation.request_headroom,
+            model=model_name,
+            kind="requests",
+        )
+        metrics.set(
+            "omenu_gemini_quota_headroom",
+            reservation.token_headroom,
+            model=model_name,
+            kind="tokens",
+        )
+        wait = reservation.wait_seconds
+        if wait <= 0:
+            return 0.0
+        if not _admits(reservation, remaining):
+            raise GeminiQuotaExceededError(
+                "Gemini quota would not free up before the deadline.", retry_after_seconds=wait
+            )
+        logger.info(f"Delaying Gemini call {wait:.2f}s to stay within quota for {model_name}")
+        metrics.inc("omenu_gemini_quota_wait_seconds_total", wait, model=model_name)
+        await anyio.sleep(wait)
+        return wait
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter | None:
+    """Get the configured rate limiter, or None when no quota is configured."""
+    limits = RateLimits(rpm=settings.gemini_rpm_limit, tpm=settings.gemini_tpm_limit)
+    if not limits.rpm and not limits.tpm:
+        return None
+    if settings.gemini_rate_limit_backend.lower() == "sqlite":
+        backend: IRateLimitBackend = SQLiteRateLimitBackend(
+            settings.gemini_rate_limit_path or (settings.data_dir / "gemini_quota.sqlite3")
+        )
+    else:
+        backend = MemoryRateLimitBackend()
+    return RateLimiter(backend, limits)
@@ -0,0 +1,169 @@
+"""Retry, hedging, circuit breaking and deadline budgets for Gemini calls."""
+
+import math
+import random
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.config import settings
+from app.core.exceptions import (
+    GeminiCircuitOpenError,
+    GeminiError,
+    GeminiOverloadedError,
+    GeminiQuotaExceededError,
+    GeminiSafetyError,
+    GeminiTimeoutError,
+    GeminiTruncatedError,
+)
+
+# Errors worth another attempt: the upstream is busy, not refusing the request.
+RETRYABLE_ERRORS: tuple[type[GeminiError], ...] = (GeminiOverloadedError, GeminiQuotaExceededError)
+
+# Errors that count against the circuit breaker: the upstream looks down.
+BREAKER_ERRORS: tuple[type[GeminiError], ...] = (GeminiOverloadedError, GeminiTimeoutError)
+
+# Errors raised from a response the upstream did return, so it is up. Any
+# other error (quota, unknown) tells the breaker nothing either way.
+RESPONDED_ERRORS: tuple[type[GeminiError], ...] = (GeminiSafetyError, GeminiTruncatedError)
+
+_deadline: ContextVar[float | None] = ContextVar("gemini_deadline", default=None)
+
+
+@contextmanager
+def deadline_budget(seconds: float | None) -> Iterator[None]:
+    """Bound every Gemini call made inside the block by one shared deadline.
+
+    Nested budgets never extend an enclosing one. ``None`` or a
+    non-positive value leaves the current budget unchanged.
+    """
+    if not seconds or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> float | None:
+    """Seconds left in the current deadline budget, or ``None`` without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    The delay before retry ``n`` is drawn uniformly from
+    ``[0, min(max_delay, base_delay * 2 ** (n - 1))]``; a retry-after hint
+    from the upstream raises it to at least the hinted value.
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def backoff(
+        self,
+        attempt: int,
+        retry_after: float | None = None,
+        rng: Callable[[float, float], float] = random.uniform,
+    ) -> float:
+        """Delay before the attempt following ``attempt`` (1-based)."""
+        delay = rng(0.0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class CircuitBreaker:
+    """Fail fast while the upstream keeps failing.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected with ``GeminiCircuitOpenError``. Once
+    ``reset_seconds`` have passed, one call is let through as a probe:
+    success closes the circuit, failure keeps it open for another
+    ``reset_seconds``. A threshold of 0 disables the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        """Reject the call while the circuit is open and not due for a probe."""
+        if self._opened_at is None:
+            return
+        waited = self._clock() - self._opened_at
+        if waited < self._reset_seconds:
+            raise GeminiCircuitOpenError(retry_after_seconds=self._reset_seconds - waited)
+        # Let this call probe the upstream; others keep failing fast meanwhile.
+        self._opened_at = self._clock()
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._threshold and self._failures >= self._threshold:
+            self._opened_at = self._clock()
+
+
+class LatencyTracker:
+    """Rolling window of recent successful call durations."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        """The ``q`` quantile (0-1) of the window, or ``None`` with too few samples."""
+        if len(self._samples) < self._min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Retry policy from settings."""
+    return RetryPolicy(
+        max_attempts=max(1, settings.gemini_max_attempts),
+        base_delay=settings.gemini_retry_base_seconds,
+        max_delay=settings.gemini_retry_max_seconds,
+    )
+
+
+@lru_cache
+def get_circuit_breaker(model_name: str) -> CircuitBreaker:
+    """Process-wide circuit breaker for one model."""
+    return CircuitBreaker(
+        failure_threshold=settings.gemini_breaker_threshold,
+        reset_seconds=settings.gemini_breaker_reset_seconds,
+    )
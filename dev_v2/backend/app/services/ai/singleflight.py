@@ -0,0 +1,77 @@
+"""Coalescing of concurrent identical Gemini requests."""
+
+from collections.abc import Awaitable, Callable
+from typing import Any, Generic, TypeVar
+
+import anyio
+
+from app.core.metrics import get_metrics
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    """A single in-flight upstream call shared by all waiters."""
+
+    def __init__(self) -> None:
+        self.done = anyio.Event()
+        self.result: T | None = None
+        self.error: Exception | None = None
+        self.cancelled = False
+
+
+class SingleFlight(Generic[T]):
+    """Registry ensuring only one upstream call per key is in flight.
+
+    The first caller for a key (the leader) runs the work; callers that
+    arrive while it is running wait and receive the same result or
+    exception. If the leader is cancelled, one waiter takes over.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call[T]] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join an identical call already in flight."""
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                return await self._lead(key, fn)
+
+            await call.done.wait()
+            if call.cancelled:
+                continue
+            self.collapsed += 1
+            get_metrics().inc("omenu_gemini_single_flight_total", outcome="collapsed")
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call: _Call[T] = _Call()
+        self._calls[key] = call
+        self.leaders += 1
+        get_metrics().inc("omenu_gemini_single_flight_total", outcome="leader")
+        try:
+            call.result = await fn()
+            return call.result
+        except Exception as exc:
+            call.error = exc
+            raise
+        except BaseException:
+            call.cancelled = True
+            raise
+        finally:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict[str, Any]:
+        """Return leader/collapsed counters and current in-flight count."""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+        }
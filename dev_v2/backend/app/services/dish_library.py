@@ -0,0 +1,316 @@
+"""Library of generated dishes, searchable by name, ingredients and difficulty."""
+
+import hashlib
+import logging
+import random
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from functools import lru_cache
+from threading import Lock
+
+from app.core.config import settings
+from app.models import Difficulty, Dish, LibraryDish, WeekMenus
+from app.repositories.dish_library import IDishLibraryRepository, get_dish_library_repository
+
+logger = logging.getLogger(__name__)
+
+_MEALS = ("breakfast", "lunch", "dinner")
+_DIFFICULTY_RANK = {Difficulty.easy: 0, Difficulty.medium: 1, Difficulty.hard: 2}
+_PRIME = (1 << 61) - 1
+
+
+def dish_key(name: str) -> str:
+    """Normalized dish name: lowercase words separated by single spaces."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name.lower()).split())
+
+
+def _shingles(key: str) -> set[str]:
+    """Character trigrams of a normalized name, padded at the word edges.
+
+    Only the name is shingled: the meal outline a dish is matched from
+    names dishes without their ingredients, so ingredient shingles on the
+    library side would only lower every score. Ingredients are filtered
+    through the inverted index instead.
+    """
+    padded = f" {key} "
+    if len(padded) < 3:
+        return {padded}
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _fingerprint(dish: Dish) -> str:
+    """A dish's content, ignoring its per-book id."""
+    return dish.model_dump_json(exclude={"id"})
+
+
+def _week_dishes(menus: WeekMenus) -> set[tuple[str, str]]:
+    return {
+        (meal, _fingerprint(dish))
+        for _, menu in menus
+        for meal in _MEALS
+        for dish in getattr(menu, meal)
+    }
+
+
+class MinHasher:
+    """MinHash signatures whose agreement estimates the Jaccard similarity of sets."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_perm)]
+
+    def signature(self, items: Iterable[str]) -> tuple[int, ...]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+            for item in items
+        ]
+        if not hashes:
+            return tuple(_PRIME for _ in self._params)
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._params)
+
+    @staticmethod
+    def similarity(first: tuple[int, ...], second: tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the sets behind two signatures."""
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class DishLibrary:
+    """Generated dishes kept for reuse, indexed without embeddings.
+
+    Dishes are keyed by normalized name, so a dish generated again
+    replaces its earlier recipe. Inverted indexes map ingredient names,
+    meals served at and difficulty to dish keys. Names are looked up by
+    the MinHash signature of their character trigrams, bucketed into LSH
+    bands, so "Chicken Stir-Fry" and "chicken stir fry" meet without a
+    scan of the library. Every change is written through to the
+    repository; ``refresh`` picks up dishes other workers added.
+    """
+
+    def __init__(
+        self,
+        repository: IDishLibraryRepository,
+        similarity: float | None = None,
+        num_perm: int = 64,
+        bands: int = 16,
+    ) -> None:
+        self._repository = repository
+        self._threshold = settings.dish_library_similarity if similarity is None else similarity
+        self._hasher = MinHasher(num_perm)
+        self._rows = max(1, num_perm // bands)
+        self._lock = Lock()
+        self._dishes: dict[str, LibraryDish] = {}
+        self._signatures: dict[str, tuple[int, ...]] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], set[str]] = defaultdict(set)
+        self._by_ingredient: dict[str, set[str]] = defaultdict(set)
+        self._by_meal: dict[str, set[str]] = defaultdict(set)
+        self._by_difficulty: dict[str, set[str]] = defaultdict(set)
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._dishes)
+
+    def refresh(self) -> int:
+        """Index dishes saved since the last refresh; return how many."""
+        dishes, cursor = self._repository.list_since(self._cursor)
+        with self._lock:
+            for dish in dishes:
+                self._index(dish)
+            self._cursor = max(self._cursor, cursor)
+        return len(dishes)
+
+    def add_menus(self, menus: WeekMenus, previous: WeekMenus | None = None) -> int:
+        """Store the dishes of a week's menus; return how many were stored.
+
+        With ``previous``, the week before an edit, dishes it already
+        served at the same meal are skipped, so an edit does not count
+        every kept dish as used again.
+        """
+        kept = _week_dishes(previous) if previous is not None else set()
+        dishes = [
+            (dish, meal)
+            for _, menu in menus
+            for meal in _MEALS
+            for dish in getattr(menu, meal)
+            if (meal, _fingerprint(dish)) not in kept
+        ]
+        return len(self.add_many(dishes))
+
+    def add_many(self, dishes: list[tuple[Dish, str]]) -> list[LibraryDish]:
+        """Store dishes with the meal each was served at, replacing same-named ones."""
+        now = datetime.now(timezone.utc)
+        entries: dict[str, LibraryDish] = {}
+        with self._lock:
+            for dish, meal in dishes:
+                key = dish_key(dish.name)
+                if not key:
+                    continue
+                previous = entries.get(key) or self._dishes.get(key)
+                meals = set(previous.meals) if previous else set()
+                meals.add(meal)
+                entries[key] = LibraryDish(
+                    key=key,
+                    dish=dish.model_copy(update={"id": key}),
+                    meals=sorted(meals, key=_MEALS.index),
+                    uses=previous.uses + 1 if previous else 1,
+                    updatedAt=now,
+                )
+        self._repository.save_many(list(entries.values()))
+        with self._lock:
+            for entry in entries.values():
+                self._index(entry)
+        return list(entries.values())
+
+    def find(
+        self,
+        *,
+        ingredients: Iterable[str] = (),
+        meal: str | None = None,
+        difficulty: Difficulty | None = None,
+    ) -> list[LibraryDish]:
+        """Dishes using all ``ingredients`` at ``meal`` and ``difficulty``, most used first."""
+        with self._lock:
+            keys = set(self._dishes)
+            for ingredient in ingredients:
+                keys &= self._by_ingredient.get(ingredient.strip().lower(), set())
+            if meal is not None:
+                keys &= self._by_meal.get(meal, set())
+            if difficulty is not None:
+                keys &= self._by_difficulty.get(Difficulty(difficulty).value, set())
+            found = [self._dishes[key] for key in keys]
+        return sorted(found, key=lambda entry: (-entry.uses, entry.key))
+
+    def similar(self, name: str, limit: int = 5) -> list[tuple[LibraryDish, float]]:
+        """Dishes whose names are at least ``similarity`` alike, best first."""
+        key = dish_key(name)
+        if not key:
+            return []
+        signature = self._hasher.signature(_shingles(key))
+        with self._lock:
+            candidates: set[str] = set()
+            for band in self._bands(signature):
+                candidates |= self._buckets.get(band, set())
+            scored = [
+                (
+                    self._dishes[candidate],
+                    self._hasher.similarity(signature, self._signatures[candidate]),
+                )
+                for candidate in candidates
+            ]
+        scored = [(entry, score) for entry, score in scored if score >= self._threshold]
+        scored.sort(key=lambda pair: (-pair[1], -pair[0].uses, pair[0].key))
+        return scored[:limit]
+
+    def match(
+        self,
+        name: str,
+        *,
+        meal: str | None = None,
+        max_difficulty: Difficulty | None = None,
+        excluded: Iterable[str] = (),
+        preferred: Iterable[str] = (),
+    ) -> Dish | None:
+        """Best library dish to serve for an outline dish name, or None.
+
+        The library is shared by all users, so a dish written for someone
+        else must not lose what this user asked for.
+
+        Args:
+            name: Dish name from the meal outline.
+            meal: Meal the dish is planned for; dishes served at it before
+                win ties.
+            max_difficulty: Hardest difficulty the user accepts.
+            excluded: Disliked terms; dishes naming one in their name or
+                ingredients are skipped.
+            preferred: Wanted terms. When the outline name mentions one,
+                only dishes using it as an ingredient match. A term no
+                library ingredient contains, e.g. "gluten-free", cannot be
+                checked, so nothing matches.
+        """
+        terms = [term.strip().lower() for term in excluded if term.strip()]
+        wanted = [term.strip().lower() for term in preferred if term.strip()]
+        key = dish_key(name)
+        with self._lock:
+            disliked: set[str] = set()
+            for term in terms:
+                disliked |= self._using(term)
+            required: list[set[str]] = []
+            for term in wanted:
+                keys = self._using(term)
+                if not keys:
+                    return None
+                if dish_key(term) in key:
+                    required.append(keys)
+            allowed: set[str] | None = None
+            if max_difficulty is not None:
+                limit = _DIFFICULTY_RANK[Difficulty(max_difficulty)]
+                allowed = set().union(
+                    *(
+                        self._by_difficulty.get(level.value, set())
+                        for level, rank in _DIFFICULTY_RANK.items()
+                        if rank <= limit
+                    )
+                )
+
+        best: tuple[float, bool, LibraryDish] | None = None
+        for entry, score in self.similar(name, limit=10):
+            if entry.key in disliked or (allowed is not None and entry.key not in allowed):
+                continue
+            if any(term in entry.key for term in terms):
+                continue
+            if any(entry.key not in keys for keys in required):
+                continue
+            candidate = (score, meal in entry.meals, entry)
+            if best is None or candidate[:2] > best[:2]:
+                best = candidate
+        return best[2].dish if best else None
+
+    def _using(self, term: str) -> set[str]:
+        """Keys of dishes with an ingredient containing ``term``; the caller holds the lock."""
+        keys: set[str] = set()
+        for ingredient, dishes in self._by_ingredient.items():
+            if term in ingredient:
+                keys |= dishes
+        return keys
+
+    def _bands(self, signature: tuple[int, ...]) -> list[tuple[int, tuple[int, ...]]]:
+        return [
+            (index, signature[start : start + self._rows])
+            for index, start in enumerate(range(0, len(signature), self._rows))
+        ]
+
+    def _index(self, entry: LibraryDish) -> None:
+        """Add or replace a dish in every index; the caller holds the lock."""
+        self._unindex(entry.key)
+        signature = self._hasher.signature(_shingles(entry.key))
+        self._dishes[entry.key] = entry
+        self._signatures[entry.key] = signature
+        for band in self._bands(signature):
+            self._buckets[band].add(entry.key)
+        for ingredient in entry.dish.ingredients:
+            self._by_ingredient[ingredient.name.strip().lower()].add(entry.key)
+        for meal in entry.meals:
+            self._by_meal[meal].add(entry.key)
+        self._by_difficulty[Difficulty(entry.dish.difficulty).value].add(entry.key)
+
+    def _unindex(self, key: str) -> None:
+        entry = self._dishes.pop(key, None)
+        if entry is None:
+            return
+        for band in self._bands(self._signatures.pop(key)):
+            self._buckets[band].discard(key)
+        for ingredient in entry.dish.ingredients:
+            self._by_ingredient[ingredient.name.strip().lower()].discard(key)
+        for meal in entry.meals:
+            self._by_meal[meal].discard(key)
+        self._by_difficulty[Difficulty(entry.dish.difficulty).value].discard(key)
+
+
+@lru_cache
+def get_dish_library() -> DishLibrary:
+    """Get the process-wide dish library, loaded from its repository."""
+    library = DishLibrary(get_dish_library_repository())
+    loaded = library.refresh()
+    logger.info(f"Loaded {loaded} dishes into the dish library")
+    return library
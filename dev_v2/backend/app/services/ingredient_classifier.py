@@ -0,0 +1,287 @@
+"""Ingredient category classification by keyword vocabulary."""
+
+from collections import deque
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+
+from app.models.enums import IngredientCategory
+
+VALID_CATEGORIES = frozenset(category.value for category in IngredientCategory)
+
+FRESH_VEGETABLE_OVERRIDES = frozenset(
+    [
+        "green bean",
+        "green beans",
+        "green onion",
+        "scallion",
+        "spring onion",
+        "onion",
+        "garlic",
+        "shallot",
+        "leek",
+    ]
+)
+SEASONING_KEYWORDS = frozenset(
+    [
+        "salt",
+        "pepper",
+        "oil",
+        "olive oil",
+        "vegetable oil",
+        "canola oil",
+        "avocado oil",
+        "sesame oil",
+        "coconut oil",
+        "butter",
+        "ghee",
+        "soy sauce",
+        "vinegar",
+        "balsamic vinegar",
+        "rice vinegar",
+        "apple cider vinegar",
+        "white vinegar",
+        "red wine vinegar",
+        "fish sauce",
+        "oyster sauce",
+        "hoisin",
+        "teriyaki",
+        "miso",
+        "garlic powder",
+        "onion powder",
+        "paprika",
+        "cumin",
+        "chili powder",
+        "cayenne",
+        "chili flakes",
+        "oregano",
+        "basil",
+        "thyme",
+        "rosemary",
+        "cinnamon",
+        "nutmeg",
+        "ginger",
+        "ground ginger",
+        "turmeric",
+        "curry powder",
+        "five spice",
+        "italian seasoning",
+        "bay leaf",
+        "vanilla",
+        "vanilla extract",
+        "lemon juice",
+        "lime juice",
+        "garlic",
+        "onion",
+        "shallot",
+    ]
+)
+
+PANTRY_KEYWORDS = frozenset(
+    [
+        "rice",
+        "pasta",
+        "spaghetti",
+        "penne",
+        "noodle",
+        "noodles",
+        "ramen",
+        "udon",
+        "soba",
+        "couscous",
+        "quinoa",
+        "bulgur",
+        "barley",
+        "flour",
+        "all-purpose flour",
+        "bread flour",
+        "cornmeal",
+        "breadcrumbs",
+        "panko",
+        "oats",
+        "oatmeal",
+        "rolled oats",
+        "bread",
+        "tortilla",
+        "bagel",
+        "pita",
+        "wrap",
+        "canned beans",
+        "black beans",
+        "kidney beans",
+        "pinto beans",
+        "white beans",
+        "navy beans",
+        "garbanzo beans",
+        "chickpeas",
+        "lentils",
+        "tomato sauce",
+        "canned tomatoes",
+        "tomato paste",
+        "diced tomatoes",
+        "crushed tomatoes",
+        "marinara",
+        "salsa",
+        "stock",
+        "broth",
+        "vegetable broth",
+        "chicken broth",
+        "beef broth",
+        "coconut milk",
+        "peanut butter",
+        "honey",
+        "sugar",
+        "brown sugar",
+        "maple syrup",
+        "jam",
+        "jelly",
+        "mustard",
+        "ketchup",
+        "mayonnaise",
+        "hot sauce",
+        "sriracha",
+        "bbq sauce",
+        "canned corn",
+        "canned tuna",
+        "tuna",
+        "canned salmon",
+        "salmon",
+        "beans",
+    ]
+)
+
+# Vocabulary groups matched against ingredient names.
+_FRESH = "fresh"
+_PANTRY = "pantry"
+_SEASONING = "seasoning"
+_POWDER = "powder"
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton reporting which keyword groups occur in a text.
+
+    All keywords are compiled once into a trie with failure links, so a
+    text is scanned in a single pass regardless of vocabulary size.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+
+        pending: list[set[str]] = [set()]
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                state = 0
+                for char in keyword:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        pending.append(set())
+                    state = next_state
+                pending[state].add(group)
+
+        # Breadth-first pass wiring failure links and merging outputs.
+        queue = deque(self._goto[0].values())
+        order = [0]
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                queue.append(child)
+
+        self._output: list[frozenset[str]] = [frozenset()] * len(self._goto)
+        for state in order:
+            inherited = self._output[self._fail[state]] if state else frozenset()
+            self._output[state] = frozenset(pending[state]) | inherited
+
+    def groups_in(self, text: str) -> frozenset[str]:
+        """Return the groups with at least one keyword occurring in ``text``."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return frozenset(found)
+
+
+class IngredientClassifier:
+    """Assigns shopping categories to ingredient names.
+
+    Precedence: fresh vegetable overrides (unless the name mentions
+    "powder"), then pantry keywords, then seasoning keywords, then the
+    model-provided category if valid, otherwise ``"others"``. Keyword
+    scans are memoized per normalized name in a bounded LRU cache.
+    """
+
+    def __init__(self, cache_size: int = 4096) -> None:
+        self._matcher = KeywordMatcher(
+            {
+                _FRESH: FRESH_VEGETABLE_OVERRIDES,
+                _PANTRY: PANTRY_KEYWORDS,
+                _SEASONING: SEASONING_KEYWORDS,
+                _POWDER: ("powder",),
+            }
+        )
+        self._keyword_category = lru_cache(maxsize=cache_size)(self._scan)
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """Normalize an ingredient name for matching."""
+        return name.strip().lower()
+
+    def classify(self, name: str, raw_category: str | None = None) -> str:
+        """Return the category for one ingredient name."""
+        category = self._keyword_category(self.normalize_name(name))
+        if category is not None:
+            return category
+        if raw_category in VALID_CATEGORIES:
+            return raw_category
+        return "others"
+
+    def classify_many(
+        self, items: Iterable[tuple[str, str | None]]
+    ) -> list[str]:
+        """Classify ``(name, raw_category)`` pairs, scanning each distinct name once."""
+        pairs = list(items)
+        keyword_categories = {
+            key: self._keyword_category(key)
+            for key in {self.normalize_name(name) for name, _ in pairs}
+        }
+        results: list[str] = []
+        for name, raw_category in pairs:
+            category = keyword_categories[self.normalize_name(name)]
+            if category is None:
+                category = raw_category if raw_category in VALID_CATEGORIES else "others"
+            results.append(category)
+        return results
+
+    def cache_info(self):
+        """Statistics of the per-name memo cache."""
+        return self._keyword_category.cache_info()
+
+    def _scan(self, name_key: str) -> str | None:
+        groups = self._matcher.groups_in(name_key)
+        if _FRESH in groups and _POWDER not in groups:
+            return "vegetables"
+        if _PANTRY in groups:
+            return "pantry_staples"
+        if _SEASONING in groups:
+            return "seasonings"
+        return None
+
+
+@lru_cache
+def get_ingredient_classifier() -> IngredientClassifier:
+    """Get the shared ingredient classifier."""
+    return IngredientClassifier()
@@ -0,0 +1,200 @@
+"""Background job queue for menu book generation."""
+
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any
+
+import anyio
+from anyio.abc import TaskGroup
+
+from app.core.config import settings
+from app.core.exceptions import AppException, QueueFullError
+from app.models import ErrorResponse, MenuBook, MenuBookJob, MenuBookStatus, UserPreferences
+from app.repositories.jobs import MenuBookJobRepository, get_menu_book_job_repository
+from app.services.ai.admission import Priority, gemini_priority
+from app.services.menu_service import MenuService, get_menu_service
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between sweeps of finished jobs.
+_SWEEP_INTERVAL_SECONDS = 3600.0
+
+# Stage reported by MenuService -> (next stage shown to clients, progress fraction)
+_STAGE_PROGRESS = {
+    "outline": ("structuring", 0.4),
+    "structured": ("normalizing", 0.9),
+}
+
+
+class MenuBookJobQueue:
+    """Bounded queue of menu book generation jobs run by a worker pool.
+
+    ``workers`` jobs run concurrently; at most ``max_pending`` more may
+    wait. Submissions beyond that are rejected with ``QueueFullError``.
+    Finished jobs are deleted ``retention_hours`` after their last update.
+    """
+
+    def __init__(
+        self,
+        repository: MenuBookJobRepository | None = None,
+        service_factory: Callable[[], MenuService] = get_menu_service,
+        workers: int | None = None,
+        max_pending: int | None = None,
+        retention_hours: float | None = None,
+    ) -> None:
+        self._repository = repository or get_menu_book_job_repository()
+        self._service_factory = service_factory
+        self._workers = max(1, workers or settings.menu_job_workers)
+        self._max_pending = max(1, max_pending or settings.menu_job_max_pending)
+        self._retention_hours = (
+            settings.menu_job_retention_hours if retention_hours is None else retention_hours
+        )
+        self._send, self._receive = anyio.create_memory_object_stream[str](
+            self._max_pending
+        )
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def pending_count(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._send.statistics().current_buffer_used
+
+    async def start(self, task_group: TaskGroup) -> None:
+        """Start workers and re-enqueue jobs left unfinished by a restart."""
+        pending = await anyio.to_thread.run_sync(self._repository.list_pending)
+        for _ in range(self._workers):
+            task_group.start_soon(self._worker)
+        if self._retention_hours > 0:
+            task_group.start_soon(self._sweeper)
+        for job in pending:
+            logger.info(f"Resuming menu book job {job.jobId}")
+            task_group.start_soon(self._send.send, job.jobId)
+        self._running = True
+
+    async def submit(self, preferences: UserPreferences) -> MenuBookJob:
+        """Persist a new job and enqueue it, returning its placeholder."""
+        if self.pending_count() >= self._max_pending:
+            raise QueueFullError("Menu generation queue is full, please retry shortly.")
+
+        book = self._service_factory().placeholder_book(preferences)
+        now = datetime.now(timezone.utc)
+        job = MenuBookJob(
+            jobId=book.id,
+            status=MenuBookStatus.generating,
+            menuBook=book,
+            createdAt=now,
+            updatedAt=now,
+        )
+        await anyio.to_thread.run_sync(self._repository.save, job)
+        try:
+            self._send.send_nowait(job.jobId)
+        except anyio.WouldBlock as exc:
+            await anyio.to_thread.run_sync(self._repository.delete, job.jobId)
+            raise QueueFullError("Menu generation queue is full, please retry shortly.") from exc
+        return job
+
+    async def complete(self, book: MenuBook) -> MenuBookJob:
+        """Persist a job already finished with ``book``, e.g. one precomputed."""
+        now = datetime.now(timezone.utc)
+        job = MenuBookJob(
+            jobId=book.id,
+            status=MenuBookStatus.ready,
+            stage="done",
+            progress=1.0,
+            menuBook=book,
+            createdAt=now,
+            updatedAt=now,
+        )
+        await anyio.to_thread.run_sync(self._repository.save, job)
+        return job
+
+    async def get(self, job_id: str) -> MenuBookJob | None:
+        """Load the current state of a job."""
+        return await anyio.to_thread.run_sync(self._repository.get, job_id)
+
+    async def sweep(self) -> int:
+        """Delete finished jobs older than the retention period; return how many."""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=self._retention_hours)
+        deleted = await anyio.to_thread.run_sync(self._repository.delete_finished, cutoff)
+        if deleted:
+            logger.info(f"Deleted {deleted} finished menu book job(s)")
+        return deleted
+
+    async def _sweeper(self) -> None:
+        interval = min(_SWEEP_INTERVAL_SECONDS, self._retention_hours * 3600)
+        while True:
+            try:
+                await self.sweep()
+            except OSError:
+                logger.exception("Failed to sweep finished menu book jobs")
+            await anyio.sleep(interval)
+
+    async def _worker(self) -> None:
+        async for job_id in self._receive:
+            claimed = await anyio.to_thread.run_sync(self._repository.claim, job_id)
+            if not claimed:
+                continue
+            try:
+                await self._run(job_id)
+            except Exception:  # pragma: no cover
+                logger.exception(f"Menu book job {job_id} crashed")
+            finally:
+                await anyio.to_thread.run_sync(self._repository.release, job_id)
+
+    async def _run(self, job_id: str) -> None:
+        job = await self.get(job_id)
+        if job is None or job.status != MenuBookStatus.generating:
+            return
+
+        async def update(**changes: Any) -> None:
+            nonlocal job
+            job = job.model_copy(
+                update={**changes, "updatedAt": datetime.now(timezone.utc)}
+            )
+            await anyio.to_thread.run_sync(self._repository.save, job)
+
+        async def on_progress(stage: str, payload: dict[str, Any]) -> None:
+            if stage in _STAGE_PROGRESS:
+                next_stage, progress = _STAGE_PROGRESS[stage]
+                await update(stage=next_stage, progress=progress)
+
+        await update(stage="outline", progress=0.1)
+        try:
+            with gemini_priority(Priority.background):
+                book = await self._service_factory().generate(
+                    job.menuBook.preferences,
+                    book_id=job.jobId,
+                    on_progress=on_progress,
+                )
+        except AppException as exc:
+            await update(
+                status=MenuBookStatus.error,
+                stage="failed",
+                error=ErrorResponse(code=exc.code, message=exc.message),
+            )
+            return
+        except Exception as exc:
+            await update(
+                status=MenuBookStatus.error,
+                stage="failed",
+                error=ErrorResponse(code="INTERNAL_ERROR", message=str(exc)),
+            )
+            return
+
+        await update(
+            status=MenuBookStatus.ready,
+            stage="done",
+            progress=1.0,
+            menuBook=book,
+        )
+
+
+@lru_cache
+def get_menu_book_job_queue() -> MenuBookJobQueue:
+    """Get the process-wide menu book job queue."""
+    return MenuBookJobQueue()
@@ -1,73 +1,312 @@
 """Menu generation service."""
 
+import logging
 import uuid
+from collections.abc import Awaitable, Callable
 from datetime import datetime, timezone
+from typing import Any
 
-from app.core.exceptions import ParseError
+import anyio
+
+from app.core.config import settings
+from app.core.exceptions import GeminiTruncatedError, ParseError
+from app.core.metrics import get_metrics, record_retry, record_stage, timed_stage
 from app.models import (
     CookSchedule,
+    Dish,
+    Menu,
     MenuBook,
     MenuBookStatus,
     ShoppingList,
     UserPreferences,
     WeekMenus,
 )
-from app.services.ai.client import GeminiClient, get_gemini_client
+from app.services.ai.admission import Priority, gemini_priority
+from app.services.ai.client import GeminiClient, discard_on_parse_error, get_gemini_client
+from app.services.ai.encoding import FULL_MENU_ENCODING
 from app.services.ai.parser import ResponseParser
 from app.services.ai.prompts import PromptBuilder
+from app.services.ai.resilience import deadline_budget
+from app.services.dish_library import DishLibrary, get_dish_library
+from app.services.ingredient_classifier import get_ingredient_classifier
+from app.services.units import parse_amount
 from app.services.validators import MenuValidator, VALID_DIFFICULTIES
 
+logger = logging.getLogger(__name__)
+
 DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
 MEALS = ("breakfast", "lunch", "dinner")
 
+# Called with a stage name and stage payload as generation progresses.
+ProgressCallback = Callable[[str, dict[str, Any]], Awaitable[None]]
+DayCallback = Callable[[str, Any], Awaitable[None]]
+
+# Continuation requests sent for days lost to a truncated Step 2 response.
+_MAX_CONTINUATIONS = 2
+
 
 class MenuService:
     """Service for generating and modifying menu books."""
 
-    def __init__(self, client: GeminiClient | None = None) -> None:
+    def __init__(
+        self,
+        client: GeminiClient | None = None,
+        fan_out_group_size: int | None = None,
+        fan_out_concurrency: int | None = None,
+        deadline_seconds: float | None = None,
+        library: DishLibrary | None = None,
+    ) -> None:
         self._client = client or get_gemini_client()
         self._parser = ResponseParser()
         self._prompts = PromptBuilder()
         self._validator = MenuValidator()
+        self._classifier = get_ingredient_classifier()
+        self._fan_out_group_size = (
+            settings.menu_fanout_group_size if fan_out_group_size is None else fan_out_group_size
+        )
+        self._fan_out_concurrency = max(
+            1,
+            settings.menu_fanout_concurrency if fan_out_concurrency is None else fan_out_concurrency,
+        )
+        self._deadline_seconds = (
+            settings.menu_generate_deadline_seconds if deadline_seconds is None else deadline_seconds
+        )
+        if library is None and settings.dish_library_enabled:
+            library = get_dish_library()
+        self._library = library
 
-    async def generate(self, preferences: UserPreferences) -> MenuBook:
+    async def generate(
+        self,
+        preferences: UserPreferences,
+        *,
+        book_id: str | None = None,
+        on_progress: ProgressCallback | None = None,
+    ) -> MenuBook:
         """Generate a new menu book based on user preferences.
 
         Args:
             preferences: User's meal planning preferences.
+            book_id: Optional ID to assign, e.g. from a placeholder book.
+            on_progress: Optional callback receiving stage events:
+                ``"outline"`` (``mealOutline``) and ``"draft_shopping_list"``
+                (``items``) after Step 1, ``"day"`` (``day``, ``menu``) as
+                each normalized day becomes available, and ``"structured"``
+                once Step 2 completes. Step 2 is streamed when set.
 
         Returns:
             Complete MenuBook with menus and placeholder shopping list.
+
+        Raises:
+            GeminiTimeoutError: When the two generation steps together
+                exceed ``menu_generate_deadline_seconds``.
         """
+        with deadline_budget(self._deadline_seconds):
+            return await self._generate(preferences, book_id=book_id, on_progress=on_progress)
+
+    async def _generate(
+        self,
+        preferences: UserPreferences,
+        *,
+        book_id: str | None,
+        on_progress: ProgressCallback | None,
+    ) -> MenuBook:
         # Step 1: Generate meal outline + draft shopping list
-        ingredient_limit = self._estimate_ingredient_limit(preferences)
-        outline_prompt = self._prompts.meal_outline(preferences, ingredient_limit)
-        outline_response = await self._client.generate_json(outline_prompt)
-        outline_payload = self._parser.parse_json(outline_response)
+        with timed_stage("outline"):
+            ingredient_limit = self._estimate_ingredient_limit(preferences)
+            outline_prompt = self._prompts.meal_outline(preferences, ingredient_limit)
+            outline_response = await self._client.generate_json(outline_prompt)
+            async with discard_on_parse_error(self._client, outline_prompt):
+                outline_payload = self._parser.parse_json(outline_response)
+
+                meal_outline = outline_payload.get("mealOutline")
+                draft_list = outline_payload.get("draftShoppingList")
+                if not isinstance(meal_outline, dict) or not isinstance(draft_list, list):
+                    raise ParseError("Invalid outline payload from AI")
+
+            normalized_list = self._normalize_draft_list(draft_list)
+
+        # Dishes the library already knows skip Step 2; only new ones are written.
+        pending_outline, pending_preferences = meal_outline, preferences
+        reused: dict[str, dict[str, list[dict]]] = {}
+        if self._library is not None:
+            with timed_stage("library"):
+                pending_outline, pending_preferences, reused = await anyio.to_thread.run_sync(
+                    self._reuse_library_dishes, meal_outline, preferences
+                )
+        pending_schedule = pending_preferences.cookSchedule.model_dump()
+        pending_days = self._scheduled_days(pending_preferences.cookSchedule)
+
+        on_day: DayCallback | None = None
+        if on_progress is not None:
+            await on_progress("outline", {"mealOutline": meal_outline})
+            await on_progress("draft_shopping_list", {"items": normalized_list})
+            schedule_map = preferences.cookSchedule.model_dump()
+
+            served_days = [day for day in DAYS if day in reused and day not in pending_days]
+
+            async def emit_day(day: str, day_data: Any) -> None:
+                day_data = self._with_reused(day_data, reused.get(day), pending_schedule[day])
+                menu = Menu(**self._normalize_day(day, day_data, schedule_map, preferences))
+                await on_progress("day", {"day": day, "menu": menu.model_dump(mode="json")})
+
+            async def on_day(day: str, day_data: Any) -> None:
+                if day not in served_days:
+                    await emit_day(day, day_data)
+
+            # Days served entirely from the library are final already.
+            for day in served_days:
+                await emit_day(day, {})
 
-        meal_outline = outline_payload.get("mealOutline")
-        draft_list = outline_payload.get("draftShoppingList")
-        if not isinstance(meal_outline, dict) or not isinstance(draft_list, list):
-            raise ParseError("Invalid outline payload from AI")
+        # Step 2: Convert outline + draft list to structured JSON
+        with timed_stage("structure"):
+            menu_data: dict[str, Any] = {}
+            if pending_days or not reused:
+                menu_data = await self._structure_menus(
+                    pending_outline, normalized_list, pending_preferences, on_day=on_day
+                )
+            if reused:
+                menu_data = {
+                    day: self._with_reused(
+                        menu_data.get(day), reused.get(day), pending_schedule[day]
+                    )
+                    for day in DAYS
+                }
+        if on_progress is not None:
+            await on_progress("structured", {})
 
-        normalized_list = self._normalize_draft_list(draft_list)
+        # Normalize and validate
+        with timed_stage("normalize"):
+            normalized = self._normalize_menus(
+                menu_data, schedule=preferences.cookSchedule, preferences=preferences
+            )
 
-        # Step 2: Convert outline + draft list to structured JSON
-        structure_prompt = self._prompts.structured_menu_from_outline(
-            meal_outline=meal_outline,
-            draft_shopping_list=normalized_list,
-            preferences=preferences,
+        book = self._build_book(
+            preferences,
+            menus=WeekMenus(**normalized),
+            book_id=book_id,
         )
-        structured_response = await self._client.generate_json(structure_prompt)
-        menu_data = self._parser.parse_json(structured_response)
+        await self._remember_dishes(book.menus)
+        return book
 
-        # Normalize and validate
-        normalized = self._normalize_menus(
-            menu_data, schedule=preferences.cookSchedule, preferences=preferences
+    def _reuse_library_dishes(
+        self, meal_outline: dict, preferences: UserPreferences
+    ) -> tuple[dict, UserPreferences, dict[str, dict[str, list[dict]]]]:
+        """Fill outline dish names from the dish library.
+
+        Returns:
+            The outline of dishes still to be written, the preferences
+            with meals served entirely from the library unscheduled, and
+            the reused dishes by day and meal, scaled to ``numPeople``.
+        """
+        self._library.refresh()
+        schedule = preferences.cookSchedule.model_dump()
+        pending_outline: dict[str, dict[str, list]] = {}
+        reused: dict[str, dict[str, list[dict]]] = {}
+        hits = misses = 0
+        for day in DAYS:
+            day_outline = meal_outline.get(day)
+            if not isinstance(day_outline, dict):
+                continue
+            pending_day: dict[str, list] = {}
+            for meal in MEALS:
+                names = day_outline.get(meal)
+                if isinstance(names, str):
+                    names = [names]
+                if not schedule[day][meal] or not isinstance(names, list) or not names:
+                    pending_day[meal] = names if isinstance(names, list) else []
+                    continue
+                pending: list = []
+                for name in names:
+                    dish = None
+                    if isinstance(name, str):
+                        dish = self._library.match(
+                            name,
+                            meal=meal,
+                            max_difficulty=preferences.difficulty,
+                            excluded=preferences.specificDisliked,
+                            preferred=preferences.specificPreferences,
+                        )
+                    if dish is None:
+                        pending.append(name)
+                        misses += 1
+                        continue
+                    hits += 1
+                    reused.setdefault(day, {}).setdefault(meal, []).append(
+                        self._scale_dish(dish, preferences.numPeople)
+                    )
+                pending_day[meal] = pending
+                if not pending:
+                    schedule[day][meal] = False
+            pending_outline[day] = pending_day
+
+        metrics = get_metrics()
+        metrics.inc("omenu_dish_library_lookups_total", hits, outcome="hit")
+        metrics.inc("omenu_dish_library_lookups_total", misses, outcome="miss")
+        if hits:
+            logger.info(f"Reusing {hits} library dishes; {misses} left for Gemini")
+        pending_preferences = preferences.model_copy(
+            update={"cookSchedule": CookSchedule(**schedule)}
+        )
+        return pending_outline, pending_preferences, reused
+
+    @staticmethod
+    def _scale_dish(dish: Dish, servings: int) -> dict:
+        """Library dish as raw menu data with quantities scaled to ``servings``."""
+        data = dish.model_dump(mode="json")
+        factor = servings / max(1, dish.servings)
+        if factor != 1:
+            for ingredient in data["ingredients"]:
+                ingredient["quantity"] = round(ingredient["quantity"] * factor, 2)
+            data["totalCalories"] = round(data["totalCalories"] * factor)
+        data["servings"] = servings
+        return data
+
+    @staticmethod
+    def _with_reused(
+        day_data: object, reused_day: dict[str, list[dict]] | None, pending: dict[str, bool]
+    ) -> object:
+        """Put reused dishes ahead of generated ones for a day's raw data.
+
+        Generated dishes are dropped for meals the library served alone.
+        """
+        if not reused_day:
+            return day_data
+        day_data = day_data if isinstance(day_data, dict) else {}
+        merged = dict(day_data)
+        for meal, dishes in reused_day.items():
+            generated = day_data.get(meal) if pending.get(meal) else None
+            if isinstance(generated, dict):
+                generated = [generated]
+            merged[meal] = dishes + (generated if isinstance(generated, list) else [])
+        return merged
+
+    async def _remember_dishes(self, menus: WeekMenus, previous: WeekMenus | None = None) -> None:
+        """Add a finished week's dishes to the dish library; failures are only logged.
+
+        With ``previous``, only dishes new or changed since that week are added.
+        """
+        if self._library is None:
+            return
+        try:
+            await anyio.to_thread.run_sync(self._library.add_menus, menus, previous)
+        except Exception:
+            logger.exception("Failed to store dishes in the dish library")
+
+    def placeholder_book(self, preferences: UserPreferences) -> MenuBook:
+        """Build an empty menu book with ``generating`` status."""
+        empty_week = WeekMenus(**{day: {} for day in DAYS})
+        return self._build_book(
+            preferences, menus=empty_week, status=MenuBookStatus.generating
         )
 
-        # Build menu book
-        book_id = f"mb_{uuid.uuid4().hex[:12]}"
+    def _build_book(
+        self,
+        preferences: UserPreferences,
+        menus: WeekMenus,
+        book_id: str | None = None,
+        status: MenuBookStatus = MenuBookStatus.ready,
+    ) -> MenuBook:
+        book_id = book_id or f"mb_{uuid.uuid4().hex[:12]}"
         created_at = datetime.now(timezone.utc)
 
         placeholder_list = ShoppingList(
@@ -80,14 +319,19 @@ class MenuService:
         return MenuBook(
             id=book_id,
             createdAt=created_at,
-            status=MenuBookStatus.ready,
+            status=status,
             preferences=preferences,
-            menus=WeekMenus(**normalized),
+            menus=menus,
             shoppingList=placeholder_list,
         )
 
     async def modify(
-        self, book_id: str, modification: str, current_book: MenuBook
+        self,
+        book_id: str,
+        modification: str,
+        current_book: MenuBook,
+        *,
+        incremental: bool | None = None,
     ) -> MenuBook:
         """Modify an existing menu book.
 
@@ -95,32 +339,289 @@ class MenuService:
             book_id: ID of the menu book to modify.
             modification: User's modification request.
             current_book: Current state of the menu book.
+            incremental: Ask Gemini for a patch of changed meal slots
+                instead of the whole week. Untouched slots keep their
+                dishes and ids. Defaults to ``settings.menu_modify_incremental``.
 
         Returns:
             Modified MenuBook.
         """
+        if incremental is None:
+            incremental = settings.menu_modify_incremental
+        if incremental:
+            with timed_stage("modify", mode="patch"), gemini_priority(Priority.interactive):
+                menus = await self._modify_with_patch(modification, current_book)
+        else:
+            with timed_stage("modify", mode="full"), gemini_priority(Priority.interactive):
+                try:
+                    decoded = await self._modify_whole_week(modification, current_book, compact=True)
+                except ParseError as e:
+                    logger.warning(f"Compact modification failed to decode ({e}); retrying verbose")
+                    record_retry("modify", "decode")
+                    decoded = await self._modify_whole_week(modification, current_book, compact=False)
+            with timed_stage("normalize"):
+                normalized = self._normalize_menus(
+                    decoded,
+                    schedule=current_book.preferences.cookSchedule,
+                    preferences=current_book.preferences,
+                )
+            menus = WeekMenus(**normalized)
+
+        await self._remember_dishes(menus, previous=current_book.menus)
+        return MenuBook(
+            id=book_id,
+            createdAt=current_book.createdAt,
+            status=MenuBookStatus.ready,
+            preferences=current_book.preferences,
+            menus=menus,
+            shoppingList=current_book.shoppingList,
+        )
+
+    async def _modify_whole_week(
+        self, modification: str, current_book: MenuBook, compact: bool
+    ) -> dict[str, dict[str, list[dict]]]:
+        """Request the whole modified week and decode it to nested dicts."""
         prompt = self._prompts.modification(
             modification=modification,
             current_menu=current_book.menus.model_dump(),
             preferences=current_book.preferences,
+            compact=compact,
         )
-
         response_text = await self._client.generate_json(prompt)
-        menu_data = self._parser.parse_json(response_text)
-        normalized = self._normalize_menus(
-            menu_data,
-            schedule=current_book.preferences.cookSchedule,
+        async with discard_on_parse_error(self._client, prompt):
+            menu_data = self._parser.parse_json(response_text)
+            if not isinstance(menu_data, dict):
+                raise ParseError("Menu data must be an object")
+            return FULL_MENU_ENCODING.decode(menu_data)
+
+    async def _modify_with_patch(
+        self, modification: str, current_book: MenuBook
+    ) -> WeekMenus:
+        """Request and apply a patch of changed meal slots."""
+        prompt = self._prompts.modification_patch(
+            modification=modification,
+            current_menu=current_book.menus.model_dump(),
             preferences=current_book.preferences,
         )
+        response_text = await self._client.generate_json(prompt)
+        async with discard_on_parse_error(self._client, prompt):
+            payload = self._parser.parse_json(response_text)
+            changes = payload.get("changes") if isinstance(payload, dict) else None
+            if not isinstance(changes, list):
+                raise ParseError("Modification patch must contain a changes array")
+            return self._apply_patch(current_book, changes)
+
+    def _apply_patch(self, current_book: MenuBook, changes: list) -> WeekMenus:
+        """Replace the patched slots, normalizing and validating only those."""
+        preferences = current_book.preferences
+        schedule_map = preferences.cookSchedule.model_dump()
+        menus = current_book.menus.model_dump()
+        for change in changes:
+            if not isinstance(change, dict):
+                continue
+            day = str(change.get("day", "")).lower()
+            meal = str(change.get("meal", "")).lower()
+            if day not in DAYS or meal not in MEALS:
+                continue
+            dishes = self._normalize_day(
+                day, {meal: change.get("dishes")}, schedule_map, preferences
+            )[meal]
+            if not all(self._validator.validate_dish(dish) for dish in dishes):
+                raise ParseError(f"Invalid dish in modification for {day} {meal}")
+            menus[day][meal] = dishes
+        return WeekMenus(**menus)
+
+    async def _structure_menus(
+        self,
+        meal_outline: dict,
+        draft_list: list[dict],
+        preferences: UserPreferences,
+        on_day: DayCallback | None = None,
+    ) -> dict:
+        """Run Step 2, either as one request or fanned out by day group.
 
-        return MenuBook(
-            id=book_id,
-            createdAt=current_book.createdAt,
-            status=MenuBookStatus.ready,
-            preferences=current_book.preferences,
-            menus=WeekMenus(**normalized),
-            shoppingList=current_book.shoppingList,
+        ``on_day`` is called with each day's raw data as soon as it is
+        available: per streamed day for a single request, or per
+        completed day of each group when fanned out.
+        """
+        groups = self._day_groups(preferences.cookSchedule)
+        if not groups:
+            return await self._structure_days(
+                meal_outline,
+                draft_list,
+                preferences,
+                days=None,
+                on_day=on_day,
+                stream=on_day is not None,
+            )
+
+        merged: dict[str, dict] = {}
+        errors: list[Exception] = []
+        limiter = anyio.CapacityLimiter(self._fan_out_concurrency)
+
+        async def structure_group(days: list[str], scope: anyio.CancelScope) -> None:
+            try:
+                async with limiter:
+                    menus = await self._structure_days(
+                        meal_outline, draft_list, preferences, days=days, on_day=on_day
+                    )
+                merged.update(menus)
+            except Exception as exc:
+                errors.append(exc)
+                scope.cancel()
+
+        async with anyio.create_task_group() as tg:
+            for days in groups:
+                tg.start_soon(structure_group, days, tg.cancel_scope)
+
+        if errors:
+            raise errors[0]
+        return merged
+
+    async def _structure_days(
+        self,
+        meal_outline: dict,
+        draft_list: list[dict],
+        preferences: UserPreferences,
+        days: list[str] | None,
+        on_day: DayCallback | None = None,
+        stream: bool = False,
+    ) -> dict[str, Any]:
+        """Structure the given days (all when None), salvaging truncation.
+
+        When Gemini stops at the token limit, every day that closed before
+        the cut-off is kept and a continuation request is sent for the
+        remaining scheduled days only, up to ``_MAX_CONTINUATIONS`` times.
+        """
+        expected = days or self._scheduled_days(preferences.cookSchedule)
+        menus: dict[str, Any] = {}
+        request_days = days
+        for attempt in range(_MAX_CONTINUATIONS + 1):
+            complete, truncated = await self._request_days(
+                meal_outline,
+                draft_list,
+                preferences,
+                request_days,
+                on_day=on_day,
+                stream=stream,
+                salvage=attempt < _MAX_CONTINUATIONS,
+            )
+            menus.update(complete)
+            missing = [day for day in expected if day not in menus]
+            if not truncated or not missing:
+                break
+            logger.warning(
+                f"Menu structuring truncated; continuing for {', '.join(missing)}"
+            )
+            record_retry("structure", "truncated")
+            request_days = missing
+        return menus
+
+    async def _request_days(
+        self,
+        meal_outline: dict,
+        draft_list: list[dict],
+        preferences: UserPreferences,
+        days: list[str] | None,
+        on_day: DayCallback | None = None,
+        stream: bool = False,
+        salvage: bool = True,
+    ) -> tuple[dict[str, Any], bool]:
+        """Send one Step 2 request.
+
+        Returns:
+            The completed days keyed by day name, and whether the response
+            was truncated (only returned when ``salvage`` is set; otherwise
+            the ``GeminiTruncatedError`` propagates).
+        """
+        prompt = self._prompts.structured_menu_from_outline(
+            meal_outline=meal_outline,
+            draft_shopping_list=draft_list,
+            preferences=preferences,
+            days=days,
         )
+        parser = self._parser.incremental()
+        menus: dict[str, Any] = {}
+        consumed = 0
+
+        async def consume(text: str) -> None:
+            nonlocal consumed
+            consumed += len(text)
+            for path, value in parser.feed(text):
+                day = self._streamed_day(path)
+                if day is None or (days is not None and day not in days):
+                    continue
+                menus[day] = value
+                if on_day is not None:
+                    await on_day(day, value)
+
+        try:
+            if stream:
+                async for chunk in self._client.generate_json_stream(prompt):
+                    await consume(chunk)
+            else:
+                # A complete response is cheaper to parse in one pass; the
+                # incremental parser is only needed to salvage truncation.
+                response_text = await self._client.generate_json(prompt)
+        except GeminiTruncatedError as exc:
+            if not salvage:
+                raise
+            # Parse whatever arrived after the last consumed chunk.
+            await consume(exc.partial_text[consumed:])
+            return menus, True
+        finally:
+            if consumed:
+                record_stage("parse", parser.parse_seconds, mode="incremental")
+
+        async with discard_on_parse_error(self._client, prompt):
+            if stream:
+                if not isinstance(parser.result(), dict):
+                    raise ParseError("Menu data must be an object")
+                return menus, False
+            data = self._parser.parse_json(response_text)
+            if not isinstance(data, dict):
+                raise ParseError("Menu data must be an object")
+        for day, value in self._response_days(data).items():
+            if days is not None and day not in days:
+                continue
+            menus[day] = value
+            if on_day is not None:
+                await on_day(day, value)
+        return menus, False
+
+    @staticmethod
+    def _response_days(data: dict[str, Any]) -> dict[str, Any]:
+        """Day objects of a parsed response, top level or under menus/days."""
+        found: dict[str, Any] = {}
+        for source in (data, data.get("menus"), data.get("days")):
+            if not isinstance(source, dict):
+                continue
+            for day in DAYS:
+                if isinstance(source.get(day), (dict, list)):
+                    found[day] = source[day]
+        return found
+
+    @staticmethod
+    def _streamed_day(path: tuple[str | int, ...]) -> str | None:
+        """Day key for a completed day object, top level or under menus/days."""
+        if len(path) == 1 or (len(path) == 2 and path[0] in ("menus", "days")):
+            if path[-1] in DAYS:
+                return path[-1]
+        return None
+
+    @staticmethod
+    def _scheduled_days(schedule: CookSchedule) -> list[str]:
+        """Days with at least one scheduled meal, in week order."""
+        schedule_map = schedule.model_dump()
+        return [day for day in DAYS if any(schedule_map.get(day, {}).values())]
+
+    def _day_groups(self, schedule: CookSchedule) -> list[list[str]]:
+        """Split scheduled days into fan-out groups; empty when fan-out is off."""
+        if self._fan_out_group_size <= 0:
+            return []
+        scheduled_days = self._scheduled_days(schedule)
+        size = self._fan_out_group_size
+        return [scheduled_days[i : i + size] for i in range(0, len(scheduled_days), size)]
 
     def _normalize_menus(
         self,
@@ -139,100 +640,106 @@ class MenuService:
             schedule_map = schedule.model_dump()
 
         for day in DAYS:
-            day_data = menus_data.get(day, {})
-            if not isinstance(day_data, dict):
-                day_data = {}
-
-            normalized_day: dict[str, list[dict]] = {}
-            for meal in MEALS:
-                if schedule_map and not schedule_map.get(day, {}).get(meal, False):
-                    normalized_day[meal] = []
-                    continue
-                value = day_data.get(meal, [])
-                if value is None:
-                    meals = []
-                elif isinstance(value, list):
-                    meals = value
-                elif isinstance(value, dict):
-                    meals = [value]
-                else:
-                    meals = []
-
-                normalized_meals: list[dict] = []
-                for index, dish in enumerate(meals):
-                    if not isinstance(dish, dict):
-                        continue
-                    name = dish.get("name")
-                    if not isinstance(name, str) or not name.strip():
-                        continue
-                    normalized_dish = dict(dish)
-                    normalized_dish["id"] = f"{day[:3]}-{meal}-{index + 1:03d}"
-                    normalized_dish["source"] = "ai"
-                    normalized_dish["name"] = name.strip()[:80]
-
-                    difficulty = str(normalized_dish.get("difficulty", "medium")).lower()
-                    if difficulty not in VALID_DIFFICULTIES:
-                        difficulty = "medium"
-                    normalized_dish["difficulty"] = difficulty
-
-                    def _coerce_int(value: object, default: int) -> int:
-                        try:
-                            return int(float(value))  # type: ignore[arg-type]
-                        except (TypeError, ValueError):
-                            return default
-
-                    normalized_dish["estimatedTime"] = max(1, _coerce_int(normalized_dish.get("estimatedTime"), 15))
-                    servings = max(1, _coerce_int(normalized_dish.get("servings"), 1))
-                    if preferences is not None:
-                        servings = preferences.numPeople
-                    normalized_dish["servings"] = servings
-                    normalized_dish["totalCalories"] = max(0, _coerce_int(normalized_dish.get("totalCalories"), 0))
-                    if not isinstance(normalized_dish.get("instructions"), str):
-                        normalized_dish["instructions"] = ""
-
-                    ingredients = normalized_dish.get("ingredients")
-                    if not isinstance(ingredients, list):
-                        ingredients = []
-                    normalized_ingredients = []
-                    for ingredient in ingredients:
-                        if not isinstance(ingredient, dict):
-                            continue
-                        ingredient_name = str(ingredient.get("name", "")).strip()
-                        if not ingredient_name:
-                            continue
-                        name_key = ingredient_name.lower()
-                        category = self._normalize_ingredient_category(
-                            ingredient.get("category"), name_key
-                        )
-                        quantity = ingredient.get("quantity", 0)
-                        try:
-                            quantity_val = float(quantity)
-                        except (TypeError, ValueError):
-                            quantity_val = 0.0
-                        unit = str(ingredient.get("unit", "")).strip()
-                        if category == "seasonings":
-                            quantity_val = 0
-                            unit = ""
-                        normalized_ingredients.append(
-                            {
-                                "name": ingredient_name[:80],
-                                "quantity": quantity_val,
-                                "unit": unit,
-                                "category": category,
-                            }
-                        )
-                    normalized_dish["ingredients"] = normalized_ingredients
-                    normalized_meals.append(normalized_dish)
-
-                normalized_day[meal] = normalized_meals
-
-            normalized[day] = normalized_day
+            normalized[day] = self._normalize_day(
+                day, menus_data.get(day, {}), schedule_map, preferences
+            )
 
         if not self._validator.validate_menus(normalized):
             raise ParseError("Invalid menu structure from AI")
 
         return normalized
 
+    def _normalize_day(
+        self,
+        day: str,
+        day_data: object,
+        schedule_map: dict | None = None,
+        preferences: UserPreferences | None = None,
+    ) -> dict[str, list[dict]]:
+        """Normalize one day's meals from AI response."""
+        if not isinstance(day_data, dict):
+            day_data = {}
+
+        normalized_day: dict[str, list[dict]] = {}
+        for meal in MEALS:
+            if schedule_map and not schedule_map.get(day, {}).get(meal, False):
+                normalized_day[meal] = []
+                continue
+            value = day_data.get(meal, [])
+            if value is None:
+                meals = []
+            elif isinstance(value, list):
+                meals = value
+            elif isinstance(value, dict):
+                meals = [value]
+            else:
+                meals = []
+
+            normalized_meals: list[dict] = []
+            for index, dish in enumerate(meals):
+                if not isinstance(dish, dict):
+                    continue
+                name = dish.get("name")
+                if not isinstance(name, str) or not name.strip():
+                    continue
+                normalized_dish = dict(dish)
+                normalized_dish["id"] = f"{day[:3]}-{meal}-{index + 1:03d}"
+                normalized_dish["source"] = "ai"
+                normalized_dish["name"] = name.strip()[:80]
+
+                difficulty = str(normalized_dish.get("difficulty", "medium")).lower()
+                if difficulty not in VALID_DIFFICULTIES:
+                    difficulty = "medium"
+                normalized_dish["difficulty"] = difficulty
+
+                def _coerce_int(value: object, default: int) -> int:
+                    try:
+                        return int(float(value))  # type: ignore[arg-type]
+                    except (TypeError, ValueError):
+                        return default
+
+                normalized_dish["estimatedTime"] = max(1, _coerce_int(normalized_dish.get("estimatedTime"), 15))
+                servings = max(1, _coerce_int(normalized_dish.get("servings"), 1))
+                if preferences is not None:
+                    servings = preferences.numPeople
+                normalized_dish["servings"] = servings
+                normalized_dish["totalCalories"] = max(0, _coerce_int(normalized_dish.get("totalCalories"), 0))
+                if not isinstance(normalized_dish.get("instructions"), str):
+                    normalized_dish["instructions"] = ""
+
+                ingredients = normalized_dish.get("ingredients")
+                if not isinstance(ingredients, list):
+                    ingredients = []
+                normalized_ingredients = []
+                for ingredient in ingredients:
+                    if not isinstance(ingredient, dict):
+                        continue
+                    ingredient_name = str(ingredient.get("name", "")).strip()
+                    if not ingredient_name:
+                        continue
+                    category = self._classifier.classify(
+                        ingredient_name, ingredient.get("category")
+                    )
+                    quantity_val, parsed_unit = parse_amount(ingredient.get("quantity", 0))
+                    unit = str(ingredient.get("unit") or "").strip() or parsed_unit
+                    if category == "seasonings":
+                        quantity_val = 0
+                        unit = ""
+                    normalized_ingredients.append(
+                        {
+                            "name": ingredient_name[:80],
+                            "quantity": quantity_val,
+                            "unit": unit,
+                            "category": category,
+                        }
+                    )
+                normalized_dish["ingredients"] = normalized_ingredients
+                normalized_meals.append(normalized_dish)
+
+            normalized_day[meal] = normalized_meals
+
+        return normalized_day
+
     def _estimate_ingredient_limit(self, preferences: UserPreferences) -> int:
         schedule_map = preferences.cookSchedule.model_dump()
         planned_meals = sum(
@@ -244,162 +751,9 @@ class MenuService:
         limit = round(base * meal_factor * people_factor)
         return max(12, min(36, limit))
 
-    def _normalize_ingredient_category(self, raw_category: str | None, name_key: str) -> str:
-        fresh_overrides = (
-            "green bean",
-            "green beans",
-            "green onion",
-            "scallion",
-            "spring onion",
-            "onion",
-            "garlic",
-            "shallot",
-            "leek",
-        )
-        if any(keyword in name_key for keyword in fresh_overrides) and "powder" not in name_key:
-            return "vegetables"
-
-        pantry_keywords = (
-            "rice",
-            "pasta",
-            "spaghetti",
-            "penne",
-            "noodle",
-            "noodles",
-            "ramen",
-            "udon",
-            "soba",
-            "couscous",
-            "quinoa",
-            "bulgur",
-            "barley",
-            "flour",
-            "all-purpose flour",
-            "bread flour",
-            "cornmeal",
-            "breadcrumbs",
-            "panko",
-            "oats",
-            "oatmeal",
-            "rolled oats",
-            "bread",
-            "bagel",
-            "tortilla",
-            "pita",
-            "wrap",
-            "canned beans",
-            "black beans",
-            "kidney beans",
-            "pinto beans",
-            "white beans",
-            "navy beans",
-            "garbanzo beans",
-            "chickpeas",
-            "lentils",
-            "tomato sauce",
-            "canned tomatoes",
-            "tomato paste",
-            "diced tomatoes",
-            "crushed tomatoes",
-            "marinara",
-            "salsa",
-            "stock",
-            "broth",
-            "vegetable broth",
-            "chicken broth",
-            "beef broth",
-            "coconut milk",
-            "peanut butter",
-            "honey",
-            "sugar",
-            "brown sugar",
-            "maple syrup",
-            "jam",
-            "jelly",
-            "mustard",
-            "ketchup",
-            "mayonnaise",
-            "hot sauce",
-            "sriracha",
-            "bbq sauce",
-            "canned corn",
-            "canned tuna",
-            "tuna",
-            "canned salmon",
-            "salmon",
-            "beans",
-        )
-        seasoning_keywords = (
-            "salt",
-            "pepper",
-            "oil",
-            "olive oil",
-            "vegetable oil",
-            "canola oil",
-            "avocado oil",
-            "sesame oil",
-            "coconut oil",
-            "butter",
-            "ghee",
-            "soy sauce",
-            "vinegar",
-            "balsamic vinegar",
-            "rice vinegar",
-            "apple cider vinegar",
-            "white vinegar",
-            "red wine vinegar",
-            "fish sauce",
-            "oyster sauce",
-            "hoisin",
-            "teriyaki",
-            "miso",
-            "garlic powder",
-            "onion powder",
-            "paprika",
-            "cumin",
-            "chili powder",
-            "cayenne",
-            "chili flakes",
-            "oregano",
-            "basil",
-            "thyme",
-            "rosemary",
-            "cinnamon",
-            "nutmeg",
-            "ginger",
-            "ground ginger",
-            "turmeric",
-            "curry powder",
-            "five spice",
-            "italian seasoning",
-            "bay leaf",
-            "vanilla",
-            "vanilla extract",
-            "lemon juice",
-            "lime juice",
-            "garlic powder",
-            "onion powder",
-        )
-        if any(keyword in name_key for keyword in pantry_keywords):
-            return "pantry_staples"
-        if any(keyword in name_key for keyword in seasoning_keywords):
-            return "seasonings"
-        if raw_category in {
-            "proteins",
-            "vegetables",
-            "fruits",
-            "grains",
-            "dairy",
-            "seasonings",
-            "pantry_staples",
-            "others",
-        }:
-            return raw_category
-        return "others"
-
     def _normalize_draft_list(self, draft_list: list[dict]) -> list[dict]:
         seen: set[str] = set()
-        normalized: list[dict] = []
+        entries: list[tuple[str, str | None]] = []
         for item in draft_list:
             if not isinstance(item, dict):
                 continue
@@ -410,10 +764,12 @@ class MenuService:
             if key in seen:
                 continue
             seen.add(key)
-            raw_category = item.get("category", "others")
-            category = self._normalize_ingredient_category(raw_category, key)
-            normalized.append({"name": name, "category": category})
-        return normalized
+            entries.append((name, item.get("category", "others")))
+        categories = self._classifier.classify_many(entries)
+        return [
+            {"name": name, "category": category}
+            for (name, _), category in zip(entries, categories)
+        ]
 
 
 def get_menu_service() -> MenuService:
@@ -0,0 +1,212 @@
+"""Speculative off-peak precomputation of users' next menu books."""
+
+import hashlib
+import logging
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+import anyio
+from anyio.abc import TaskGroup
+
+from app.core.config import settings
+from app.core.exceptions import AppException
+from app.core.metrics import get_metrics
+from app.models import MenuBook, PrecomputedMenuBook, UserPreferences
+from app.repositories import (
+    DEFAULT_USER_ID,
+    AsyncUserStateRepository,
+    PrecomputedMenuBookRepository,
+    get_async_user_state_repository,
+    get_precomputed_menu_book_repository,
+)
+from app.services.ai.admission import Priority, gemini_priority
+from app.services.menu_service import MenuService, get_menu_service
+from app.services.shopping_service import ShoppingService, get_shopping_service
+
+logger = logging.getLogger(__name__)
+
+# How often the scheduler checks whether the off-peak window has opened
+_CHECK_INTERVAL_SECONDS = 600.0
+
+
+def preferences_digest(preferences: UserPreferences) -> str:
+    """Stable digest of the preferences a menu book is generated from."""
+    return hashlib.sha256(preferences.model_dump_json().encode("utf-8")).hexdigest()
+
+
+def week_start(moment: datetime) -> date:
+    """Monday of the server-local week containing ``moment``."""
+    day = moment.astimezone().date()
+    return day - timedelta(days=day.weekday())
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MenuBookPrecomputer:
+    """Generates next week's menu books ahead of time for active users.
+
+    While the off-peak window is open, every user with saved preferences
+    who loaded their state, generated a book or saved within
+    ``active_days``, and has no book for next week, gets one generated at
+    background priority, shopping list included.
+    Each (user, week, preferences) is claimed across worker processes
+    first, so it is generated once however many workers run a scheduler.
+    ``take`` hands the book out the next time that user asks for one with
+    the same preferences during the current or the target week; a book
+    built from other preferences, or for another week, is discarded.
+    """
+
+    def __init__(
+        self,
+        repository: PrecomputedMenuBookRepository | None = None,
+        user_state: AsyncUserStateRepository | None = None,
+        service_factory: Callable[[], MenuService] = get_menu_service,
+        shopping_factory: Callable[[], ShoppingService] = get_shopping_service,
+        enabled: bool | None = None,
+        start_hour: int | None = None,
+        end_hour: int | None = None,
+        active_days: float | None = None,
+        clock: Callable[[], datetime] = _now,
+    ) -> None:
+        self._repository = repository or get_precomputed_menu_book_repository()
+        self._user_state = user_state or get_async_user_state_repository()
+        self._service_factory = service_factory
+        self._shopping_factory = shopping_factory
+        self._enabled = settings.menu_precompute_enabled if enabled is None else enabled
+        self._start_hour = (
+            settings.menu_precompute_start_hour if start_hour is None else start_hour
+        ) % 24
+        self._end_hour = (settings.menu_precompute_end_hour if end_hour is None else end_hour) % 24
+        self._active_window = timedelta(
+            days=settings.menu_precompute_active_days if active_days is None else active_days
+        )
+        self._clock = clock
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    async def start(self, task_group: TaskGroup) -> None:
+        """Start the off-peak scheduler when precomputation is enabled."""
+        if self._enabled:
+            task_group.start_soon(self._scheduler)
+
+    def in_off_peak(self, moment: datetime) -> bool:
+        """Whether ``moment`` falls in the off-peak window, in server-local time."""
+        hour = moment.astimezone().hour
+        if self._start_hour <= self._end_hour:
+            return self._start_hour <= hour < self._end_hour
+        return hour >= self._start_hour or hour < self._end_hour
+
+    async def run_once(self) -> int:
+        """Precompute next week's book for active users lacking one; return how many."""
+        metrics = get_metrics()
+        now = self._clock()
+        target_week = week_start(now) + timedelta(weeks=1)
+        active_since = (now - self._active_window).timestamp()
+        generated = 0
+        for user_id, preferences in await self._user_state.list_user_preferences(active_since):
+            digest = preferences_digest(preferences)
+            existing = await anyio.to_thread.run_sync(self._repository.get, user_id)
+            if (
+                existing is not None
+                and existing.preferencesDigest == digest
+                and existing.weekStart == target_week
+            ):
+                continue
+            claimed = await anyio.to_thread.run_sync(
+                self._repository.claim, user_id, target_week, digest
+            )
+            if not claimed:
+                continue
+            try:
+                book = await self._precompute(preferences)
+            except AppException as exc:
+                logger.warning(f"Precomputing a menu book for {user_id} failed: {exc.message}")
+                metrics.inc("omenu_precompute_total", outcome="failed")
+                await anyio.to_thread.run_sync(
+                    self._repository.release_claim, user_id, target_week, digest
+                )
+                continue
+            except BaseException:
+                # Cancelled or crashed: let the next pass (or worker) retry.
+                # Released synchronously: awaiting a thread inside a
+                # cancelled scope would be cancelled too and leak the claim.
+                self._repository.release_claim(user_id, target_week, digest)
+                raise
+            await anyio.to_thread.run_sync(
+                self._repository.save,
+                PrecomputedMenuBook(
+                    userId=user_id,
+                    preferencesDigest=digest,
+                    weekStart=target_week,
+                    menuBook=book,
+                    createdAt=now,
+                ),
+            )
+            await anyio.to_thread.run_sync(
+                self._repository.complete_claim, user_id, target_week, digest
+            )
+            metrics.inc("omenu_precompute_total", outcome="generated")
+            generated += 1
+        if generated:
+            logger.info(f"Precomputed menu books for {generated} user(s)")
+        return generated
+
+    async def take(
+        self, preferences: UserPreferences, user_id: str = DEFAULT_USER_ID
+    ) -> MenuBook | None:
+        """Claim the user's precomputed book if it matches ``preferences``.
+
+        The stored book is removed either way, so it is served at most
+        once. The returned book is dated now, as if generated on request.
+        """
+        if not self._enabled:
+            return None
+        metrics = get_metrics()
+        precomputed = await anyio.to_thread.run_sync(self._repository.take, user_id)
+        if precomputed is None:
+            metrics.inc("omenu_precompute_served_total", outcome="miss")
+            return None
+        if precomputed.preferencesDigest != preferences_digest(preferences):
+            logger.info(f"Discarding precomputed menu book for {user_id}: preferences changed")
+            metrics.inc("omenu_precompute_served_total", outcome="discarded")
+            return None
+        current_week = week_start(self._clock())
+        if precomputed.weekStart not in (current_week, current_week + timedelta(weeks=1)):
+            metrics.inc("omenu_precompute_served_total", outcome="expired")
+            return None
+
+        metrics.inc("omenu_precompute_served_total", outcome="hit")
+        now = self._clock()
+        book = precomputed.menuBook
+        return book.model_copy(
+            update={
+                "createdAt": now,
+                "shoppingList": book.shoppingList.model_copy(update={"createdAt": now}),
+            }
+        )
+
+    async def _precompute(self, preferences: UserPreferences) -> MenuBook:
+        with gemini_priority(Priority.background):
+            book = await self._service_factory().generate(preferences)
+            shopping_list = await self._shopping_factory().generate(book.id, book.menus)
+        return book.model_copy(update={"shoppingList": shopping_list})
+
+    async def _scheduler(self) -> None:
+        while True:
+            if self.in_off_peak(self._clock()):
+                try:
+                    await self.run_once()
+                except Exception:
+                    logger.exception("Menu book precomputation pass failed")
+            await anyio.sleep(_CHECK_INTERVAL_SECONDS)
+
+
+@lru_cache
+def get_menu_book_precomputer() -> MenuBookPrecomputer:
+    """Get the process-wide menu book precomputer."""
+    return MenuBookPrecomputer()
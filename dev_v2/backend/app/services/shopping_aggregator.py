@@ -0,0 +1,213 @@
+"""Local shopping list aggregation from structured weekly menus."""
+
+import math
+import re
+import uuid
+from collections import Counter, OrderedDict
+
+from app.models import ShoppingItem, WeekMenus
+from app.services.ingredient_classifier import IngredientClassifier, get_ingredient_classifier
+from app.services.units import (
+    BUNCH,
+    COUNT,
+    MASS,
+    UNITS,
+    VOLUME,
+    convert_batch,
+    normalize_unit,
+    parse_quantity,
+)
+
+# Names that refer to the same grocery item.
+NAME_SYNONYMS = {
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "garbanzo bean": "chickpea",
+    "coriander leaf": "cilantro",
+    "capsicum": "bell pepper",
+    "aubergine": "eggplant",
+    "courgette": "zucchini",
+    "prawn": "shrimp",
+    "minced beef": "ground beef",
+    "beef mince": "ground beef",
+}
+
+_GRAMS_PER_POUND = UNITS["lb"][1]
+_GRAMS_PER_OUNCE = UNITS["oz"][1]
+_ML_PER_CUP = UNITS["cup"][1]
+_ML_PER_TBSP = UNITS["tbsp"][1]
+
+# Base unit of each dimension, used as the summing unit.
+_BASE_UNITS = {MASS: "g", VOLUME: "ml", COUNT: "count", BUNCH: "bunch"}
+
+_NON_PLURAL_ENDINGS = ("ss", "us", "is", "ous")
+
+
+def singularize(word: str) -> str:
+    """Best-effort English singular form of a grocery noun."""
+    if len(word) <= 3 or word.endswith(_NON_PLURAL_ENDINGS):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+_NON_WORD = re.compile(r"[^\w\s-]|_")
+
+
+def canonical_name(name: str) -> str:
+    """Canonical key used to merge ingredient names across dishes.
+
+    Letters of any script are kept; a name made only of punctuation keys
+    on its stripped text so it is never dropped.
+    """
+    words = _NON_WORD.sub(" ", name.casefold()).split()
+    if not words:
+        return name.strip().casefold()
+    words[-1] = singularize(words[-1])
+    key = " ".join(words)
+    return NAME_SYNONYMS.get(key, key)
+
+
+class ShoppingAggregator:
+    """Sums a week's ingredients into shopping items without calling Gemini.
+
+    Ingredients are merged by canonical name, converted to a common unit
+    and summed, then rendered in North American units: mass as lbs (or
+    oz under a pound), volume as cups (or tbsp under a quarter cup), and
+    count/bunch as whole numbers. Lines in different dimensions convert
+    through the density and piece-weight tables of ``app.services.units``.
+    Seasonings keep quantity 0 and no unit, as the shopping prompt asks.
+    A name whose lines cannot be converted to one unit is left unresolved.
+    """
+
+    def __init__(self, classifier: IngredientClassifier | None = None) -> None:
+        self._classifier = classifier or get_ingredient_classifier()
+
+    def aggregate(
+        self, menus: WeekMenus
+    ) -> tuple[list[ShoppingItem], list[list[dict]]]:
+        """Aggregate all dish ingredients of a week.
+
+        Returns:
+            The merged shopping items, and for each name that could not
+            be reconciled to a single unit, its ingredient rows
+            (``name``, ``quantity``, ``unit``, ``category``).
+        """
+        items: list[ShoppingItem] = []
+        unresolved: list[list[dict]] = []
+        for rows in self.group(menus).values():
+            item = self._merge(rows)
+            if item is None:
+                unresolved.append(rows)
+            else:
+                items.append(item)
+        return items, unresolved
+
+    def group(self, menus: WeekMenus) -> OrderedDict[str, list[dict]]:
+        """Collect the week's ingredient rows by canonical name, in menu order."""
+        groups: OrderedDict[str, list[dict]] = OrderedDict()
+        for day_menu in menus.model_dump(mode="json").values():
+            for dishes in day_menu.values():
+                for dish in dishes or []:
+                    for ingredient in dish.get("ingredients", []):
+                        key = canonical_name(ingredient["name"])
+                        if key:
+                            groups.setdefault(key, []).append(ingredient)
+        return groups
+
+    def items_for(self, rows: list[dict]) -> list[ShoppingItem]:
+        """Shopping items for one name's rows: merged, or one per unit if irreconcilable."""
+        item = self._merge(rows)
+        return [item] if item is not None else self.split(rows)
+
+    def split(self, rows: list[dict]) -> list[ShoppingItem]:
+        """Render unresolved rows of one name as one item per unit dimension."""
+        name = rows[0]["name"].strip()[:50]
+        category = self._classifier.classify(name, rows[0]["category"])
+        by_dimension: OrderedDict[str, list[dict]] = OrderedDict()
+        for row in rows:
+            by_dimension.setdefault(self._dimension(row), []).append(row)
+
+        items = []
+        for dimension, dimension_rows in by_dimension.items():
+            total = self._total(dimension_rows, dimension, ingredient=None)
+            quantity, unit = self._to_target_unit(dimension, total or 0.0)
+            items.append(self._item(name, category, quantity, unit))
+        return items
+
+    def _merge(self, rows: list[dict]) -> ShoppingItem | None:
+        name = rows[0]["name"].strip()[:50]
+        category = self._classifier.classify(name, rows[0]["category"])
+        if category == "seasonings":
+            return self._item(name, category, 0, "")
+
+        dimension = self._target_dimension(category, rows)
+        total = self._total(rows, dimension, ingredient=canonical_name(name))
+        if total is None:
+            return None
+        quantity, unit = self._to_target_unit(dimension, total)
+        return self._item(name, category, quantity, unit)
+
+    @staticmethod
+    def _dimension(row: dict) -> str:
+        unit = normalize_unit(str(row.get("unit") or ""))
+        return UNITS[unit][0] if unit in UNITS else unit
+
+    def _target_dimension(self, category: str, rows: list[dict]) -> str:
+        """Pick the dimension a name's rows are summed in.
+
+        The only dimension used wins; otherwise proteins are weighed,
+        counted produce stays counted, and anything else uses its most
+        common dimension.
+        """
+        dimensions = Counter(self._dimension(row) for row in rows)
+        if len(dimensions) == 1:
+            return next(iter(dimensions))
+        if category == "proteins" and MASS in dimensions:
+            return MASS
+        if category in ("vegetables", "fruits") and COUNT in dimensions:
+            return COUNT
+        return dimensions.most_common(1)[0][0]
+
+    @staticmethod
+    def _total(rows: list[dict], dimension: str, ingredient: str | None) -> float | None:
+        """Sum rows in the base unit of ``dimension``; None if any row cannot convert."""
+        amounts = convert_batch(
+            [parse_quantity(row.get("quantity")) for row in rows],
+            [str(row.get("unit") or "") for row in rows],
+            _BASE_UNITS.get(dimension, dimension),
+            ingredient,
+        )
+        if any(amount is None for amount in amounts):
+            return None
+        return sum(amounts)
+
+    @staticmethod
+    def _to_target_unit(dimension: str, total: float) -> tuple[float, str]:
+        if dimension == MASS:
+            if total >= _GRAMS_PER_POUND:
+                return round(total / _GRAMS_PER_POUND, 1), "lbs"
+            return round(total / _GRAMS_PER_OUNCE, 1), "oz"
+        if dimension == VOLUME:
+            if total >= _ML_PER_CUP / 4:
+                return round(total / _ML_PER_CUP, 1), "cups"
+            return round(total / _ML_PER_TBSP, 1), "tbsp"
+        if dimension in (COUNT, BUNCH):
+            # Round off float noise first, so 7.000000000000001 pieces buys 7, not 8.
+            return float(math.ceil(round(total, 6))), dimension
+        return round(total, 1), dimension
+
+    @staticmethod
+    def _item(name: str, category: str, quantity: float, unit: str) -> ShoppingItem:
+        return ShoppingItem(
+            id=f"item_{uuid.uuid4().hex[:8]}",
+            name=name,
+            category=category,
+            totalQuantity=quantity,
+            unit=unit,
+        )
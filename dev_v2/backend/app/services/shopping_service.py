@@ -1,28 +1,47 @@
 """Shopping list generation service."""
 
+import logging
 import uuid
 from datetime import datetime, timezone
 
-from app.core.exceptions import ParseError
+from app.core.config import settings
+from app.core.exceptions import AppException, ParseError
+from app.core.metrics import timed_stage
 from app.models import ShoppingItem, ShoppingList, WeekMenus
-from app.services.ai.client import GeminiClient, get_gemini_client
+from app.services.ai.client import GeminiClient, discard_on_parse_error, get_gemini_client
 from app.services.ai.parser import ResponseParser
 from app.services.ai.prompts import PromptBuilder
+from app.services.shopping_aggregator import ShoppingAggregator, canonical_name
 from app.services.validators import ShoppingValidator
 
+logger = logging.getLogger(__name__)
+
 
 class ShoppingService:
     """Service for generating shopping lists from menus."""
 
-    def __init__(self, client: GeminiClient | None = None) -> None:
+    def __init__(
+        self,
+        client: GeminiClient | None = None,
+        aggregator: ShoppingAggregator | None = None,
+        llm_fallback: bool | None = None,
+    ) -> None:
         self._client = client or get_gemini_client()
         self._parser = ResponseParser()
         self._prompts = PromptBuilder()
         self._validator = ShoppingValidator()
+        self._aggregator = aggregator or ShoppingAggregator()
+        self._llm_fallback = (
+            settings.shopping_llm_fallback if llm_fallback is None else llm_fallback
+        )
 
     async def generate(self, menu_book_id: str, menus: WeekMenus) -> ShoppingList:
         """Generate a shopping list from weekly menus.
 
+        Quantities are summed locally. Only ingredients whose units cannot
+        be reconciled are sent to Gemini, and only when the LLM fallback
+        is enabled; otherwise they are listed once per unit.
+
         Args:
             menu_book_id: ID of the associated menu book.
             menus: Weekly menus to extract ingredients from.
@@ -30,14 +49,132 @@ class ShoppingService:
         Returns:
             Consolidated ShoppingList.
         """
-        prompt = self._prompts.shopping_list(menus)
+        with timed_stage("shopping_aggregate"):
+            items, unresolved = self._aggregator.aggregate(menus)
+        if unresolved:
+            with timed_stage("shopping_reconcile"):
+                items.extend(await self._reconcile(unresolved))
+
+        return ShoppingList(
+            id=f"sl_{uuid.uuid4().hex[:12]}",
+            menuBookId=menu_book_id,
+            createdAt=datetime.now(timezone.utc),
+            items=items,
+        )
+
+    def update(
+        self,
+        shopping_list: ShoppingList,
+        previous_menus: WeekMenus,
+        menus: WeekMenus,
+    ) -> ShoppingList:
+        """Apply the ingredient changes between two versions of a week to a list.
+
+        Only names whose ingredient rows changed are touched: their items
+        get new quantities (keeping id, name, ``purchased`` and
+        ``isManuallyAdded``), are removed when no dish needs them any more,
+        or are added when new. A new item whose name matches a manually
+        added one is merged into that row instead, which keeps its
+        ``purchased`` and ``isManuallyAdded`` flags; manual items are
+        otherwise never changed or removed. No Gemini call is made.
+
+        Args:
+            shopping_list: The list generated for ``previous_menus``.
+            previous_menus: Menus before the modification.
+            menus: Menus after the modification.
+
+        Returns:
+            The updated ShoppingList with the same id.
+        """
+        with timed_stage("shopping_update"):
+            return self._update(shopping_list, previous_menus, menus)
+
+    def _update(
+        self,
+        shopping_list: ShoppingList,
+        previous_menus: WeekMenus,
+        menus: WeekMenus,
+    ) -> ShoppingList:
+        old_groups = self._aggregator.group(previous_menus)
+        new_groups = self._aggregator.group(menus)
+        keys = list(old_groups) + [key for key in new_groups if key not in old_groups]
+        changed = [
+            key
+            for key in keys
+            if self._rows_signature(old_groups.get(key))
+            != self._rows_signature(new_groups.get(key))
+        ]
+
+        items = list(shopping_list.items)
+        removed: set[int] = set()
+        added: list[ShoppingItem] = []
+        for key in changed:
+            existing = [
+                index
+                for index, item in enumerate(items)
+                if not item.isManuallyAdded and canonical_name(item.name) == key
+            ]
+            manual = [
+                index
+                for index, item in enumerate(items)
+                if item.isManuallyAdded and canonical_name(item.name) == key
+            ]
+            replacements = (
+                self._aggregator.items_for(new_groups[key]) if key in new_groups else []
+            )
+            for index, replacement in zip(existing, replacements):
+                items[index] = items[index].model_copy(
+                    update={
+                        "category": replacement.category,
+                        "totalQuantity": replacement.totalQuantity,
+                        "unit": replacement.unit,
+                    }
+                )
+            removed.update(existing[len(replacements) :])
+            new_items = replacements[len(existing) :]
+            for index, new_item in zip(manual, new_items):
+                items[index] = self._merge_into_manual(items[index], new_item)
+            added.extend(new_items[len(manual) :])
+
+        kept = [item for index, item in enumerate(items) if index not in removed]
+        return shopping_list.model_copy(update={"items": kept + added})
+
+    @staticmethod
+    def _merge_into_manual(manual: ShoppingItem, generated: ShoppingItem) -> ShoppingItem:
+        """Make a manual item cover what the menus need, keeping its name and flags."""
+        if manual.unit == generated.unit:
+            quantity = max(manual.totalQuantity, generated.totalQuantity)
+            return manual.model_copy(update={"totalQuantity": quantity})
+        return manual.model_copy(
+            update={"totalQuantity": generated.totalQuantity, "unit": generated.unit}
+        )
+
+    @staticmethod
+    def _rows_signature(rows: list[dict] | None) -> list[tuple[str, float, str]]:
+        return sorted(
+            (row["name"].strip().lower(), row["quantity"], row["unit"]) for row in rows or []
+        )
+
+    async def _reconcile(self, groups: list[list[dict]]) -> list[ShoppingItem]:
+        """Merge ingredient groups the local aggregator could not."""
+        if self._llm_fallback:
+            rows = [row for group in groups for row in group]
+            try:
+                return await self._generate_with_llm(rows)
+            except AppException as exc:
+                logger.warning(f"Shopping list LLM fallback failed: {exc.message}")
+        return [item for group in groups for item in self._aggregator.split(group)]
+
+    async def _generate_with_llm(self, ingredients: list[dict]) -> list[ShoppingItem]:
+        prompt = self._prompts.shopping_list_from_ingredients(ingredients)
         response_text = await self._client.generate_json(prompt)
-        data = self._parser.parse_json(response_text)
+        async with discard_on_parse_error(self._client, prompt):
+            data = self._parser.parse_json(response_text)
 
-        # Validate and build items
-        raw_items = data.get("items", [])
-        if not isinstance(raw_items, list):
-            raise ParseError("Shopping list items must be an array")
+            # Validate and build items
+            raw_items = data.get("items", [])
+            if not isinstance(raw_items, list):
+                raise ParseError("Shopping list items must be an array")
 
         items = []
         for idx, raw_item in enumerate(raw_items):
@@ -47,13 +184,7 @@ class ShoppingService:
             item_data = self._validator.normalize_item(raw_item, idx)
             if item_data:
                 items.append(ShoppingItem(**item_data))
-
-        return ShoppingList(
-            id=f"sl_{uuid.uuid4().hex[:12]}",
-            menuBookId=menu_book_id,
-            createdAt=datetime.now(timezone.utc),
-            items=items,
-        )
+        return items
 
 
 def get_shopping_service() -> ShoppingService:
@@ -0,0 +1,279 @@
+"""Ingredient quantity parsing and unit conversion."""
+
+import re
+import unicodedata
+from collections.abc import Sequence
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+BUNCH = "bunch"
+
+# Canonical unit -> (dimension, factor to the dimension's base unit: g, ml or 1).
+UNITS: dict[str, tuple[str, float]] = {
+    "g": (MASS, 1.0),
+    "kg": (MASS, 1000.0),
+    "oz": (MASS, 28.349523125),
+    "lb": (MASS, 453.59237),
+    "ml": (VOLUME, 1.0),
+    "l": (VOLUME, 1000.0),
+    "tsp": (VOLUME, 4.92892159375),
+    "tbsp": (VOLUME, 14.78676478125),
+    "cup": (VOLUME, 236.5882365),
+    "fl oz": (VOLUME, 29.5735295625),
+    "pint": (VOLUME, 473.176473),
+    "quart": (VOLUME, 946.352946),
+    "gallon": (VOLUME, 3785.411784),
+    "count": (COUNT, 1.0),
+    "dozen": (COUNT, 12.0),
+    "bunch": (BUNCH, 1.0),
+}
+
+_UNIT_ALIASES = {
+    "gram": "g",
+    "gr": "g",
+    "kilogram": "kg",
+    "kilo": "kg",
+    "ounce": "oz",
+    "pound": "lb",
+    "lbs": "lb",
+    "milliliter": "ml",
+    "millilitre": "ml",
+    "liter": "l",
+    "litre": "l",
+    "teaspoon": "tsp",
+    "tablespoon": "tbsp",
+    "tbs": "tbsp",
+    "tbl": "tbsp",
+    "fluid ounce": "fl oz",
+    "pt": "pint",
+    "qt": "quart",
+    "gal": "gallon",
+    "": "count",
+    "piece": "count",
+    "pc": "count",
+    "pcs": "count",
+    "whole": "count",
+    "each": "count",
+    "ea": "count",
+    "unit": "count",
+    "item": "count",
+}
+
+# Grams per millilitre for ingredients commonly measured by volume.
+DENSITIES = {
+    "water": 1.0,
+    "milk": 1.03,
+    "cream": 1.01,
+    "yogurt": 1.03,
+    "broth": 1.0,
+    "stock": 1.0,
+    "oil": 0.92,
+    "butter": 0.96,
+    "honey": 1.42,
+    "maple syrup": 1.32,
+    "soy sauce": 1.2,
+    "flour": 0.53,
+    "sugar": 0.85,
+    "brown sugar": 0.93,
+    "rice": 0.85,
+    "oat": 0.41,
+    "quinoa": 0.72,
+    "lentil": 0.81,
+    "cheese": 0.45,
+    "spinach": 0.13,
+    "pea": 0.61,
+    "corn": 0.69,
+}
+
+# Typical grams per piece for ingredients commonly counted.
+PIECE_WEIGHTS = {
+    "egg": 50.0,
+    "onion": 150.0,
+    "red onion": 150.0,
+    "potato": 210.0,
+    "sweet potato": 180.0,
+    "carrot": 60.0,
+    "tomato": 120.0,
+    "bell pepper": 160.0,
+    "zucchini": 200.0,
+    "cucumber": 300.0,
+    "apple": 180.0,
+    "banana": 120.0,
+    "lemon": 100.0,
+    "lime": 65.0,
+    "avocado": 170.0,
+    "garlic clove": 5.0,
+    "chicken breast": 230.0,
+    "chicken thigh": 110.0,
+}
+
+_UNICODE_FRACTION = re.compile(r"(\d)?\s*([¼-¾⅐-⅞])")
+_AMOUNT = re.compile(
+    r"(?:(\d+)\s+(\d+)\s*/\s*(\d+)|(\d+)\s*/\s*(\d+)|(\d+(?:\.\d+)?|\.\d+))"
+    r"(?:\s*(?:-|to)\s*(?:\d+(?:\.\d+)?))?\s*(.*)$"
+)
+
+
+def _fold_fractions(text: str) -> str:
+    def replace(match: re.Match) -> str:
+        whole, fraction = match.group(1), match.group(2)
+        value = unicodedata.numeric(fraction)
+        return f"{(int(whole) if whole else 0) + value:g}"
+
+    return _UNICODE_FRACTION.sub(replace, text)
+
+
+def normalize_unit(unit: str) -> str:
+    """Map a unit spelling (``"Cups"``, ``"tbsp."``, ``"pieces"``) to its canonical key.
+
+    Unknown units are returned lowercased and singularized so equal
+    spellings still compare equal (e.g. ``"cans"`` -> ``"can"``).
+    """
+    key = " ".join(unit.strip().lower().replace(".", " ").split())
+    for candidate in (key, key[:-2] if key.endswith("es") else key, key.rstrip("s")):
+        if candidate in UNITS:
+            return candidate
+        if candidate in _UNIT_ALIASES:
+            return _UNIT_ALIASES[candidate]
+    if key.endswith(("ches", "shes", "sses", "xes")):
+        return key[:-2]
+    if key.endswith("s") and not key.endswith("ss") and len(key) > 3:
+        return key[:-1]
+    return key
+
+
+def unit_dimension(unit: str) -> str | None:
+    """Dimension of a unit, or None when the unit is not known."""
+    entry = UNITS.get(normalize_unit(unit))
+    return entry[0] if entry else None
+
+
+def parse_amount(value: object) -> tuple[float, str]:
+    """Split an amount like ``"1 1/2 cups"`` into ``(1.5, "cup")``.
+
+    Leading words are skipped (``"about 2 lbs"``) and ranges
+    (``"2-3 cloves"``) use their lower bound. Values without a number
+    parse as ``(0.0, unit)``.
+    """
+    if isinstance(value, bool):
+        return 0.0, ""
+    if isinstance(value, (int, float)):
+        return float(value), ""
+    if not isinstance(value, str):
+        return 0.0, ""
+
+    match = _AMOUNT.search(_fold_fractions(value))
+    if match is None:
+        return 0.0, normalize_unit(value) if value.strip() else ""
+    mixed_whole, mixed_num, mixed_den, num, den, decimal, rest = match.groups()
+    if mixed_whole is not None:
+        quantity = int(mixed_whole) + _fraction(mixed_num, mixed_den)
+    elif num is not None:
+        quantity = _fraction(num, den)
+    else:
+        quantity = float(decimal)
+    unit = normalize_unit(rest) if rest.strip() else ""
+    return quantity, unit
+
+
+def parse_quantity(value: object, default: float = 0.0) -> float:
+    """Parse a numeric quantity from a number or a string like ``"1 1/2"``."""
+    if isinstance(value, str) and not value.strip():
+        return default
+    quantity, _ = parse_amount(value)
+    if quantity == 0.0 and not isinstance(value, (int, float)):
+        return default
+    return quantity
+
+
+def _fraction(numerator: str, denominator: str) -> float:
+    den = int(denominator)
+    return int(numerator) / den if den else 0.0
+
+
+def density(ingredient: str) -> float | None:
+    """Grams per millilitre for a canonical ingredient name, if known."""
+    return _lookup(DENSITIES, ingredient)
+
+
+def piece_weight(ingredient: str) -> float | None:
+    """Grams per piece for a canonical ingredient name, if known."""
+    return _lookup(PIECE_WEIGHTS, ingredient)
+
+
+def _lookup(table: dict[str, float], ingredient: str) -> float | None:
+    # Try the full name, then drop leading qualifiers ("extra virgin olive oil" -> "oil").
+    words = ingredient.lower().split()
+    for start in range(len(words)):
+        value = table.get(" ".join(words[start:]))
+        if value is not None:
+            return value
+    return None
+
+
+def to_dimension(
+    quantity: float, unit: str, dimension: str, ingredient: str | None = None
+) -> float | None:
+    """Express an amount in the base unit of ``dimension`` (g, ml or pieces).
+
+    Mass and volume convert through the ingredient's density, and mass
+    and count through its piece weight. Returns None when no conversion
+    is known.
+    """
+    key = normalize_unit(unit)
+    source_dimension, factor = UNITS.get(key, (key, 1.0))
+    base = quantity * factor
+    if source_dimension == dimension:
+        return base
+    if ingredient is None:
+        return None
+
+    grams: float | None = None
+    if source_dimension == MASS:
+        grams = base
+    elif source_dimension == VOLUME and (ratio := density(ingredient)) is not None:
+        grams = base * ratio
+    elif source_dimension == COUNT and (weight := piece_weight(ingredient)) is not None:
+        grams = base * weight
+    if grams is None:
+        return None
+
+    if dimension == MASS:
+        return grams
+    if dimension == VOLUME and (ratio := density(ingredient)):
+        return grams / ratio
+    if dimension == COUNT and (weight := piece_weight(ingredient)):
+        return grams / weight
+    return None
+
+
+def convert(
+    quantity: float, from_unit: str, to_unit: str, ingredient: str | None = None
+) -> float | None:
+    """Convert an amount between units, or None when no conversion is known."""
+    target = normalize_unit(to_unit)
+    dimension, factor = UNITS.get(target, (target, 1.0))
+    base = to_dimension(quantity, from_unit, dimension, ingredient)
+    return None if base is None else base / factor
+
+
+def convert_batch(
+    quantities: Sequence[float],
+    units: Sequence[str],
+    to_unit: str,
+    ingredient: str | None = None,
+) -> list[float | None]:
+    """Convert many amounts of one ingredient to ``to_unit`` at once.
+
+    Conversion factors are resolved once per distinct source unit, so a
+    whole menu's rows reduce to one multiplication each.
+    """
+    factors: dict[str, float | None] = {}
+    results: list[float | None] = []
+    for quantity, unit in zip(quantities, units):
+        if unit not in factors:
+            factors[unit] = convert(1.0, unit, to_unit, ingredient)
+        factor = factors[unit]
+        results.append(None if factor is None else quantity * factor)
+    return results
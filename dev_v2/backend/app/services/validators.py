@@ -1,9 +1,11 @@
 """Validation utilities for menu and shopping data."""
 
-import re
 import uuid
 from typing import Any
 
+from app.services.ingredient_classifier import IngredientClassifier, get_ingredient_classifier
+from app.services.units import parse_amount
+
 VALID_CATEGORIES = frozenset([
     "proteins",
     "vegetables",
@@ -28,146 +30,6 @@ VALID_DAYS = frozenset([
 VALID_MEALS = frozenset(["breakfast", "lunch", "dinner"])
 
 VALID_DIFFICULTIES = frozenset(["easy", "medium", "hard"])
-FRESH_VEGETABLE_OVERRIDES = frozenset(
-    [
-        "green bean",
-        "green beans",
-        "green onion",
-        "scallion",
-        "spring onion",
-        "onion",
-        "garlic",
-        "shallot",
-        "leek",
-    ]
-)
-SEASONING_KEYWORDS = frozenset(
-    [
-        "salt",
-        "pepper",
-        "oil",
-        "olive oil",
-        "vegetable oil",
-        "canola oil",
-        "avocado oil",
-        "sesame oil",
-        "coconut oil",
-        "butter",
-        "ghee",
-        "soy sauce",
-        "vinegar",
-        "balsamic vinegar",
-        "rice vinegar",
-        "apple cider vinegar",
-        "white vinegar",
-        "red wine vinegar",
-        "fish sauce",
-        "oyster sauce",
-        "hoisin",
-        "teriyaki",
-        "miso",
-        "garlic powder",
-        "onion powder",
-        "paprika",
-        "cumin",
-        "chili powder",
-        "cayenne",
-        "chili flakes",
-        "oregano",
-        "basil",
-        "thyme",
-        "rosemary",
-        "cinnamon",
-        "nutmeg",
-        "ginger",
-        "ground ginger",
-        "turmeric",
-        "curry powder",
-        "five spice",
-        "italian seasoning",
-        "bay leaf",
-        "vanilla",
-        "vanilla extract",
-        "lemon juice",
-        "lime juice",
-        "garlic",
-        "onion",
-        "shallot",
-    ]
-)
-
-PANTRY_KEYWORDS = frozenset(
-    [
-        "rice",
-        "pasta",
-        "spaghetti",
-        "penne",
-        "noodle",
-        "noodles",
-        "ramen",
-        "udon",
-        "soba",
-        "couscous",
-        "quinoa",
-        "bulgur",
-        "barley",
-        "flour",
-        "all-purpose flour",
-        "bread flour",
-        "cornmeal",
-        "breadcrumbs",
-        "panko",
-        "oats",
-        "oatmeal",
-        "rolled oats",
-        "bread",
-        "tortilla",
-        "bagel",
-        "pita",
-        "wrap",
-        "canned beans",
-        "black beans",
-        "kidney beans",
-        "pinto beans",
-        "white beans",
-        "navy beans",
-        "garbanzo beans",
-        "chickpeas",
-        "lentils",
-        "tomato sauce",
-        "canned tomatoes",
-        "tomato paste",
-        "diced tomatoes",
-        "crushed tomatoes",
-        "marinara",
-        "salsa",
-        "stock",
-        "broth",
-        "vegetable broth",
-        "chicken broth",
-        "beef broth",
-        "coconut milk",
-        "peanut butter",
-        "honey",
-        "sugar",
-        "brown sugar",
-        "maple syrup",
-        "jam",
-        "jelly",
-        "mustard",
-        "ketchup",
-        "mayonnaise",
-        "hot sauce",
-        "sriracha",
-        "bbq sauce",
-        "canned corn",
-        "canned tuna",
-        "tuna",
-        "canned salmon",
-        "salmon",
-        "beans",
-    ]
-)
 
 
 class MenuValidator:
@@ -225,6 +87,9 @@ class MenuValidator:
 class ShoppingValidator:
     """Validator for shopping list items."""
 
+    def __init__(self, classifier: IngredientClassifier | None = None) -> None:
+        self._classifier = classifier or get_ingredient_classifier()
+
     def normalize_item(self, raw_item: dict, index: int) -> dict[str, Any] | None:
         """Normalize and validate a shopping item.
 
@@ -239,31 +104,10 @@ class ShoppingValidator:
         if not name or not isinstance(name, str):
             return None
 
-        category = raw_item.get("category", "others")
-        name_key = name.strip().lower()
-        if any(keyword in name_key for keyword in FRESH_VEGETABLE_OVERRIDES) and "powder" not in name_key:
-            category = "vegetables"
-        elif any(keyword in name_key for keyword in PANTRY_KEYWORDS):
-            category = "pantry_staples"
-        elif any(keyword in name_key for keyword in SEASONING_KEYWORDS):
-            category = "seasonings"
-        elif category not in VALID_CATEGORIES:
-            category = "others"
-
-        def _coerce_quantity(value: Any) -> float:
-            if isinstance(value, (int, float)):
-                return float(value)
-            if isinstance(value, str):
-                match = re.search(r"-?\d+(\.\d+)?", value)
-                if match:
-                    try:
-                        return float(match.group(0))
-                    except ValueError:
-                        return 0.0
-            return 0.0
+        category = self._classifier.classify(name, raw_item.get("category", "others"))
 
-        total_quantity = _coerce_quantity(raw_item.get("totalQuantity", 0))
-        unit = str(raw_item.get("unit", "")).strip()
+        total_quantity, parsed_unit = parse_amount(raw_item.get("totalQuantity", 0))
+        unit = str(raw_item.get("unit") or "").strip() or parsed_unit
         if category == "seasonings":
             total_quantity = 0
             unit = ""
@@ -0,0 +1,28 @@
+"""Offline benchmarks for the generation pipeline.
+
+Gemini responses are recorded once into JSONL fixtures (or synthesized)
+and replayed through ``ReplayClient`` with a configurable latency model,
+so load tests and microbenchmarks run without network access or quota.
+Run ``python -m benchmarks --help`` from ``dev_v2/backend``.
+"""
+
+from benchmarks.fixtures import (
+    Fixture,
+    load_fixtures,
+    prompt_kind,
+    save_fixtures,
+    synthetic_fixtures,
+)
+from benchmarks.replay import LatencyModel, RecordingClient, ReplayClient, replay_backend
+
+__all__ = [
+    "Fixture",
+    "load_fixtures",
+    "prompt_kind",
+    "save_fixtures",
+    "synthetic_fixtures",
+    "LatencyModel",
+    "RecordingClient",
+    "ReplayClient",
+    "replay_backend",
+]
@@ -0,0 +1,175 @@
+"""Command line entry point: ``python -m benchmarks {record,load,micro,compare}``."""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.models import UserPreferences
+from app.services.ai.client import GeminiClient
+from app.services.menu_service import MenuService
+from app.services.shopping_service import ShoppingService
+from benchmarks.fixtures import default_preferences, load_fixtures, save_fixtures, synthetic_fixtures
+from benchmarks.load import SCENARIOS, run_load
+from benchmarks.micro import run_micro
+from benchmarks.replay import LatencyModel, RecordingClient, ReplayClient
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Metric name suffixes and whether a larger value is an improvement.
+_DIRECTIONS = {
+    "_ms": False,
+    "_us": False,
+    "throughput_rps": True,
+    "ops_per_s": True,
+}
+
+
+def _metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def _write(kind: str, results: dict[str, Any], output: str | None, settings: dict[str, Any]) -> Path:
+    path = Path(output) if output else RESULTS_DIR / (
+        f"{kind}-{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {"benchmark": kind, **_metadata(), "settings": settings, "results": results}
+    path.write_text(json.dumps(document, indent=2), encoding="utf-8")
+    return path
+
+
+def _fixtures(path: str | None):
+    return load_fixtures(Path(path)) if path else synthetic_fixtures()
+
+
+async def _record(args: argparse.Namespace) -> None:
+    preferences = (
+        UserPreferences.model_validate_json(Path(args.preferences).read_text(encoding="utf-8"))
+        if args.preferences
+        else default_preferences()
+    )
+    recorder = RecordingClient(GeminiClient())
+    service = MenuService(client=recorder)
+    book = await service.generate(preferences)
+    await ShoppingService(client=recorder, llm_fallback=True).generate(book.id, book.menus)
+    for incremental in (False, True):
+        await service.modify(book.id, args.modification, book, incremental=incremental)
+    save_fixtures(Path(args.output), recorder.fixtures)
+    print(f"Recorded {len(recorder.fixtures)} responses to {args.output}")
+
+
+def _flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> list[str]:
+    """Describe metrics that got worse than ``baseline`` by more than ``threshold``."""
+    old = _flatten(baseline["results"])
+    new = _flatten(current["results"])
+    regressions = []
+    for name, before in sorted(old.items()):
+        after = new.get(name)
+        higher_is_better = next(
+            (better for suffix, better in _DIRECTIONS.items() if name.endswith(suffix)), None
+        )
+        if after is None or higher_is_better is None or before <= 0:
+            continue
+        change = (after - before) / before
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append(f"{name}: {before:g} -> {after:g} ({change:+.1%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Record live Gemini responses as fixtures")
+    record.add_argument("--output", required=True, help="Fixture JSONL file to append to")
+    record.add_argument("--preferences", help="UserPreferences JSON file")
+    record.add_argument("--modification", default="Make Tuesday dinner vegetarian")
+
+    load = commands.add_parser("load", help="Load-test the app with replayed Gemini responses")
+    load.add_argument("--fixtures", help="Fixture JSONL file (default: synthetic responses)")
+    load.add_argument("--scenario", choices=SCENARIOS, default="generate")
+    load.add_argument("--requests", type=int, default=50)
+    load.add_argument("--concurrency", type=int, default=10)
+    load.add_argument(
+        "--latency",
+        default="lognormal:1.0:0.4",
+        help="fixed:SECONDS, lognormal:MEDIAN:SIGMA or recorded:SCALE",
+    )
+    load.add_argument("--seed", type=int, default=1)
+    load.add_argument("--output", help="Result JSON path (default: benchmarks/results/)")
+
+    micro = commands.add_parser("micro", help="Run CPU microbenchmarks")
+    micro.add_argument("--fixtures", help="Fixture JSONL file (default: synthetic responses)")
+    micro.add_argument("--repeat", type=int, default=5)
+    micro.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing round")
+    micro.add_argument("--output", help="Result JSON path (default: benchmarks/results/)")
+
+    check = commands.add_parser("compare", help="Compare a result file against a baseline")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--threshold", type=float, default=0.1, help="Allowed relative slowdown")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(_record(args))
+        return 0
+
+    if args.command == "load":
+        client = ReplayClient(_fixtures(args.fixtures), LatencyModel.parse(args.latency, args.seed))
+        results = asyncio.run(run_load(client, args.scenario, args.requests, args.concurrency))
+        settings = {"latency": args.latency, "fixtures": args.fixtures or "synthetic"}
+        path = _write("load", results, args.output, settings)
+        print(json.dumps(results, indent=2))
+        print(f"Saved to {path}")
+        return 0
+
+    if args.command == "micro":
+        results = run_micro(_fixtures(args.fixtures), args.repeat, args.min_time)
+        settings = {"repeat": args.repeat, "min_time": args.min_time}
+        path = _write("micro", results, args.output, settings)
+        for name, stats in results.items():
+            print(f"{name:32} {stats['median_us']:>12.1f} us  {stats['ops_per_s']:>12.1f} ops/s")
+        print(f"Saved to {path}")
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions beyond threshold.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Recorded and synthetic Gemini responses for offline benchmarks."""
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from app.models.user import CookSchedule, MealSelection, UserPreferences
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MEALS = ("breakfast", "lunch", "dinner")
+
+# Prompt kind -> marker text that only that prompt builder emits.
+_PROMPT_MARKERS = (
+    ("modification_patch", "Return ONLY the changed slots"),
+    ("modification", "Return the whole modified plan"),
+    ("structure", "Step 2:"),
+    ("shopping", "Step 3:"),
+    ("shopping", "Consolidate these recipe ingredient lines"),
+    ("outline", "mealOutline and draftShoppingList"),
+)
+
+_INGREDIENTS = (
+    ("chicken breast", 300, "g", "proteins"),
+    ("salmon fillet", 250, "g", "proteins"),
+    ("firm tofu", 1, "block", "proteins"),
+    ("eggs", 3, "count", "proteins"),
+    ("broccoli", 200, "g", "vegetables"),
+    ("bell pepper", 1, "count", "vegetables"),
+    ("carrots", 2, "count", "vegetables"),
+    ("spinach", 2, "cups", "vegetables"),
+    ("green onion", 2, "stalks", "vegetables"),
+    ("lemon", 1, "count", "fruits"),
+    ("jasmine rice", 1, "cup", "grains"),
+    ("udon noodles", 200, "g", "grains"),
+    ("greek yogurt", 0.5, "cup", "dairy"),
+    ("soy sauce", 2, "tbsp", "seasonings"),
+    ("olive oil", 1, "tbsp", "seasonings"),
+    ("garlic", 3, "cloves", "vegetables"),
+)
+
+
+@dataclass
+class Fixture:
+    """One recorded Gemini exchange."""
+
+    kind: str
+    prompt_sha256: str
+    response: str
+    latency_seconds: float | None = None
+
+
+def prompt_hash(prompt: str) -> str:
+    """Stable key used to match a replayed prompt to its recording."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def prompt_kind(prompt: str) -> str:
+    """Classify a prompt by the builder that produced it."""
+    for kind, marker in _PROMPT_MARKERS:
+        if marker in prompt:
+            return kind
+    return "other"
+
+
+def load_fixtures(path: Path) -> list[Fixture]:
+    """Read fixtures from a JSONL file."""
+    fixtures = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            fixtures.append(Fixture(**json.loads(line)))
+    return fixtures
+
+
+def save_fixtures(path: Path, fixtures: list[Fixture]) -> None:
+    """Append fixtures to a JSONL file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as handle:
+        for fixture in fixtures:
+            handle.write(json.dumps(asdict(fixture), ensure_ascii=False) + "\n")
+
+
+def default_preferences() -> UserPreferences:
+    """A busy week: lunch and dinner daily, breakfast on weekends."""
+    weekday = MealSelection(breakfast=False, lunch=True, dinner=True)
+    weekend = MealSelection(breakfast=True, lunch=True, dinner=True)
+    return UserPreferences(
+        specificPreferences=["quick", "high protein"],
+        specificDisliked=["tree nuts"],
+        numPeople=2,
+        budget=120,
+        difficulty="medium",
+        cookSchedule=CookSchedule(
+            **{day: weekend if day in ("saturday", "sunday") else weekday for day in DAYS}
+        ),
+    )
+
+
+def _dish(day: str, meal: str, index: int, servings: int, ingredient_count: int) -> dict:
+    offset = (DAYS.index(day) * 7 + MEALS.index(meal) * 3 + index) % len(_INGREDIENTS)
+    ingredients = []
+    for i in range(ingredient_count):
+        name, quantity, unit, category = _INGREDIENTS[(offset + i) % len(_INGREDIENTS)]
+        ingredients.append({"name": name, "quantity": quantity, "unit": unit, "category": category})
+    return {
+        "name": f"{day.title()} {meal} bowl {index + 1}",
+        "ingredients": ingredients,
+        "instructions": "1. Prep the vegetables. 2. Sear the protein. 3. Toss with sauce.",
+        "estimatedTime": 25 + 5 * index,
+        "servings": servings,
+        "difficulty": "easy" if index else "medium",
+        "totalCalories": 450 + 40 * index,
+    }
+
+
+def synthetic_menus(
+    preferences: UserPreferences,
+    dishes_per_meal: int = 2,
+    ingredients_per_dish: int = 8,
+) -> dict[str, dict[str, list[dict]]]:
+    """A structured week shaped like a Step 2 response for ``preferences``."""
+    schedule = preferences.cookSchedule.model_dump()
+    return {
+        day: {
+            meal: [
+                _dish(day, meal, index, preferences.numPeople, ingredients_per_dish)
+                for index in range(dishes_per_meal)
+            ]
+            if schedule[day][meal]
+            else []
+            for meal in MEALS
+        }
+        for day in DAYS
+    }
+
+
+def synthetic_fixtures(
+    preferences: UserPreferences | None = None,
+    dishes_per_meal: int = 2,
+    ingredients_per_dish: int = 8,
+) -> list[Fixture]:
+    """Plausible responses for every prompt kind, for runs without recordings."""
+    preferences = preferences or default_preferences()
+    menus = synthetic_menus(preferences, dishes_per_meal, ingredients_per_dish)
+    outline = {
+        "mealOutline": {
+            day: {meal: [dish["name"] for dish in dishes] for meal, dishes in meals.items()}
+            for day, meals in menus.items()
+        },
+        "draftShoppingList": [
+            {"name": name, "category": category} for name, _, _, category in _INGREDIENTS
+        ],
+    }
+    shopping = {
+        "items": [
+            {"name": name, "category": category, "totalQuantity": quantity, "unit": unit}
+            for name, quantity, unit, category in _INGREDIENTS
+        ]
+    }
+    patch = {
+        "changes": [
+            {
+                "day": "tuesday",
+                "meal": "dinner",
+                "dishes": [
+                    _dish("tuesday", "dinner", 9, preferences.numPeople, ingredients_per_dish)
+                ],
+            }
+        ]
+    }
+    responses = {
+        "outline": outline,
+        "structure": menus,
+        "shopping": shopping,
+        "modification_patch": patch,
+        "modification": menus,
+    }
+    return [
+        Fixture(kind=kind, prompt_sha256="", response=json.dumps(payload, ensure_ascii=False))
+        for kind, payload in responses.items()
+    ]
@@ -0,0 +1,147 @@
+"""Concurrent load against the FastAPI app with Gemini replayed offline."""
+
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import anyio
+from httpx import ASGITransport, AsyncClient
+
+from app.api.v1 import user_state as user_state_router
+from app.main import app
+from app.models import GenerateMenuBookRequest
+from app.repositories import AsyncUserStateRepository, UserStateRepository
+from benchmarks.fixtures import default_preferences
+from benchmarks.replay import ReplayClient, replay_backend
+
+SCENARIOS = ("generate", "modify", "shopping", "state")
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linearly interpolated ``q``-th percentile (0-100) of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    """Latency statistics in milliseconds."""
+    millis = [latency * 1000 for latency in latencies]
+    return {
+        "mean_ms": round(sum(millis) / len(millis), 3) if millis else 0.0,
+        "p50_ms": round(percentile(millis, 50), 3),
+        "p95_ms": round(percentile(millis, 95), 3),
+        "p99_ms": round(percentile(millis, 99), 3),
+        "max_ms": round(max(millis), 3) if millis else 0.0,
+    }
+
+
+@contextmanager
+def _isolated_user_state() -> Iterator[None]:
+    """Point the user-state routes at a throwaway state file."""
+    original = user_state_router.get_async_user_state_repository
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = AsyncUserStateRepository(
+            UserStateRepository(Path(tmp) / "state.json"), write_behind_seconds=0
+        )
+        user_state_router.get_async_user_state_repository = lambda: repository
+        try:
+            yield
+        finally:
+            user_state_router.get_async_user_state_repository = original
+
+
+async def _setup(http: AsyncClient, scenario: str) -> dict[str, Any]:
+    """Prepare the payload shared by every request of a scenario."""
+    preferences = default_preferences().model_dump(mode="json")
+    request = {key: preferences[key] for key in GenerateMenuBookRequest.model_fields}
+    if scenario == "generate":
+        return {"generate": request}
+    response = await http.post("/api/menu-books/generate", json=request)
+    response.raise_for_status()
+    book = response.json()
+    return {"generate": request, "book": book}
+
+
+async def _request(http: AsyncClient, scenario: str, context: dict[str, Any]) -> int:
+    if scenario == "generate":
+        response = await http.post("/api/menu-books/generate", json=context["generate"])
+    elif scenario == "modify":
+        book = context["book"]
+        response = await http.post(
+            f"/api/menu-books/{book['id']}/modify",
+            json={"modification": "Make Tuesday dinner vegetarian", "currentMenuBook": book},
+        )
+    elif scenario == "shopping":
+        book = context["book"]
+        response = await http.post(
+            "/api/shopping-lists/generate",
+            json={"menuBookId": book["id"], "menus": book["menus"]},
+        )
+    else:
+        state = await http.get("/api/user-state")
+        response = await http.put(
+            "/api/user-state", json={**state.json(), "menuBooks": [context["book"]]}
+        )
+    return response.status_code
+
+
+async def run_load(
+    client: ReplayClient,
+    scenario: str = "generate",
+    requests: int = 50,
+    concurrency: int = 10,
+) -> dict[str, Any]:
+    """Send ``requests`` requests of ``scenario`` with at most ``concurrency`` in flight.
+
+    Requests go through the ASGI app in-process, so the numbers cover the
+    app and the replayed Gemini latency but no network stack.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    limiter = anyio.CapacityLimiter(max(1, concurrency))
+
+    with replay_backend(client), _isolated_user_state():
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            context = await _setup(http, scenario)
+
+            async def one() -> None:
+                async with limiter:
+                    started = time.perf_counter()
+                    try:
+                        status = await _request(http, scenario, context)
+                    except Exception:
+                        status = 0
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+
+            started = time.perf_counter()
+            async with anyio.create_task_group() as tg:
+                for _ in range(requests):
+                    tg.start_soon(one)
+            elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 3) if elapsed else 0.0,
+        **summarize(latencies),
+        "gemini_calls": dict(client.calls),
+    }
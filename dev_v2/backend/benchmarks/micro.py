@@ -0,0 +1,122 @@
+"""Microbenchmarks of CPU-bound pipeline steps."""
+
+import json
+import statistics
+import tempfile
+import timeit
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.models import MenuBook, MenuBookStatus, ShoppingList, UserState, WeekMenus
+from app.repositories import SQLiteUserStateRepository, UserStateRepository
+from app.services.ai.parser import ResponseParser
+from app.services.ingredient_classifier import IngredientClassifier
+from app.services.menu_service import MenuService
+from benchmarks.fixtures import Fixture, default_preferences, synthetic_fixtures
+from benchmarks.replay import ReplayClient
+
+
+def bench(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> dict[str, float]:
+    """Time ``fn`` over ``repeat`` rounds of at least ``min_time`` seconds each."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    per_call = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "calls_per_round": number,
+        "best_us": round(min(per_call) * 1e6, 3),
+        "median_us": round(statistics.median(per_call) * 1e6, 3),
+        "ops_per_s": round(1 / statistics.median(per_call), 1),
+    }
+
+
+def _structure_response(fixtures: list[Fixture]) -> str:
+    for fixture in fixtures:
+        if fixture.kind == "structure":
+            return fixture.response
+    raise ValueError("Fixtures contain no structure response")
+
+
+def _books(menus: dict, count: int) -> list[MenuBook]:
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    preferences = default_preferences()
+    return [
+        MenuBook(
+            id=f"mb_{index:04d}",
+            createdAt=created,
+            status=MenuBookStatus.ready,
+            preferences=preferences,
+            menus=WeekMenus(**menus),
+            shoppingList=ShoppingList(
+                id=f"sl_{index:04d}", menuBookId=f"mb_{index:04d}", createdAt=created, items=[]
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def run_micro(
+    fixtures: list[Fixture] | None = None,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    state_books: int = 20,
+) -> dict[str, dict[str, float]]:
+    """Benchmark parsing, normalization, classification and state storage."""
+    fixtures = fixtures or synthetic_fixtures()
+    preferences = default_preferences()
+    text = _structure_response(fixtures)
+    payload = json.loads(text)
+    service = MenuService(client=ReplayClient(fixtures), fan_out_group_size=0)
+    menus = service._normalize_menus(
+        payload, schedule=preferences.cookSchedule, preferences=preferences
+    )
+
+    names = [
+        (ingredient["name"], ingredient["category"])
+        for meals in menus.values()
+        for dishes in meals.values()
+        for dish in dishes
+        for ingredient in dish["ingredients"]
+    ]
+    classifier = IngredientClassifier()
+    scan_keys = [classifier.normalize_name(name) for name, _ in names]
+
+    def incremental_parse() -> None:
+        parser = ResponseParser.incremental()
+        for start in range(0, len(text), 256):
+            parser.feed(text[start : start + 256])
+
+    results = {
+        "parse_json": bench(lambda: ResponseParser.parse_json(text), repeat, min_time),
+        "parse_incremental": bench(incremental_parse, repeat, min_time),
+        "normalize_menus": bench(
+            lambda: service._normalize_menus(
+                payload, schedule=preferences.cookSchedule, preferences=preferences
+            ),
+            repeat,
+            min_time,
+        ),
+        "classifier_classify_many": bench(lambda: classifier.classify_many(names), repeat, min_time),
+        "classifier_scan_uncached": bench(
+            lambda: [classifier._scan(key) for key in scan_keys], repeat, min_time
+        ),
+    }
+
+    state = UserState(menuBooks=_books(menus, state_books))
+    with tempfile.TemporaryDirectory() as tmp:
+        json_repository = UserStateRepository(Path(tmp) / "state.json")
+        sqlite_repository = SQLiteUserStateRepository(Path(tmp) / "state.sqlite3")
+        json_repository.save(state)
+        sqlite_repository.save(state)
+        results["state_json_save"] = bench(lambda: json_repository.save(state), repeat, min_time)
+        results["state_json_load"] = bench(json_repository.load, repeat, min_time)
+        results["state_sqlite_save_unchanged"] = bench(
+            lambda: sqlite_repository.save(state), repeat, min_time
+        )
+        results["state_sqlite_load"] = bench(sqlite_repository.load, repeat, min_time)
+        results["state_sqlite_set_day"] = bench(
+            lambda: sqlite_repository.set_current_day_index(3), repeat, min_time
+        )
+    return results
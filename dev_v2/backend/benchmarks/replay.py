@@ -0,0 +1,184 @@
+"""Recording and replaying Gemini clients for offline benchmarks."""
+
+import math
+import random
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+import anyio
+
+from app.core.exceptions import GeminiError
+from app.services import menu_service as menu_service_module
+from app.services import shopping_service as shopping_service_module
+from app.services.ai.client import GeminiClient
+from benchmarks.fixtures import Fixture, prompt_hash, prompt_kind
+
+
+@dataclass
+class LatencyModel:
+    """Delay applied to each replayed call.
+
+    ``mode`` is ``fixed`` (always ``median``), ``lognormal`` (median
+    ``median``, shape ``sigma``) or ``recorded`` (each fixture's recorded
+    latency times ``scale``). Streaming calls spend ``first_chunk`` of the
+    delay before the first chunk and spread the rest over the others.
+    """
+
+    mode: str = "fixed"
+    median: float = 0.0
+    sigma: float = 0.5
+    scale: float = 1.0
+    first_chunk: float = 0.3
+    seed: int | None = None
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.mode not in ("fixed", "lognormal", "recorded"):
+            raise ValueError(f"Unknown latency mode: {self.mode}")
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: int | None = None) -> "LatencyModel":
+        """Build a model from ``fixed:SECONDS``, ``lognormal:MEDIAN:SIGMA`` or ``recorded:SCALE``."""
+        mode, _, rest = spec.partition(":")
+        values = [float(value) for value in rest.split(":") if value]
+        if mode == "fixed":
+            return cls("fixed", median=values[0] if values else 0.0, seed=seed)
+        if mode == "lognormal":
+            median, sigma = (values + [1.0, 0.5][len(values) :])[:2]
+            return cls("lognormal", median=median, sigma=sigma, seed=seed)
+        if mode == "recorded":
+            return cls("recorded", scale=values[0] if values else 1.0, seed=seed)
+        raise ValueError(f"Unknown latency spec: {spec}")
+
+    def sample(self, recorded: float | None = None) -> float:
+        """Draw the total latency of one call."""
+        if self.mode == "recorded":
+            return max(0.0, (recorded or 0.0) * self.scale)
+        if self.mode == "lognormal" and self.median > 0:
+            return self._rng.lognormvariate(math.log(self.median), self.sigma)
+        return self.median
+
+
+class ReplayClient:
+    """Stand-in for ``GeminiClient`` that answers from fixtures.
+
+    A prompt is answered by the recording of the identical prompt when
+    there is one, otherwise by the recordings of the same prompt kind in
+    rotation. Only the generation methods used by the services exist.
+    """
+
+    def __init__(self, fixtures: list[Fixture], latency: LatencyModel | None = None) -> None:
+        self._latency = latency or LatencyModel()
+        self._by_hash = {
+            fixture.prompt_sha256: fixture for fixture in fixtures if fixture.prompt_sha256
+        }
+        self._by_kind: dict[str, list[Fixture]] = defaultdict(list)
+        for fixture in fixtures:
+            self._by_kind[fixture.kind].append(fixture)
+        self._turns: dict[str, int] = defaultdict(int)
+        self.calls: dict[str, int] = defaultdict(int)
+
+    def _fixture(self, prompt: str) -> Fixture:
+        kind = prompt_kind(prompt)
+        self.calls[kind] += 1
+        fixture = self._by_hash.get(prompt_hash(prompt))
+        if fixture is not None:
+            return fixture
+        candidates = self._by_kind.get(kind)
+        if not candidates:
+            raise GeminiError(f"No replay fixture for {kind} prompt")
+        turn = self._turns[kind]
+        self._turns[kind] = turn + 1
+        return candidates[turn % len(candidates)]
+
+    async def generate(self, prompt: str, timeout_seconds: float | None = None, **_: Any) -> str:
+        fixture = self._fixture(prompt)
+        await anyio.sleep(self._latency.sample(fixture.latency_seconds))
+        return fixture.response
+
+    async def generate_json(self, prompt: str, timeout_seconds: float | None = None, **_: Any) -> str:
+        return await self.generate(prompt, timeout_seconds)
+
+    async def discard_json(self, prompt: str, **_: Any) -> None:
+        """Fixtures are never cached, so there is nothing to evict."""
+
+    async def generate_stream(
+        self, prompt: str, timeout_seconds: float | None = None, **_: Any
+    ) -> AsyncIterator[str]:
+        fixture = self._fixture(prompt)
+        total = self._latency.sample(fixture.latency_seconds)
+        chunks = _split(fixture.response, size=256)
+        await anyio.sleep(total * self._latency.first_chunk)
+        rest = total * (1 - self._latency.first_chunk) / max(1, len(chunks) - 1)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await anyio.sleep(rest)
+            yield chunk
+
+    async def generate_json_stream(
+        self, prompt: str, timeout_seconds: float | None = None, **_: Any
+    ) -> AsyncIterator[str]:
+        async for chunk in self.generate_stream(prompt, timeout_seconds):
+            yield chunk
+
+
+class RecordingClient:
+    """Wraps a live ``GeminiClient`` and keeps every exchange as a fixture."""
+
+    def __init__(self, client: GeminiClient) -> None:
+        self._client = client
+        self.fixtures: list[Fixture] = []
+
+    def _record(self, prompt: str, response: str, started: float) -> None:
+        self.fixtures.append(
+            Fixture(
+                kind=prompt_kind(prompt),
+                prompt_sha256=prompt_hash(prompt),
+                response=response,
+                latency_seconds=round(time.perf_counter() - started, 4),
+            )
+        )
+
+    async def generate_json(
+        self, prompt: str, timeout_seconds: float | None = None, **kwargs: Any
+    ) -> str:
+        started = time.perf_counter()
+        response = await self._client.generate_json(prompt, timeout_seconds, **kwargs)
+        self._record(prompt, response, started)
+        return response
+
+    async def discard_json(self, prompt: str, **kwargs: Any) -> None:
+        await self._client.discard_json(prompt, **kwargs)
+
+    async def generate_json_stream(
+        self, prompt: str, timeout_seconds: float | None = None, **kwargs: Any
+    ) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        parts = []
+        async for chunk in self._client.generate_json_stream(prompt, timeout_seconds, **kwargs):
+            parts.append(chunk)
+            yield chunk
+        self._record(prompt, "".join(parts), started)
+
+
+@contextmanager
+def replay_backend(client: Any) -> Iterator[None]:
+    """Make services created inside the block use ``client`` for Gemini."""
+    modules = (menu_service_module, shopping_service_module)
+    originals = [module.get_gemini_client for module in modules]
+    for module in modules:
+        module.get_gemini_client = lambda: client
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.get_gemini_client = original
+
+
+def _split(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
@@ -109,7 +109,13 @@ async def run_trace(preferences: UserPreferences) -> dict[str, Any]:
     try:
         if step2.normalized:
             menus = WeekMenus(**step2.normalized)
-            step3.prompt = prompts.shopping_list(menus)
+            ingredients = [
+                ingredient.model_dump(mode="json")
+                for _, menu in menus
+                for dish in menu.breakfast + menu.lunch + menu.dinner
+                for ingredient in dish.ingredients
+            ]
+            step3.prompt = prompts.shopping_list_from_ingredients(ingredients)
             step3.raw_response = await client.generate_json(step3.prompt)
             step3.parsed = parser.parse_json(step3.raw_response)
             raw_items = step3.parsed.get("items", []) if isinstance(step3.parsed, dict) else []
@@ -0,0 +1,124 @@
+import anyio
+import pytest
+
+from app.api.v1 import menu_books as menu_books_router
+from app.core.exceptions import QueueFullError
+from app.core.metrics import get_metrics
+from app.services.ai import client as client_module
+from app.services.ai.admission import AdmissionController, Priority, gemini_priority
+from app.services.ai.client import GeminiClient
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_admitted_by_priority() -> None:
+    controller = AdmissionController(max_concurrent=1, max_queued=3)
+    release = anyio.Event()
+    admitted: list[str] = []
+
+    async def hold() -> None:
+        async with controller.slot():
+            await release.wait()
+
+    async def call(name: str, priority: Priority) -> None:
+        with gemini_priority(priority):
+            async with controller.slot():
+                admitted.append(name)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hold)
+        await anyio.wait_all_tasks_blocked()
+        for name, priority in (
+            ("job", Priority.background),
+            ("modify", Priority.interactive),
+            ("generate", Priority.standard),
+        ):
+            tg.start_soon(call, name, priority)
+            await anyio.wait_all_tasks_blocked()
+        assert controller.stats() == {"active": 1, "queued": 3}
+        release.set()
+
+    assert admitted == ["modify", "generate", "job"]
+    assert controller.stats() == {"active": 0, "queued": 0}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_fast_and_cancelled_waiters_free_their_place() -> None:
+    controller = AdmissionController(max_concurrent=1, max_queued=1)
+    rejected_before = get_metrics().value("omenu_gemini_rejected_total", priority="standard")
+
+    async with controller.slot():
+        async with anyio.create_task_group() as tg:
+
+            async def wait_for_slot() -> None:
+                async with controller.slot():
+                    pass
+
+            tg.start_soon(wait_for_slot)
+            await anyio.wait_all_tasks_blocked()
+
+            with pytest.raises(QueueFullError) as raised:
+                async with controller.slot():
+                    pass
+            assert raised.value.status_code == 429
+            assert int(raised.value.headers["Retry-After"]) >= 1
+
+            tg.cancel_scope.cancel()
+
+        assert controller.stats() == {"active": 1, "queued": 0}
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(wait_for_slot)
+            await anyio.wait_all_tasks_blocked()
+            assert controller.stats()["queued"] == 1
+            tg.cancel_scope.cancel()
+
+    assert controller.stats() == {"active": 0, "queued": 0}
+    assert get_metrics().value("omenu_gemini_rejected_total", priority="standard") == rejected_before + 1
+
+
+@pytest.mark.asyncio
+async def test_client_calls_beyond_the_queue_get_queue_full(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    client = GeminiClient(
+        model_name="gemini-admission-test",
+        admission=AdmissionController(max_concurrent=1, max_queued=1),
+    )
+
+    async def slow_call_model(prompt, base_config, timeout):
+        await anyio.sleep(0.05)
+        return prompt
+
+    monkeypatch.setattr(client, "_call_model", slow_call_model)
+    results: list[str] = []
+    errors: list[Exception] = []
+
+    async def run(prompt: str) -> None:
+        try:
+            results.append(await client.generate_json(prompt))
+        except QueueFullError as exc:
+            errors.append(exc)
+
+    async with anyio.create_task_group() as tg:
+        for prompt in ("a", "b", "c"):
+            tg.start_soon(run, prompt)
+
+    assert sorted(results) == ["a", "b"]
+    assert len(errors) == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_route_returns_429_with_retry_after(async_client, monkeypatch) -> None:
+    class BusyMenuService:
+        async def generate(self, preferences):
+            raise QueueFullError(retry_after_seconds=7)
+
+    monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: BusyMenuService())
+    schedule = {
+        day: {"breakfast": False, "lunch": False, "dinner": True}
+        for day in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    }
+
+    response = await async_client.post("/api/menu-books/generate", json={"cookSchedule": schedule})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert response.json()["detail"]["code"] == "QUEUE_FULL"
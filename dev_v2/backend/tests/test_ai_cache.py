@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.exceptions import ParseError
+from app.core.metrics import get_metrics
+from app.services.ai import client as client_module
+from app.services.ai.cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend
+from app.services.ai.client import GeminiClient, discard_on_parse_error
+from app.services.ai.parser import ResponseParser
+
+
+def test_memory_backend_evicts_least_recently_used() -> None:
+    backend = MemoryCacheBackend(max_entries=2, ttl_seconds=60)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    assert backend.get("a") == "1"
+    backend.set("c", "3")
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+    assert backend.get("c") == "3"
+
+
+def test_memory_backend_expires_entries() -> None:
+    backend = MemoryCacheBackend(max_entries=2, ttl_seconds=0)
+    backend.set("a", "1")
+    assert backend.get("a") is None
+
+
+def test_sqlite_backend_round_trip_and_eviction(tmp_path) -> None:
+    backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3", max_entries=2, ttl_seconds=60)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    backend.set("c", "3")
+    assert backend.get("a") is None
+    assert backend.get("c") == "3"
+
+    # A second instance sees the same entries, as another worker would.
+    other = SQLiteCacheBackend(tmp_path / "cache.sqlite3", max_entries=2, ttl_seconds=60)
+    assert other.get("b") == "2"
+    other.delete("b")
+    assert backend.get("b") is None
+
+
+def test_cache_key_depends_on_config_and_schema() -> None:
+    base = ResponseCache.make_key("m", "prompt", {"temperature": 0.7})
+    assert base == ResponseCache.make_key("m", "prompt", {"temperature": 0.7})
+    assert base != ResponseCache.make_key("m", "prompt", {"temperature": 0.2})
+    assert base != ResponseCache.make_key("other", "prompt", {"temperature": 0.7})
+    assert base != ResponseCache.make_key("m", "prompt", {"temperature": 0.7}, {"type": "object"})
+
+
+@pytest.mark.asyncio
+async def test_client_serves_repeated_prompt_from_cache(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    cache = ResponseCache(MemoryCacheBackend())
+    client = GeminiClient(model_name="gemini-test", cache=cache)
+    calls: list[str] = []
+
+    async def fake_call_model(prompt, base_config, timeout):
+        calls.append(prompt)
+        return '{"ok": true}'
+
+    monkeypatch.setattr(client, "_call_model", fake_call_model)
+
+    first = await client.generate_json("same prompt")
+    second = await client.generate_json("same prompt")
+
+    assert first == second == '{"ok": true}'
+    assert calls == ["same prompt"]
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_response_rejected_by_the_caller_is_not_replayed(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    cache = ResponseCache(MemoryCacheBackend())
+    client = GeminiClient(model_name="gemini-test", cache=cache)
+    responses = iter(['{"truncated": ', '{"ok": true}'])
+
+    async def fake_call_model(prompt, base_config, timeout):
+        return next(responses)
+
+    monkeypatch.setattr(client, "_call_model", fake_call_model)
+    parser = ResponseParser()
+
+    with pytest.raises(ParseError):
+        text = await client.generate_json("same prompt")
+        async with discard_on_parse_error(client, "same prompt"):
+            parser.parse_json(text)
+
+    assert parser.parse_json(await client.generate_json("same prompt")) == {"ok": True}
+    assert get_metrics().value("omenu_gemini_cache_misses_total", model="gemini-test") >= 2
+
+
+@pytest.mark.asyncio
+async def test_stream_writes_completed_response_to_cache(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    cache = ResponseCache(MemoryCacheBackend())
+    client = GeminiClient(model_name="gemini-test", cache=cache)
+
+    def chunk(text: str) -> SimpleNamespace:
+        part = SimpleNamespace(text=text)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+    async def chunks():
+        for text in ('{"a": ', "1}"):
+            yield chunk(text)
+
+    async def open_stream(prompt, config):
+        return chunks()
+
+    monkeypatch.setattr(client, "_open_stream", open_stream)
+
+    streamed = [piece async for piece in client.generate_json_stream("prompt")]
+    replayed = [piece async for piece in client.generate_json_stream("prompt")]
+
+    assert streamed == ['{"a": ', "1}"]
+    assert replayed == ['{"a": 1}']
+    assert cache.stats() == {"hits": 1, "misses": 1}
@@ -0,0 +1,53 @@
+import pytest
+
+from benchmarks import LatencyModel, ReplayClient, synthetic_fixtures
+from benchmarks.__main__ import compare
+from benchmarks.fixtures import Fixture, prompt_hash
+from benchmarks.load import percentile, run_load
+
+
+@pytest.mark.asyncio
+async def test_replay_client_prefers_exact_prompt_then_rotates_by_kind() -> None:
+    fixtures = [
+        Fixture(kind="structure", prompt_sha256="", response="first"),
+        Fixture(kind="structure", prompt_sha256="", response="second"),
+        Fixture(kind="structure", prompt_sha256=prompt_hash("Step 2: exact"), response="exact"),
+    ]
+    client = ReplayClient(fixtures)
+
+    assert await client.generate_json("Step 2: exact") == "exact"
+    assert await client.generate_json("Step 2: other") == "first"
+    assert await client.generate_json("Step 2: again") == "second"
+    assert client.calls["structure"] == 3
+
+
+def test_latency_model_parses_specs() -> None:
+    assert LatencyModel.parse("fixed:0.25").sample() == 0.25
+    assert LatencyModel.parse("recorded:2").sample(0.5) == 1.0
+    assert LatencyModel.parse("lognormal:1:0.5", seed=3).sample() > 0
+
+
+def test_percentile_interpolates() -> None:
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([5.0], 99) == 5.0
+
+
+def test_compare_flags_regressions_in_the_right_direction() -> None:
+    baseline = {"results": {"parse": {"median_us": 100.0, "ops_per_s": 10.0}, "throughput_rps": 5.0}}
+    current = {"results": {"parse": {"median_us": 130.0, "ops_per_s": 12.0}, "throughput_rps": 4.0}}
+
+    regressions = compare(baseline, current, threshold=0.1)
+
+    assert [line.split(":")[0] for line in regressions] == ["parse.median_us", "throughput_rps"]
+
+
+@pytest.mark.asyncio
+async def test_load_run_replays_generation_offline() -> None:
+    client = ReplayClient(synthetic_fixtures(), LatencyModel.parse("fixed:0"))
+
+    results = await run_load(client, scenario="shopping", requests=6, concurrency=3)
+
+    assert results["errors"] == 0
+    assert results["statuses"] == {"200": 6}
+    assert results["p50_ms"] <= results["p95_ms"] <= results["p99_ms"] <= results["max_ms"]
+    assert client.calls["structure"] == 1
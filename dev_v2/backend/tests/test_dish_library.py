@@ -0,0 +1,147 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import Dish, LibraryDish
+from app.models.enums import Difficulty
+from app.repositories.dish_library import SQLiteDishLibraryRepository
+from app.services.dish_library import DishLibrary, MinHasher, dish_key
+
+
+def make_dish(
+    name: str,
+    difficulty: str = "easy",
+    ingredients: tuple[str, ...] = ("chicken breast",),
+    servings: int = 2,
+) -> Dish:
+    return Dish(
+        id="x",
+        name=name,
+        ingredients=[
+            {"name": ingredient, "quantity": 100, "unit": "g", "category": "proteins"}
+            for ingredient in ingredients
+        ],
+        instructions="1. Cook.",
+        estimatedTime=20,
+        servings=servings,
+        difficulty=difficulty,
+        totalCalories=400,
+        source="ai",
+    )
+
+
+@pytest.fixture
+def library(tmp_path) -> DishLibrary:
+    return DishLibrary(SQLiteDishLibraryRepository(tmp_path / "dishes.sqlite3"), similarity=0.8)
+
+
+def test_minhash_estimates_name_similarity() -> None:
+    hasher = MinHasher(num_perm=128)
+    shingles = lambda name: {name[i : i + 3] for i in range(len(name) - 2)}  # noqa: E731
+
+    same = hasher.similarity(
+        hasher.signature(shingles("garlic butter salmon")),
+        hasher.signature(shingles("garlic butter salmon")),
+    )
+    different = hasher.similarity(
+        hasher.signature(shingles("garlic butter salmon")),
+        hasher.signature(shingles("beef tacos")),
+    )
+
+    assert same == 1.0
+    assert different < 0.2
+    assert dish_key("  Chicken Stir-Fry! ") == "chicken stir fry"
+
+
+def test_similar_names_match_and_unrelated_do_not(library) -> None:
+    library.add_many(
+        [(make_dish("Chicken Stir-Fry"), "dinner"), (make_dish("Beef Tacos"), "lunch")]
+    )
+
+    assert library.match("chicken stir fry").name == "Chicken Stir-Fry"
+    assert library.match("Beef Tacos").name == "Beef Tacos"
+    assert library.match("Mushroom Risotto") is None
+
+
+def test_names_alone_decide_similarity(library) -> None:
+    library.add_many(
+        [(make_dish("Garlic Butter Salmon", ingredients=("salmon", "garlic", "butter")), "dinner")]
+    )
+
+    # Outline names carry no ingredients, so a recipe's ingredient list must not dilute matches.
+    [(entry, score)] = library.similar("garlic butter salmon")
+    assert entry.key == "garlic butter salmon"
+    assert score == 1.0
+
+
+def test_refresh_cursor_follows_save_order_not_clocks(tmp_path, library) -> None:
+    reader = DishLibrary(SQLiteDishLibraryRepository(tmp_path / "dishes.sqlite3"))
+    library.add_many([(make_dish("Beef Tacos"), "lunch")])
+    assert reader.refresh() == 1
+
+    # A worker whose clock lags saves after the reader's last refresh.
+    lagging = LibraryDish(
+        key="egg fried rice",
+        dish=make_dish("Egg Fried Rice"),
+        meals=["dinner"],
+        updatedAt=datetime(2000, 1, 1, tzinfo=timezone.utc),
+    )
+    SQLiteDishLibraryRepository(tmp_path / "dishes.sqlite3").save_many([lagging])
+
+    assert reader.refresh() == 1
+    assert reader.refresh() == 0
+    assert reader.match("egg fried rice") is not None
+
+
+def test_match_respects_difficulty_and_dislikes(library) -> None:
+    library.add_many(
+        [
+            (make_dish("Beef Wellington", difficulty="hard", ingredients=("beef",)), "dinner"),
+            (make_dish("Tomato Egg Soup", ingredients=("eggs", "cherry tomatoes")), "lunch"),
+        ]
+    )
+
+    assert library.match("Beef Wellington", max_difficulty=Difficulty.medium) is None
+    assert library.match("Beef Wellington", max_difficulty=Difficulty.hard) is not None
+    assert library.match("Tomato Egg Soup", excluded=["tomato"]) is None
+    assert library.match("Tomato Egg Soup", excluded=["mushroom"]) is not None
+
+
+def test_library_is_persistent_and_indexed(tmp_path, library) -> None:
+    library.add_many(
+        [
+            (make_dish("Tomato Egg Soup", ingredients=("eggs", "tomato")), "lunch"),
+            (make_dish("Egg Fried Rice", ingredients=("eggs", "rice")), "dinner"),
+        ]
+    )
+    library.add_many([(make_dish("Tomato Egg Soup", ingredients=("eggs", "tomato")), "dinner")])
+
+    reloaded = DishLibrary(SQLiteDishLibraryRepository(tmp_path / "dishes.sqlite3"))
+    assert reloaded.refresh() == 2
+    assert reloaded.refresh() == 0
+
+    assert [entry.key for entry in reloaded.find(ingredients=["eggs"])] == [
+        "tomato egg soup",
+        "egg fried rice",
+    ]
+    soup = reloaded.find(ingredients=["tomato"], meal="dinner")[0]
+    assert soup.meals == ["lunch", "dinner"]
+    assert soup.uses == 2
+    assert reloaded.find(difficulty=Difficulty.hard) == []
+
+
+def test_match_keeps_preferred_ingredients(library) -> None:
+    library.add_many(
+        [
+            (make_dish("Tofu Stir Fry", ingredients=("chicken breast", "soy sauce")), "dinner"),
+            (make_dish("Mapo Tofu", ingredients=("firm tofu", "chili bean paste")), "dinner"),
+            (make_dish("Tomato Egg Soup", ingredients=("eggs", "cherry tomatoes")), "lunch"),
+        ]
+    )
+
+    # Another user's "tofu" stir fry made with chicken is no tofu dish.
+    assert library.match("Tofu Stir Fry", preferred=["tofu"]) is None
+    assert library.match("Mapo Tofu", preferred=["tofu"]) is not None
+    assert library.match("Tomato Egg Soup", preferred=["Tomato"]) is not None
+    assert library.match("Tomato Egg Soup", preferred=["eggs", "chicken"]) is not None
+    assert library.match("Tomato Egg Soup", preferred=["gluten-free"]) is None
@@ -0,0 +1,75 @@
+import json
+import time
+
+import anyio
+import httpx
+import pytest
+
+from app.core.exceptions import GeminiTimeoutError
+from app.services.ai import client as client_module
+from app.services.ai.client import GeminiClient
+from app.services.ai.resilience import CircuitBreaker, RetryPolicy
+
+
+def _payload(text: str) -> dict:
+    return {
+        "candidates": [
+            {"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}
+        ],
+        "usageMetadata": {"promptTokenCount": 3, "candidatesTokenCount": 2},
+    }
+
+
+def make_client(monkeypatch, handler) -> GeminiClient:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    return GeminiClient(
+        model_name="gemini-transport-test",
+        retry_policy=RetryPolicy(max_attempts=1),
+        breaker=CircuitBreaker(failure_threshold=0),
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_requests_share_the_async_http_client(monkeypatch) -> None:
+    requests: list[httpx.Request] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if "streamGenerateContent" in request.url.path:
+            body = "".join(
+                f"data: {json.dumps(_payload(text))}\n\n" for text in ('{"a": ', "1}")
+            )
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json=_payload('{"ok": true}'))
+
+    client = make_client(monkeypatch, handler)
+
+    assert await client.generate_json("prompt") == '{"ok": true}'
+    assert [chunk async for chunk in client.generate_json_stream("stream")] == ['{"a": ', "1}"]
+    assert len(requests) == 2
+    assert requests[0].url.path.endswith("gemini-transport-test:generateContent")
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_the_in_flight_request(monkeypatch) -> None:
+    cancelled = anyio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        try:
+            await anyio.sleep(30)
+        except anyio.get_cancelled_exc_class():
+            cancelled.set()
+            raise
+        return httpx.Response(200, json=_payload("late"))
+
+    client = make_client(monkeypatch, handler)
+
+    started = time.monotonic()
+    with pytest.raises(GeminiTimeoutError):
+        await client.generate_json("prompt", timeout_seconds=0.1)
+
+    assert time.monotonic() - started < 1
+    assert cancelled.is_set()
+    await client.aclose()
@@ -0,0 +1,27 @@
+from app.services.ingredient_classifier import IngredientClassifier, KeywordMatcher
+
+
+def test_keyword_matcher_finds_overlapping_keywords() -> None:
+    matcher = KeywordMatcher({"a": ["he", "she"], "b": ["hers"], "c": ["his"]})
+    assert matcher.groups_in("ushers") == frozenset({"a", "b"})
+    assert matcher.groups_in("this") == frozenset({"c"})
+    assert matcher.groups_in("xyz") == frozenset()
+
+
+def test_classifier_keeps_precedence_rules() -> None:
+    classifier = IngredientClassifier()
+    assert classifier.classify("Green Onions", "seasonings") == "vegetables"
+    assert classifier.classify("garlic powder", "vegetables") == "seasonings"
+    assert classifier.classify("Brown rice", "grains") == "pantry_staples"
+    assert classifier.classify("olive oil", "others") == "seasonings"
+    assert classifier.classify("chicken thigh", "proteins") == "proteins"
+    assert classifier.classify("chicken thigh", "meat") == "others"
+
+
+def test_classify_many_scans_each_name_once() -> None:
+    classifier = IngredientClassifier(cache_size=8)
+    categories = classifier.classify_many(
+        [("Salt", None), ("salt ", "dairy"), ("eggs", "proteins"), ("eggs", "nope")]
+    )
+    assert categories == ["seasonings", "seasonings", "proteins", "others"]
+    assert classifier.cache_info().misses == 2
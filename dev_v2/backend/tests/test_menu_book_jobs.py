@@ -0,0 +1,203 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import anyio
+import pytest
+
+from app.api.v1 import menu_books as menu_books_router
+from app.core.exceptions import ParseError, QueueFullError
+from app.models import MenuBookJob, MenuBookStatus, UserPreferences
+from app.repositories.jobs import MenuBookJobRepository
+from app.services.job_queue import MenuBookJobQueue
+from app.services.menu_service import MenuService
+
+
+@pytest.fixture
+def sample_preferences() -> dict:
+    day = {"breakfast": False, "lunch": False, "dinner": True}
+    return {
+        "numPeople": 2,
+        "budget": 120,
+        "difficulty": "easy",
+        "cookSchedule": {
+            d: day
+            for d in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+        },
+    }
+
+
+class FakeMenuService(MenuService):
+    def __init__(self, error: Exception | None = None) -> None:
+        super().__init__(client=object())  # type: ignore[arg-type]
+        self._error = error
+
+    async def generate(self, preferences, *, book_id=None, on_progress=None):
+        await on_progress("outline", {})
+        if self._error is not None:
+            raise self._error
+        await on_progress("structured", {})
+        book = self.placeholder_book(preferences)
+        return book.model_copy(update={"id": book_id, "status": MenuBookStatus.ready})
+
+
+async def _wait_for(queue: MenuBookJobQueue, job_id: str) -> MenuBookJob:
+    with anyio.fail_after(2):
+        while True:
+            job = await queue.get(job_id)
+            if job is not None and job.status != MenuBookStatus.generating:
+                return job
+            await anyio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_job_runs_to_completion(tmp_path, sample_preferences) -> None:
+    queue = MenuBookJobQueue(
+        repository=MenuBookJobRepository(tmp_path), service_factory=FakeMenuService
+    )
+    async with anyio.create_task_group() as tg:
+        await queue.start(tg)
+        job = await queue.submit(UserPreferences(**sample_preferences))
+        assert job.menuBook.status == MenuBookStatus.generating
+
+        finished = await _wait_for(queue, job.jobId)
+        tg.cancel_scope.cancel()
+
+    assert finished.status == MenuBookStatus.ready
+    assert finished.progress == 1.0
+    assert finished.menuBook.id == job.jobId
+
+
+@pytest.mark.asyncio
+async def test_job_failure_is_recorded(tmp_path, sample_preferences) -> None:
+    queue = MenuBookJobQueue(
+        repository=MenuBookJobRepository(tmp_path),
+        service_factory=lambda: FakeMenuService(error=ParseError("bad data")),
+    )
+    async with anyio.create_task_group() as tg:
+        await queue.start(tg)
+        job = await queue.submit(UserPreferences(**sample_preferences))
+        finished = await _wait_for(queue, job.jobId)
+        tg.cancel_scope.cancel()
+
+    assert finished.status == MenuBookStatus.error
+    assert finished.error is not None
+    assert finished.error.code == "PARSE_ERROR"
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_resume_after_restart(tmp_path, sample_preferences) -> None:
+    repository = MenuBookJobRepository(tmp_path)
+    book = FakeMenuService().placeholder_book(UserPreferences(**sample_preferences))
+    now = datetime.now(timezone.utc)
+    repository.save(
+        MenuBookJob(
+            jobId=book.id,
+            status=MenuBookStatus.generating,
+            stage="structuring",
+            menuBook=book,
+            createdAt=now,
+            updatedAt=now,
+        )
+    )
+
+    queue = MenuBookJobQueue(
+        repository=MenuBookJobRepository(tmp_path), service_factory=FakeMenuService
+    )
+    async with anyio.create_task_group() as tg:
+        await queue.start(tg)
+        finished = await _wait_for(queue, book.id)
+        tg.cancel_scope.cancel()
+
+    assert finished.status == MenuBookStatus.ready
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_finished_jobs_past_retention(tmp_path, sample_preferences) -> None:
+    repository = MenuBookJobRepository(tmp_path)
+    book = FakeMenuService().placeholder_book(UserPreferences(**sample_preferences))
+    now = datetime.now(timezone.utc)
+    day_old = now - timedelta(hours=25)
+    for job_id, status, updated_at in (
+        ("job_old", MenuBookStatus.ready, day_old),
+        ("job_failed", MenuBookStatus.error, day_old),
+        ("job_recent", MenuBookStatus.ready, now),
+        ("job_running", MenuBookStatus.generating, day_old),
+    ):
+        repository.save(
+            MenuBookJob(
+                jobId=job_id,
+                status=status,
+                menuBook=book,
+                createdAt=updated_at,
+                updatedAt=updated_at,
+            )
+        )
+    (tmp_path / "job_gone.lock").write_text("not-a-pid", encoding="utf-8")
+
+    queue = MenuBookJobQueue(
+        repository=repository, service_factory=FakeMenuService, retention_hours=24
+    )
+
+    assert await queue.sweep() == 2
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "job_recent.json",
+        "job_running.json",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_when_queue_is_full(tmp_path, sample_preferences) -> None:
+    queue = MenuBookJobQueue(
+        repository=MenuBookJobRepository(tmp_path),
+        service_factory=FakeMenuService,
+        max_pending=1,
+    )
+    await queue.submit(UserPreferences(**sample_preferences))
+    with pytest.raises(QueueFullError):
+        await queue.submit(UserPreferences(**sample_preferences))
+
+
+@pytest.mark.asyncio
+async def test_job_routes(async_client, monkeypatch, tmp_path, sample_preferences) -> None:
+    queue = MenuBookJobQueue(
+        repository=MenuBookJobRepository(tmp_path),
+        service_factory=FakeMenuService,
+        max_pending=1,
+    )
+    monkeypatch.setattr(menu_books_router, "get_menu_book_job_queue", lambda: queue)
+
+    response = await async_client.post("/api/menu-books/jobs", json=sample_preferences)
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "generating"
+    assert body["menuBook"]["status"] == "generating"
+    assert body["menuBook"]["id"] == body["jobId"]
+
+    response = await async_client.get(f"/api/menu-books/jobs/{body['jobId']}")
+    assert response.status_code == 200
+    assert response.json()["stage"] == "queued"
+
+    response = await async_client.post("/api/menu-books/jobs", json=sample_preferences)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert response.json()["detail"]["code"] == "QUEUE_FULL"
+
+    response = await async_client.get("/api/menu-books/jobs/mb_missing")
+    assert response.status_code == 404
+    assert response.json()["detail"]["code"] == "NOT_FOUND"
+
+
+def test_claim_treats_lock_without_owner_as_held(tmp_path) -> None:
+    repository = MenuBookJobRepository(tmp_path)
+    (tmp_path / "job_new.lock").write_text("", encoding="utf-8")
+
+    assert repository.claim("job_new") is False
+    assert (tmp_path / "job_new.lock").exists()
+
+
+def test_claim_writes_owner_before_lock_appears(tmp_path) -> None:
+    repository = MenuBookJobRepository(tmp_path)
+
+    assert repository.claim("job_new") is True
+    assert (tmp_path / "job_new.lock").read_text(encoding="utf-8") == str(os.getpid())
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["job_new.lock"]
@@ -1,9 +1,16 @@
+import json
 from datetime import datetime, timezone
 
+import anyio
 import pytest
 
 from app.core.exceptions import GeminiTimeoutError, ParseError
+from app.core.metrics import timed_stage
 from app.api.v1 import menu_books as menu_books_router
+from app.main import app
+from app.models import MenuBook, MenuBookStatus
+from app.repositories.jobs import MenuBookJobRepository
+from app.services.job_queue import MenuBookJobQueue
 
 
 @pytest.fixture
@@ -132,7 +139,7 @@ def sample_menu_book(sample_preferences: dict) -> dict:
 @pytest.mark.asyncio
 async def test_modify_menu_book_success(async_client, monkeypatch, sample_menu_book):
     class FakeMenuService:
-        async def modify(self, book_id, modification, current_book):  # noqa: D401
+        async def modify(self, book_id, modification, current_book, incremental=None):  # noqa: D401
             return sample_menu_book
 
     monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: FakeMenuService())
@@ -154,7 +161,7 @@ async def test_modify_menu_book_success(async_client, monkeypatch, sample_menu_b
 @pytest.mark.asyncio
 async def test_modify_menu_book_parse_error(async_client, monkeypatch, sample_menu_book):
     class FakeMenuService:
-        async def modify(self, book_id, modification, current_book):  # noqa: D401
+        async def modify(self, book_id, modification, current_book, incremental=None):  # noqa: D401
             raise ParseError("bad data")
 
     monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: FakeMenuService())
@@ -170,3 +177,176 @@ async def test_modify_menu_book_parse_error(async_client, monkeypatch, sample_me
     assert response.status_code == 500
     body = response.json()
     assert body["detail"]["code"] == "PARSE_ERROR"
+
+
+@pytest.mark.asyncio
+async def test_stream_menu_book_emits_sse_events(async_client, monkeypatch, sample_preferences):
+    created_at = datetime.now(timezone.utc)
+
+    class FakeBook:
+        def model_dump(self, mode: str = "python") -> dict:
+            return {"id": "mb_stream", "status": "ready", "createdAt": created_at.isoformat()}
+
+    class FakeMenuService:
+        async def generate(self, preferences, on_progress=None):  # noqa: D401
+            with timed_stage("outline"):
+                await on_progress("outline", {"mealOutline": {"monday": {"lunch": ["Soup"]}}})
+            await on_progress("day", {"day": "monday", "menu": {"lunch": [], "breakfast": [], "dinner": []}})
+            return FakeBook()
+
+    monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: FakeMenuService())
+
+    response = await async_client.post("/api/menu-books/generate/stream", json=sample_preferences)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n")[0] for block in response.text.strip().split("\n\n")]
+    assert events == ["event: outline", "event: day", "event: complete", "event: timing"]
+    assert '"mb_stream"' in response.text
+    timing = json.loads(response.text.strip().split("\n\n")[-1].split("data: ", 1)[1])
+    assert "outline;dur=" in timing["serverTiming"]
+    assert "total;dur=" in timing["serverTiming"]
+
+
+@pytest.mark.asyncio
+async def test_stream_menu_book_cancels_generation_on_disconnect(monkeypatch, sample_preferences):
+    cancelled = anyio.Event()
+
+    class FakeMenuService:
+        async def generate(self, preferences, on_progress=None):  # noqa: D401
+            await on_progress("outline", {"mealOutline": {}})
+            try:
+                await anyio.sleep_forever()
+            finally:
+                cancelled.set()
+
+    monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: FakeMenuService())
+
+    body = json.dumps(sample_preferences).encode()
+    first_event = anyio.Event()
+    chunks: list[bytes] = []
+    requested = False
+
+    async def receive() -> dict:
+        # Send the request body, then hang up once the first event arrived.
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await first_event.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"])
+            first_event.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/menu-books/generate/stream",
+        "raw_path": b"/api/menu-books/generate/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("testclient", 123),
+        "server": ("testserver", 80),
+    }
+    with anyio.fail_after(2):
+        await app(scope, receive, send)
+
+    # Generation is cancelled before the response returns, not whenever
+    # the abandoned body iterator gets garbage collected.
+    assert cancelled.is_set()
+    assert chunks[0].startswith(b"event: outline")
+
+
+@pytest.mark.asyncio
+async def test_stream_menu_book_reports_errors(async_client, monkeypatch, sample_preferences):
+    class FakeMenuService:
+        async def generate(self, preferences, on_progress=None):  # noqa: D401
+            raise GeminiTimeoutError("timeout")
+
+    monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: FakeMenuService())
+
+    response = await async_client.post("/api/menu-books/generate/stream", json=sample_preferences)
+
+    assert response.status_code == 200
+    assert response.text.startswith("event: error")
+    assert "GEMINI_TIMEOUT" in response.text
+
+
+class FakePrecomputer:
+    enabled = True
+
+    def __init__(self, book: dict) -> None:
+        self._book = book
+        self.taken: list[str] = []
+
+    async def take(self, preferences, user_id):  # noqa: D401
+        self.taken.append(user_id)
+        return MenuBook.model_validate(self._book)
+
+
+class SeenRecorder:
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+
+    async def mark_seen(self, user_id):  # noqa: D401
+        self.seen.append(user_id)
+
+
+@pytest.fixture
+def precomputed(monkeypatch, sample_menu_book) -> tuple[FakePrecomputer, SeenRecorder]:
+    class FailingMenuService:
+        async def generate(self, preferences, on_progress=None):  # noqa: D401
+            raise AssertionError("precomputed book should be served")
+
+    precomputer = FakePrecomputer(sample_menu_book)
+    repository = SeenRecorder()
+    monkeypatch.setattr(menu_books_router, "get_menu_service", lambda: FailingMenuService())
+    monkeypatch.setattr(menu_books_router, "get_menu_book_precomputer", lambda: precomputer)
+    monkeypatch.setattr(
+        menu_books_router, "get_async_user_state_repository", lambda: repository
+    )
+    return precomputer, repository
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/api/menu-books/generate", "/api/menu-books/generate/stream"])
+async def test_precomputed_book_is_served_by_generate_endpoints(
+    async_client, precomputed, sample_preferences, path
+):
+    precomputer, repository = precomputed
+
+    response = await async_client.post(path, json=sample_preferences, headers={"X-User-Id": "u1"})
+
+    assert response.status_code == 200
+    assert precomputer.taken == ["u1"]
+    assert repository.seen == ["u1"]
+    if path.endswith("/stream"):
+        events = [block.split("\n")[0] for block in response.text.strip().split("\n\n")]
+        assert events == ["event: complete", "event: timing"]
+    assert '"mb_existing"' in response.text
+
+
+@pytest.mark.asyncio
+async def test_precomputed_book_completes_job_immediately(
+    async_client, monkeypatch, tmp_path, precomputed, sample_preferences
+):
+    queue = MenuBookJobQueue(repository=MenuBookJobRepository(tmp_path))
+    monkeypatch.setattr(menu_books_router, "get_menu_book_job_queue", lambda: queue)
+
+    response = await async_client.post(
+        "/api/menu-books/jobs", json=sample_preferences, headers={"X-User-Id": "u1"}
+    )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["menuBook"]["id"] == "mb_existing"
+    assert (await queue.get(body["jobId"])).status == MenuBookStatus.ready
+    assert precomputed[1].seen == ["u1"]
@@ -0,0 +1,323 @@
+import json
+import re
+
+import anyio
+import pytest
+
+from app.core.exceptions import GeminiTruncatedError
+from app.core.metrics import get_metrics
+from app.models import Dish
+from app.models.enums import Difficulty
+from app.models.user import CookSchedule, MealSelection, UserPreferences
+from app.repositories.dish_library import SQLiteDishLibraryRepository
+from app.services.ai.encoding import FULL_MENU_ENCODING
+from app.services.dish_library import DishLibrary
+from app.services.menu_service import MenuService
+
+
+def _preferences() -> UserPreferences:
+    dinner = MealSelection(dinner=True)
+    empty = MealSelection()
+    return UserPreferences(
+        numPeople=2,
+        budget=120,
+        difficulty=Difficulty.easy,
+        cookSchedule=CookSchedule(
+            monday=dinner,
+            tuesday=dinner,
+            wednesday=dinner,
+            thursday=empty,
+            friday=dinner,
+            saturday=empty,
+            sunday=empty,
+        ),
+    )
+
+
+def _dish(name: str) -> dict:
+    return {
+        "name": name,
+        "ingredients": [{"name": "chicken breast", "quantity": 200, "unit": "g", "category": "proteins"}],
+        "instructions": "1. Cook.",
+        "estimatedTime": 20,
+        "servings": 2,
+        "difficulty": "easy",
+        "totalCalories": 500,
+    }
+
+
+class FakeClient:
+    """Stand-in Gemini client answering outline and per-day structure prompts."""
+
+    def __init__(self) -> None:
+        self.structure_calls: list[list[str]] = []
+        self.discarded: list[str] = []
+        self.active = 0
+        self.max_active = 0
+
+    async def discard_json(self, prompt: str) -> None:
+        self.discarded.append(prompt)
+
+    async def generate_json(self, prompt: str) -> str:
+        if prompt.startswith("You are a professional chef"):
+            outline = {day: {"dinner": [f"{day} stew"]} for day in ("monday", "tuesday", "wednesday", "friday")}
+            return json.dumps({"mealOutline": outline, "draftShoppingList": [{"name": "chicken breast", "category": "proteins"}]})
+
+        match = re.search(r"return ONLY these day keys: (\[[^\]]*\])", prompt)
+        days = json.loads(match.group(1)) if match else ["monday", "tuesday", "wednesday", "friday"]
+        self.structure_calls.append(days)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await anyio.sleep(0.02)
+        self.active -= 1
+        return json.dumps({day: {"dinner": [_dish(f"{day} stew")]} for day in days})
+
+
+@pytest.mark.asyncio
+async def test_generate_fans_out_structure_step_per_day() -> None:
+    client = FakeClient()
+    service = MenuService(client=client, fan_out_group_size=1, fan_out_concurrency=2)
+
+    book = await service.generate(_preferences())
+
+    assert sorted(client.structure_calls) == [["friday"], ["monday"], ["tuesday"], ["wednesday"]]
+    assert client.max_active == 2
+    assert book.menus.monday.dinner[0].name == "monday stew"
+    assert book.menus.friday.dinner[0].id == "fri-dinner-001"
+    assert book.menus.thursday.dinner == []
+
+
+@pytest.mark.asyncio
+async def test_generate_without_fan_out_uses_single_request() -> None:
+    client = FakeClient()
+    service = MenuService(client=client, fan_out_group_size=0)
+
+    book = await service.generate(_preferences())
+
+    assert client.structure_calls == [["monday", "tuesday", "wednesday", "friday"]]
+    assert book.menus.wednesday.dinner[0].name == "wednesday stew"
+
+
+@pytest.mark.asyncio
+async def test_complete_response_is_parsed_in_one_pass() -> None:
+    metrics = get_metrics()
+    before = metrics.value("omenu_parse_chars_total", mode="incremental")
+    service = MenuService(client=FakeClient(), fan_out_group_size=0)
+
+    book = await service.generate(_preferences())
+
+    assert book.menus.friday.dinner[0].name == "friday stew"
+    assert metrics.value("omenu_parse_chars_total", mode="incremental") == before
+
+
+class StreamingFakeClient(FakeClient):
+    """Fake client that also streams the structure response in small chunks."""
+
+    async def generate_json_stream(self, prompt: str):
+        text = await self.generate_json(prompt)
+        for start in range(0, len(text), 40):
+            yield text[start : start + 40]
+
+
+@pytest.mark.asyncio
+async def test_generate_reports_outline_and_streamed_days() -> None:
+    events: list[tuple[str, dict]] = []
+
+    async def on_progress(stage: str, payload: dict) -> None:
+        events.append((stage, payload))
+
+    service = MenuService(client=StreamingFakeClient(), fan_out_group_size=0)
+    book = await service.generate(_preferences(), on_progress=on_progress)
+
+    stages = [stage for stage, _ in events]
+    assert stages == ["outline", "draft_shopping_list", "day", "day", "day", "day", "structured"]
+    assert events[0][1]["mealOutline"]["monday"] == {"dinner": ["monday stew"]}
+    assert [payload["day"] for stage, payload in events if stage == "day"] == [
+        "monday",
+        "tuesday",
+        "wednesday",
+        "friday",
+    ]
+    first_day = events[2][1]["menu"]
+    assert first_day["dinner"][0]["id"] == "mon-dinner-001"
+    assert first_day["dinner"][0] == book.menus.monday.dinner[0].model_dump(mode="json")
+
+
+class TruncatingFakeClient(FakeClient):
+    """Fake client whose first structure response stops mid-way through Wednesday."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.truncated = False
+
+    async def generate_json(self, prompt: str) -> str:
+        text = await super().generate_json(prompt)
+        if self.truncated or prompt.startswith("You are a professional chef"):
+            return text
+        self.truncated = True
+        cut = text.index('"wednesday"') + 40
+        raise GeminiTruncatedError(partial_text=text[:cut])
+
+
+@pytest.mark.asyncio
+async def test_generate_continues_only_missing_days_after_truncation() -> None:
+    client = TruncatingFakeClient()
+    service = MenuService(client=client, fan_out_group_size=0)
+
+    book = await service.generate(_preferences())
+
+    assert client.structure_calls == [
+        ["monday", "tuesday", "wednesday", "friday"],
+        ["wednesday", "friday"],
+    ]
+    assert book.menus.monday.dinner[0].name == "monday stew"
+    assert book.menus.wednesday.dinner[0].name == "wednesday stew"
+    assert book.menus.friday.dinner[0].id == "fri-dinner-001"
+
+
+class PatchFakeClient(FakeClient):
+    """Fake client answering modification prompts with a one-slot patch."""
+
+    async def generate_json(self, prompt: str) -> str:
+        if "Return ONLY the changed slots" in prompt:
+            return json.dumps(
+                {
+                    "changes": [
+                        {"day": "tuesday", "meal": "dinner", "dishes": [_dish("Veggie curry")]},
+                        {"day": "funday", "meal": "dinner", "dishes": []},
+                    ]
+                }
+            )
+        return await super().generate_json(prompt)
+
+
+@pytest.mark.asyncio
+async def test_incremental_modify_only_replaces_patched_slots() -> None:
+    service = MenuService(client=PatchFakeClient(), fan_out_group_size=0)
+    book = await service.generate(_preferences())
+    book.menus.monday.dinner[0].id = "kept-id"
+
+    modified = await service.modify(book.id, "Swap Tuesday dinner", book, incremental=True)
+
+    assert modified.menus.tuesday.dinner[0].name == "Veggie curry"
+    assert modified.menus.tuesday.dinner[0].id == "tue-dinner-001"
+    assert modified.menus.monday.dinner == book.menus.monday.dinner
+    assert modified.menus.monday.dinner[0].id == "kept-id"
+
+
+class CompactModifyFakeClient(FakeClient):
+    """Fake client answering full modifications in the compact row encoding."""
+
+    async def generate_json(self, prompt: str) -> str:
+        if "Return the whole modified plan" in prompt:
+            menus = self.book.menus.model_dump(mode="json")
+            menus["tuesday"]["dinner"] = [_dish("Veggie curry")]
+            return json.dumps(FULL_MENU_ENCODING.encode(menus))
+        return await super().generate_json(prompt)
+
+
+@pytest.mark.asyncio
+async def test_full_modify_decodes_compact_rows() -> None:
+    client = CompactModifyFakeClient()
+    service = MenuService(client=client, fan_out_group_size=0)
+    book = await service.generate(_preferences())
+    client.book = book
+
+    modified = await service.modify(book.id, "Swap Tuesday dinner", book, incremental=False)
+
+    assert modified.menus.tuesday.dinner[0].name == "Veggie curry"
+    assert modified.menus.monday.dinner[0].name == book.menus.monday.dinner[0].name
+    assert modified.menus.monday.dinner[0].ingredients == book.menus.monday.dinner[0].ingredients
+
+
+class MisalignedModifyFakeClient(FakeClient):
+    """Fake client whose compact-prompt answer has a row with too many columns."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.modify_prompts: list[str] = []
+
+    async def generate_json(self, prompt: str) -> str:
+        if "Return the whole modified plan" in prompt:
+            self.modify_prompts.append(prompt)
+            menus = self.book.menus.model_dump(mode="json")
+            if "[dish rows]" in prompt:
+                encoded = FULL_MENU_ENCODING.encode(menus)
+                encoded["monday"]["dinner"][0].extend(["extra", "columns"])
+                return json.dumps(encoded)
+            menus["tuesday"]["dinner"] = [_dish("Veggie curry")]
+            return json.dumps(menus)
+        return await super().generate_json(prompt)
+
+
+@pytest.mark.asyncio
+async def test_full_modify_retries_verbose_when_compact_answer_is_misaligned() -> None:
+    client = MisalignedModifyFakeClient()
+    service = MenuService(client=client, fan_out_group_size=0)
+    book = await service.generate(_preferences())
+    client.book = book
+
+    modified = await service.modify(book.id, "Swap Tuesday dinner", book, incremental=False)
+
+    assert len(client.modify_prompts) == 2
+    assert "[dish objects]" in client.modify_prompts[1]
+    # The rejected compact answer is evicted so it is not replayed from the cache.
+    assert client.discarded == client.modify_prompts[:1]
+    assert modified.menus.tuesday.dinner[0].name == "Veggie curry"
+    assert modified.menus.monday.dinner[0].name == book.menus.monday.dinner[0].name
+
+
+def _library(tmp_path, *names: str, servings: int = 2) -> DishLibrary:
+    library = DishLibrary(SQLiteDishLibraryRepository(tmp_path / "dishes.sqlite3"), similarity=0.8)
+    library.add_many(
+        [
+            (Dish(id="x", source="ai", **{**_dish(name), "servings": servings}), "dinner")
+            for name in names
+        ]
+    )
+    return library
+
+
+@pytest.mark.asyncio
+async def test_generate_only_structures_dishes_missing_from_library(tmp_path) -> None:
+    library = _library(tmp_path, "Monday Stew", servings=1)
+    client = FakeClient()
+    service = MenuService(client=client, fan_out_group_size=1, library=library)
+
+    book = await service.generate(_preferences())
+
+    assert sorted(client.structure_calls) == [["friday"], ["tuesday"], ["wednesday"]]
+    monday = book.menus.monday.dinner[0]
+    assert (monday.name, monday.id, monday.servings) == ("Monday Stew", "mon-dinner-001", 2)
+    assert monday.ingredients[0].quantity == 400
+    assert book.menus.tuesday.dinner[0].name == "tuesday stew"
+    assert len(library) == 4
+
+    client.structure_calls.clear()
+    await service.generate(_preferences())
+    assert client.structure_calls == []
+
+
+@pytest.mark.asyncio
+async def test_generate_drops_dishes_written_for_meals_served_from_library(tmp_path) -> None:
+    library = _library(tmp_path, "monday stew", "tuesday stew")
+    service = MenuService(client=FakeClient(), fan_out_group_size=0, library=library)
+
+    book = await service.generate(_preferences())
+
+    # The single request still answers every day; reused meals keep only their dish.
+    assert [len(book.menus.monday.dinner), len(book.menus.wednesday.dinner)] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_modify_only_adds_changed_dishes_to_library(tmp_path) -> None:
+    library = _library(tmp_path)
+    service = MenuService(client=PatchFakeClient(), fan_out_group_size=0, library=library)
+    book = await service.generate(_preferences())
+    assert [entry.uses for entry in library.find()] == [1, 1, 1, 1]
+
+    await service.modify(book.id, "Swap Tuesday dinner", book, incremental=True)
+
+    assert library.find(ingredients=["chicken breast"])[0].uses == 1
+    assert {entry.key: entry.uses for entry in library.find()}["veggie curry"] == 1
+    assert len(library) == 5
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.v1 import shopping as shopping_router
+from app.core.metrics import MetricsRegistry, get_metrics, timed_stage
+from app.services.ai import client as client_module
+from app.services.ai.client import GeminiClient
+
+
+def test_registry_renders_prometheus_text() -> None:
+    registry = MetricsRegistry()
+    registry.describe("jobs_total", "counter", "Jobs run.")
+    registry.inc("jobs_total", status="ok")
+    registry.inc("jobs_total", 2, status="ok")
+    registry.describe("latency_seconds", "histogram", "Latency.", buckets=(0.1, 1.0))
+    registry.observe("latency_seconds", 0.5, stage='say "hi"')
+
+    text = registry.render()
+
+    assert "# HELP jobs_total Jobs run.\n# TYPE jobs_total counter\n" in text
+    assert 'jobs_total{status="ok"} 3\n' in text
+    assert 'latency_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 0\n' in text
+    assert 'latency_seconds_bucket{stage="say \\"hi\\"",le="1"} 1\n' in text
+    assert 'latency_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 1\n' in text
+    assert 'latency_seconds_count{stage="say \\"hi\\""} 1\n' in text
+
+
+@pytest.mark.asyncio
+async def test_client_records_usage_and_finish_reason(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    client = GeminiClient(model_name="gemini-metrics-test")
+    response = SimpleNamespace(
+        candidates=[
+            SimpleNamespace(
+                content=SimpleNamespace(parts=[SimpleNamespace(text='{"ok": true}')]),
+                finish_reason=SimpleNamespace(name="STOP"),
+            )
+        ],
+        usage_metadata=SimpleNamespace(prompt_token_count=12, candidates_token_count=5),
+    )
+
+    async def generate_content(**kwargs):
+        return response
+
+    client._client = SimpleNamespace(
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+    )
+    metrics = get_metrics()
+    model = "gemini-metrics-test"
+
+    assert await client.generate_json("prompt") == '{"ok": true}'
+
+    assert metrics.value("omenu_gemini_requests_total", model=model, finish_reason="STOP") == 1
+    assert metrics.value("omenu_gemini_tokens_total", model=model, kind="prompt") == 12
+    assert metrics.value("omenu_gemini_tokens_total", model=model, kind="response") == 5
+    assert metrics.value("omenu_gemini_chars_total", model=model, direction="prompt") == len("prompt")
+    assert metrics.histogram_count(
+        "omenu_stage_duration_seconds", stage="gemini", outcome="ok", model=model
+    ) == 1
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_and_metrics_endpoint(async_client, monkeypatch) -> None:
+    class FakeService:
+        def update(self, shopping_list, previous_menus, menus):  # noqa: D401
+            with timed_stage("shopping_update"):
+                return shopping_list
+
+    monkeypatch.setattr(shopping_router, "get_shopping_service", lambda: FakeService())
+    day = {"breakfast": [], "lunch": [], "dinner": []}
+    days = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    menus = {name: day for name in days}
+    shopping_list = {
+        "id": "sl_1",
+        "menuBookId": "mb_1",
+        "createdAt": "2025-01-01T00:00:00Z",
+        "items": [],
+    }
+
+    response = await async_client.post(
+        "/api/shopping-lists/update",
+        json={"shoppingList": shopping_list, "previousMenus": menus, "menus": menus},
+    )
+
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert "shopping_update;dur=" in timing
+    assert "total;dur=" in timing
+
+    exposition = await async_client.get("/api/metrics")
+    assert exposition.status_code == 200
+    assert exposition.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'omenu_stage_duration_seconds_count{outcome="ok",stage="shopping_update"}' in exposition.text
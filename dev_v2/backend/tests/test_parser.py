@@ -0,0 +1,44 @@
+import pytest
+
+from app.core.exceptions import ParseError
+from app.services.ai.parser import IncrementalJSONParser, ResponseParser
+
+
+def test_incremental_parser_emits_containers_as_they_close() -> None:
+    parser = IncrementalJSONParser()
+    assert parser.feed('Here you go:\n```json\n{"monday": {"lunch": [{"na') == []
+    assert parser.feed('me": "Soup"}]}, "tues') == [
+        (("monday", "lunch", 0), {"name": "Soup"}),
+        (("monday", "lunch"), [{"name": "Soup"}]),
+        (("monday",), {"lunch": [{"name": "Soup"}]}),
+    ]
+    assert parser.feed('day": {"dinner": []}, "count": 1') == [
+        (("tuesday", "dinner"), []),
+        (("tuesday",), {"dinner": []}),
+    ]
+    with pytest.raises(ParseError):
+        parser.result()
+    events = parser.feed('2, "note": "say \\"hi\\"", "ok": nu')
+    assert events == []
+    assert parser.feed("ll}\n```") == [
+        ((), {"monday": {"lunch": [{"name": "Soup"}]}, "tuesday": {"dinner": []}, "count": 12, "note": 'say "hi"', "ok": None})
+    ]
+    assert parser.feed(', "late": 1}') == []
+    assert parser.result()["count"] == 12
+
+
+def test_incremental_parser_roots_at_the_object_after_bracketed_prose() -> None:
+    parser = IncrementalJSONParser()
+    assert parser.feed("Here is the plan [JSON") == []
+    assert parser.feed(']: {"a": [1]}') == [(("a",), [1]), ((), {"a": [1]})]
+
+    fenced = IncrementalJSONParser()
+    assert fenced.feed("```js") == []
+    assert fenced.feed('on\n[{"a": 1}]\n```') == [((0,), {"a": 1}), ((), [{"a": 1}])]
+
+
+def test_parse_json_skips_prose_and_fences() -> None:
+    assert ResponseParser.parse_json('```json\n{"a": [1, 2]}\n```') == {"a": [1, 2]}
+    assert ResponseParser.parse_json('Sure! {"a": 1} Enjoy.') == {"a": 1}
+    with pytest.raises(ParseError):
+        ResponseParser.parse_json("no json here")
@@ -0,0 +1,223 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import anyio
+import pytest
+
+from app.api.v1 import menu_books as menu_books_router
+from app.core.exceptions import ParseError
+from app.models import MenuBookStatus, ShoppingItem, ShoppingList, UserPreferences, UserState
+from app.repositories import (
+    AsyncUserStateRepository,
+    SQLiteUserStateRepository,
+    UserStateRepository,
+)
+from app.repositories.precomputed import PrecomputedMenuBookRepository
+from app.services.menu_service import MenuService
+from app.services.precompute import MenuBookPrecomputer
+
+WEEK = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def make_preferences(num_people: int = 2) -> UserPreferences:
+    day = {"breakfast": False, "lunch": False, "dinner": True}
+    return UserPreferences(
+        numPeople=num_people,
+        budget=120,
+        difficulty="easy",
+        cookSchedule={d: day for d in WEEK},
+    )
+
+
+class FakeMenuService(MenuService):
+    def __init__(self, calls: list[UserPreferences], error: Exception | None = None) -> None:
+        super().__init__(client=object())  # type: ignore[arg-type]
+        self._calls = calls
+        self._error = error
+
+    async def generate(self, preferences, *, book_id=None, on_progress=None):
+        self._calls.append(preferences)
+        await anyio.sleep(0.01)
+        if self._error is not None:
+            raise self._error
+        return self.placeholder_book(preferences).model_copy(
+            update={"status": MenuBookStatus.ready}
+        )
+
+
+class FakeShoppingService:
+    async def generate(self, menu_book_id, menus):
+        return ShoppingList(
+            id="sl_precomputed",
+            menuBookId=menu_book_id,
+            createdAt=datetime.now(timezone.utc),
+            items=[
+                ShoppingItem(id="item_1", name="rice", category="grains", totalQuantity=1, unit="kg")
+            ],
+        )
+
+
+def make_precomputer(tmp_path, calls, now, error=None) -> MenuBookPrecomputer:
+    user_state = AsyncUserStateRepository(UserStateRepository(tmp_path / "state.json"))
+    user_state.repository.save(UserState(preferences=make_preferences()))
+    return MenuBookPrecomputer(
+        repository=PrecomputedMenuBookRepository(tmp_path / "precomputed"),
+        user_state=user_state,
+        service_factory=lambda: FakeMenuService(calls, error),
+        shopping_factory=FakeShoppingService,
+        enabled=True,
+        active_days=14,
+        clock=lambda: now[0],
+    )
+
+
+@pytest.mark.asyncio
+async def test_precomputed_book_is_served_once_for_unchanged_preferences(tmp_path) -> None:
+    now = [datetime(2026, 1, 5, 3, tzinfo=timezone.utc)]
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now)
+
+    assert await precomputer.run_once() == 1
+    assert await precomputer.run_once() == 0
+    assert len(calls) == 1
+
+    now[0] += timedelta(hours=5)
+    book = await precomputer.take(make_preferences())
+
+    assert book is not None
+    assert book.createdAt == now[0]
+    assert [item.name for item in book.shoppingList.items] == ["rice"]
+    assert book.shoppingList.menuBookId == book.id
+    assert await precomputer.take(make_preferences()) is None
+
+
+@pytest.mark.asyncio
+async def test_precomputed_book_is_discarded_when_preferences_changed(tmp_path) -> None:
+    now = [datetime(2026, 1, 5, 3, tzinfo=timezone.utc)]
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now)
+    await precomputer.run_once()
+
+    assert await precomputer.take(make_preferences(num_people=4)) is None
+    assert await precomputer.take(make_preferences()) is None
+
+
+@pytest.mark.asyncio
+async def test_books_are_made_for_next_week_and_expire_after_it(tmp_path) -> None:
+    now = [datetime(2026, 1, 8, 12, tzinfo=timezone.utc)]  # a Thursday
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now)
+    await precomputer.run_once()
+    assert precomputer._repository.get("default").weekStart.isoformat() == "2026-01-12"
+
+    now[0] += timedelta(days=2)
+    assert await precomputer.run_once() == 0
+    now[0] += timedelta(days=7)
+    assert await precomputer.run_once() == 1
+    now[0] += timedelta(days=14)
+    assert await precomputer.take(make_preferences()) is None
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_sharing_storage_generate_each_week_once(tmp_path) -> None:
+    now = [datetime(2026, 1, 5, 3, tzinfo=timezone.utc)]
+    calls: list[UserPreferences] = []
+    workers = [make_precomputer(tmp_path, calls, now) for _ in range(3)]
+
+    async with anyio.create_task_group() as tg:
+        for worker in workers:
+            tg.start_soon(worker.run_once)
+
+    assert len(calls) == 1
+    # Serving the book does not make another worker generate the week again.
+    assert await workers[1].take(make_preferences()) is not None
+    assert await workers[2].run_once() == 0
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_inactive_users_are_skipped(tmp_path) -> None:
+    now = [datetime(2026, 1, 5, 3, tzinfo=timezone.utc)]
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now)
+    stale = (now[0] - timedelta(days=30)).timestamp()
+    os.utime(tmp_path / "state.json", (stale, stale))
+
+    assert await precomputer.run_once() == 0
+    assert calls == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+async def test_users_seen_without_saving_are_active(tmp_path, backend) -> None:
+    now = [datetime.now(timezone.utc)]
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now)
+    stale = (now[0] - timedelta(days=30)).timestamp()
+    if backend == "sqlite":
+        store = SQLiteUserStateRepository(tmp_path / "state.sqlite3")
+        store.save(UserState(preferences=make_preferences()))
+        with closing(sqlite3.connect(tmp_path / "state.sqlite3")) as conn, conn:
+            conn.execute("UPDATE users SET updated_at = ?", (stale,))
+        precomputer._user_state = AsyncUserStateRepository(store)
+    else:
+        os.utime(tmp_path / "state.json", (stale, stale))
+
+    # Saved long ago and only read since.
+    assert await precomputer.run_once() == 0
+    await precomputer._user_state.mark_seen()
+    assert await precomputer.run_once() == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_precomputation_is_skipped(tmp_path) -> None:
+    now = [datetime(2026, 1, 5, 3, tzinfo=timezone.utc)]
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now, error=ParseError("bad data"))
+
+    assert await precomputer.run_once() == 0
+    assert await precomputer.take(make_preferences()) is None
+    # The failed week's claim was released, so the next pass retries it.
+    precomputer._service_factory = lambda: FakeMenuService(calls)
+    assert await precomputer.run_once() == 1
+
+
+def test_off_peak_window_may_wrap_midnight() -> None:
+    precomputer = MenuBookPrecomputer(
+        repository=object(),  # type: ignore[arg-type]
+        user_state=object(),  # type: ignore[arg-type]
+        start_hour=22,
+        end_hour=4,
+    )
+    local = datetime.now().astimezone().tzinfo
+
+    assert precomputer.in_off_peak(datetime(2026, 1, 5, 23, tzinfo=local))
+    assert precomputer.in_off_peak(datetime(2026, 1, 5, 3, tzinfo=local))
+    assert not precomputer.in_off_peak(datetime(2026, 1, 5, 12, tzinfo=local))
+
+
+@pytest.mark.asyncio
+async def test_generate_route_serves_precomputed_book(async_client, monkeypatch, tmp_path) -> None:
+    now = [datetime(2026, 1, 5, 3, tzinfo=timezone.utc)]
+    calls: list[UserPreferences] = []
+    precomputer = make_precomputer(tmp_path, calls, now)
+    await precomputer.run_once()
+    monkeypatch.setattr(menu_books_router, "get_menu_book_precomputer", lambda: precomputer)
+    monkeypatch.setattr(
+        menu_books_router, "get_async_user_state_repository", lambda: precomputer._user_state
+    )
+
+    def unexpected_service():
+        raise AssertionError("generation should not run")
+
+    monkeypatch.setattr(menu_books_router, "get_menu_service", unexpected_service)
+
+    response = await async_client.post(
+        "/api/menu-books/generate", json=make_preferences().model_dump(mode="json")
+    )
+
+    assert response.status_code == 200
+    assert response.json()["shoppingList"]["items"][0]["name"] == "rice"
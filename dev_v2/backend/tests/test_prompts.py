@@ -1,10 +1,14 @@
 from datetime import datetime, timezone
 
+import pytest
+
+from app.core.exceptions import ParseError
 from app.models.dish import Dish, Ingredient
 from app.models.enums import Difficulty, DishSource, MenuBookStatus
 from app.models.menu import Menu, MenuBook, WeekMenus
 from app.models.shopping import ShoppingList
 from app.models.user import CookSchedule, MealSelection, UserPreferences
+from app.services.ai.encoding import FULL_MENU_ENCODING, estimate_tokens
 from app.services.ai.prompts import PromptBuilder
 
 
@@ -100,8 +104,79 @@ def test_modification_prompt_includes_request() -> None:
     assert "RETURN ONLY THE MODIFIED JSON OBJECT" in prompt
 
 
+def _ingredient_rows(menus: WeekMenus) -> list[dict]:
+    return [
+        ingredient.model_dump(mode="json")
+        for _, menu in menus
+        for dish in menu.breakfast + menu.lunch + menu.dinner
+        for ingredient in dish.ingredients
+    ]
+
+
 def test_shopping_list_prompt_contains_rules() -> None:
-    menus = _sample_menu_book().menus
-    prompt = PromptBuilder().shopping_list(menus)
-    assert "Generate a consolidated shopping list" in prompt
+    rows = _ingredient_rows(_sample_menu_book().menus)
+    prompt = PromptBuilder().shopping_list_from_ingredients(rows)
+    assert "Consolidate these recipe ingredient lines" in prompt
     assert "Valid categories" in prompt
+
+
+def test_full_menu_encoding_round_trips() -> None:
+    menus = _sample_menu_book().menus.model_dump(mode="json")
+    encoded = FULL_MENU_ENCODING.encode(menus)
+
+    assert list(encoded) == ["monday"]
+    assert list(encoded["monday"]) == ["lunch"]
+    decoded = FULL_MENU_ENCODING.decode({"menus": encoded})
+    dish = {
+        key: value
+        for key, value in menus["monday"]["lunch"][0].items()
+        if key not in ("id", "source", "notes")
+    }
+    assert decoded["monday"]["lunch"] == [dish]
+    assert decoded["sunday"] == {"breakfast": [], "lunch": [], "dinner": []}
+    # Dishes answered in the verbose shape pass through unchanged.
+    assert FULL_MENU_ENCODING.decode({"monday": {"lunch": [dish]}})["monday"]["lunch"] == [dish]
+
+
+def test_full_menu_encoding_rejects_misaligned_rows() -> None:
+    too_long = ["Soup", [], "Simmer.", 20, 2, "easy", 300, "", "extra"]
+    shifted = ["Soup", "Simmer.", [], 20]
+    wide_ingredient = ["Soup", [["Leek", 1, "piece", "produce", "extra"]]]
+
+    for row in (too_long, shifted, wide_ingredient, []):
+        with pytest.raises(ParseError):
+            FULL_MENU_ENCODING.decode({"monday": {"lunch": [row]}})
+
+
+def test_compact_prompts_drop_unneeded_fields() -> None:
+    book = _sample_menu_book()
+    shopping = PromptBuilder().shopping_list_from_ingredients(_ingredient_rows(book.menus))
+    assert "Grill chicken" not in shopping
+    assert '["chicken",2.0,"breasts","proteins"]' in shopping
+
+    modification = PromptBuilder().modification("Add more veggies", book.menus.model_dump(), book.preferences)
+    assert "Grill chicken" in modification
+    assert '"estimatedTime"' not in modification
+
+
+def test_verbose_modification_prompt_sends_dish_objects() -> None:
+    book = _sample_menu_book()
+    prompt = PromptBuilder().modification(
+        "Add more veggies", book.menus.model_dump(), book.preferences, compact=False
+    )
+    assert '"estimatedTime"' in prompt
+    assert '"id"' not in prompt
+    assert "[dish rows]" not in prompt
+
+
+def test_patch_prompt_falls_back_to_leaner_encoding_over_budget() -> None:
+    book = _sample_menu_book()
+    builder = PromptBuilder()
+    full = builder.modification_patch("Swap lunch", book.menus.model_dump(), book.preferences, max_tokens=0)
+    budget = builder.estimate_tokens(full) - 1
+    lean = builder.modification_patch("Swap lunch", book.menus.model_dump(), book.preferences, max_tokens=budget)
+
+    assert '"chicken",2.0' in full
+    assert '"chicken",2.0' not in lean
+    assert '["Grilled Chicken Bowl"]' in lean
+    assert estimate_tokens(lean) < estimate_tokens(full)
@@ -0,0 +1,104 @@
+import anyio
+import pytest
+
+from app.core.exceptions import GeminiQuotaExceededError
+from app.core.metrics import get_metrics
+from app.services.ai import client as client_module
+from app.services.ai import rate_limit as rate_limit_module
+from app.services.ai.client import GeminiClient
+from app.services.ai.rate_limit import (
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RateLimits,
+    SQLiteRateLimitBackend,
+)
+from app.services.ai.resilience import deadline_budget
+
+
+def test_buckets_start_full_and_queue_callers_behind_the_quota() -> None:
+    backend = MemoryRateLimitBackend()
+    limits = RateLimits(rpm=2, tpm=600)
+
+    first = backend.reserve("key", limits, 300)
+    second = backend.reserve("key", limits, 100)
+    third = backend.reserve("key", limits, 100)
+
+    assert first.wait_seconds == 0 and first.token_headroom == pytest.approx(0.5)
+    assert second.wait_seconds == 0 and second.request_headroom == pytest.approx(0.0, abs=1e-3)
+    # One request refills every 30 seconds at 2 RPM.
+    assert third.wait_seconds == pytest.approx(30, abs=0.1)
+    assert third.request_headroom < 0
+    assert backend.reserve("other", limits, 100).wait_seconds == 0
+
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path) -> None:
+    limits = RateLimits(rpm=1)
+    worker_a = SQLiteRateLimitBackend(tmp_path / "quota.sqlite3")
+    worker_b = SQLiteRateLimitBackend(tmp_path / "quota.sqlite3")
+
+    assert worker_a.reserve("key", limits, 10).wait_seconds == 0
+    assert worker_b.reserve("key", limits, 10).wait_seconds == pytest.approx(60, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_client_waits_for_quota_instead_of_failing(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    limiter = RateLimiter(MemoryRateLimitBackend(), RateLimits(rpm=1))
+    client = GeminiClient(model_name="gemini-quota-test", rate_limiter=limiter)
+    sleeps: list[float] = []
+    real_sleep = anyio.sleep
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        await real_sleep(0)
+
+    async def fake_call_model(prompt, base_config, timeout):
+        return prompt
+
+    monkeypatch.setattr(rate_limit_module.anyio, "sleep", fake_sleep)
+    monkeypatch.setattr(client, "_call_model", fake_call_model)
+
+    assert await client.generate_json("first") == "first"
+    assert await client.generate_json("second") == "second"
+
+    assert len(sleeps) == 1 and sleeps[0] == pytest.approx(60, abs=0.1)
+    assert get_metrics().value(
+        "omenu_gemini_quota_headroom", model="gemini-quota-test", kind="requests"
+    ) < 0
+
+    with deadline_budget(5):
+        with pytest.raises(GeminiQuotaExceededError):
+            await limiter.acquire("test-key", "gemini-quota-test", "third")
+
+
+@pytest.mark.parametrize("backend_name", ["memory", "sqlite"])
+def test_refused_reservation_leaves_buckets_unchanged(tmp_path, backend_name) -> None:
+    if backend_name == "memory":
+        backend = MemoryRateLimitBackend()
+    else:
+        backend = SQLiteRateLimitBackend(tmp_path / "quota.sqlite3")
+    limits = RateLimits(rpm=1)
+
+    assert backend.reserve("key", limits, 10).wait_seconds == 0
+    for _ in range(3):
+        refused = backend.reserve("key", limits, 10, max_wait=5)
+        assert refused.wait_seconds == pytest.approx(60, abs=0.1)
+
+    # Had the refused calls been taken, this wait would be four minutes.
+    assert backend.reserve("key", limits, 10).wait_seconds == pytest.approx(60, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_quota_refusal_does_not_drain_the_bucket() -> None:
+    backend = MemoryRateLimitBackend()
+    limiter = RateLimiter(backend, RateLimits(rpm=1))
+    await limiter.acquire("test-key", "gemini-refund-test", "first")
+    key = RateLimiter.make_key("test-key", "gemini-refund-test")
+    level = backend._buckets[key][0]
+
+    with deadline_budget(5):
+        for _ in range(3):
+            with pytest.raises(GeminiQuotaExceededError):
+                await limiter.acquire("test-key", "gemini-refund-test", "retry")
+
+    assert backend._buckets[key][0] == level
@@ -0,0 +1,245 @@
+import time
+from contextlib import asynccontextmanager
+
+import anyio
+import pytest
+from google.genai import errors as genai_errors
+
+from app.core.exceptions import (
+    GeminiCircuitOpenError,
+    GeminiOverloadedError,
+    GeminiQuotaExceededError,
+    GeminiSafetyError,
+    GeminiTimeoutError,
+    QueueFullError,
+)
+from app.services.ai import client as client_module
+from app.services.ai.admission import AdmissionController
+from app.services.ai.client import GeminiClient
+from app.services.ai.resilience import CircuitBreaker, RetryPolicy, deadline_budget
+
+NO_WAIT = RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=0.0)
+
+
+def make_client(monkeypatch, **kwargs) -> GeminiClient:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    kwargs.setdefault("retry_policy", NO_WAIT)
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=0))
+    return GeminiClient(model_name="gemini-resilience-test", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_after_the_hinted_delay(monkeypatch) -> None:
+    client = make_client(monkeypatch)
+    calls: list[float] = []
+
+    async def fake_call_model(prompt, base_config, timeout):
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise GeminiOverloadedError(retry_after_seconds=0.05)
+        return "ok"
+
+    monkeypatch.setattr(client, "_call_model", fake_call_model)
+
+    assert await client.generate_json("prompt") == "ok"
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_non_transient_errors_and_exhausted_attempts_are_raised(monkeypatch) -> None:
+    client = make_client(monkeypatch)
+    calls: list[str] = []
+
+    async def safety_block(prompt, base_config, timeout):
+        calls.append(prompt)
+        raise GeminiSafetyError()
+
+    monkeypatch.setattr(client, "_call_model", safety_block)
+    with pytest.raises(GeminiSafetyError):
+        await client.generate_json("blocked")
+    assert calls == ["blocked"]
+
+    async def always_down(prompt, base_config, timeout):
+        calls.append(prompt)
+        raise GeminiOverloadedError()
+
+    monkeypatch.setattr(client, "_call_model", always_down)
+    with pytest.raises(GeminiOverloadedError):
+        await client.generate_json("down")
+    assert calls.count("down") == NO_WAIT.max_attempts
+
+
+def test_backoff_is_jittered_exponential_and_respects_retry_after() -> None:
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    upper = lambda low, high: high  # noqa: E731
+
+    assert [policy.backoff(attempt, rng=upper) for attempt in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 5.0]
+    assert policy.backoff(1, retry_after=3.0, rng=upper) == 3.0
+    assert 0.0 <= policy.backoff(3) <= 4.0
+
+
+def test_circuit_breaker_opens_then_probes_after_reset() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10.0, clock=lambda: now[0])
+
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    with pytest.raises(GeminiCircuitOpenError) as raised:
+        breaker.before_call()
+    assert raised.value.headers == {"Retry-After": "10"}
+
+    now[0] = 10.0
+    breaker.before_call()  # the probe
+    with pytest.raises(GeminiCircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.before_call()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_upstream(monkeypatch) -> None:
+    client = make_client(monkeypatch, breaker=CircuitBreaker(failure_threshold=2))
+    calls: list[str] = []
+
+    async def down(prompt, base_config, timeout):
+        calls.append(prompt)
+        raise GeminiOverloadedError()
+
+    monkeypatch.setattr(client, "_call_model", down)
+    with pytest.raises(GeminiCircuitOpenError):
+        await client.generate_json("prompt")
+    with pytest.raises(GeminiCircuitOpenError):
+        await client.generate_json("prompt")
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_quota_errors_do_not_reset_the_breaker(monkeypatch) -> None:
+    breaker = CircuitBreaker(failure_threshold=3)
+    policy = RetryPolicy(max_attempts=6, base_delay=0.0, max_delay=0.0)
+    client = make_client(monkeypatch, breaker=breaker, retry_policy=policy)
+    calls: list[str] = []
+
+    async def flapping(prompt, base_config, timeout):
+        calls.append(prompt)
+        if len(calls) % 2:
+            raise GeminiOverloadedError()
+        raise GeminiQuotaExceededError()
+
+    monkeypatch.setattr(client, "_call_model", flapping)
+    with pytest.raises(GeminiCircuitOpenError):
+        await client.generate_json("prompt")
+
+    # Overloaded, quota, overloaded, quota, overloaded: three failures open it.
+    assert len(calls) == 5
+    assert breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_fastest_copy_wins(monkeypatch) -> None:
+    client = make_client(monkeypatch, hedge_quantile=0.95)
+    for _ in range(20):
+        client._latencies.record(0.02)
+    calls: list[int] = []
+
+    async def fake_call_model(prompt, base_config, timeout):
+        calls.append(len(calls))
+        await anyio.sleep(5 if len(calls) == 1 else 0.01)
+        return f"copy {len(calls)}"
+
+    monkeypatch.setattr(client, "_call_model", fake_call_model)
+
+    started = time.monotonic()
+    assert await client.generate_json("prompt") == "copy 2"
+    assert time.monotonic() - started < 1
+    assert calls == [0, 1]
+
+
+class RacingAdmission(AdmissionController):
+    """Admits one call and rejects the rest, as if others took the spare slots."""
+
+    def __init__(self) -> None:
+        super().__init__(max_concurrent=2)
+        self.admitted = 0
+
+    @asynccontextmanager
+    async def slot(self, priority=None):
+        if self.admitted:
+            raise QueueFullError()
+        self.admitted += 1
+        yield
+
+
+@pytest.mark.asyncio
+async def test_hedge_rejected_by_admission_is_skipped(monkeypatch) -> None:
+    client = make_client(
+        monkeypatch,
+        hedge_quantile=0.95,
+        admission=RacingAdmission(),
+    )
+    for _ in range(20):
+        client._latencies.record(0.02)
+    calls: list[int] = []
+
+    async def slow_call_model(prompt, base_config, timeout):
+        calls.append(len(calls))
+        await anyio.sleep(0.2)
+        return "primary"
+
+    monkeypatch.setattr(client, "_call_model", slow_call_model)
+
+    assert await client.generate_json("prompt") == "primary"
+    assert calls == [0]
+
+    # A rejected primary surfaces as the queue error itself, not a group.
+    with pytest.raises(QueueFullError):
+        await client.generate_json("another prompt")
+
+
+@pytest.mark.asyncio
+async def test_deadline_budget_bounds_attempts_and_retries(monkeypatch) -> None:
+    client = make_client(monkeypatch, retry_policy=RetryPolicy(base_delay=1.0, max_delay=1.0))
+    timeouts: list[float] = []
+
+    async def down(prompt, base_config, timeout):
+        timeouts.append(timeout)
+        raise GeminiOverloadedError(retry_after_seconds=1.0)
+
+    monkeypatch.setattr(client, "_call_model", down)
+
+    with deadline_budget(0.5):
+        with pytest.raises(GeminiOverloadedError):
+            await client.generate_json("prompt")
+        assert len(timeouts) == 1 and timeouts[0] <= 0.5
+
+        with deadline_budget(10):
+            await anyio.sleep(0.5)
+            with pytest.raises(GeminiTimeoutError):
+                await client.generate_json("prompt")
+
+
+def test_sdk_errors_carry_retry_after_hints() -> None:
+    client = GeminiClient(model_name="gemini-resilience-test")
+    error = genai_errors.ServerError(
+        503,
+        {
+            "error": {
+                "code": 503,
+                "message": "The model is overloaded.",
+                "status": "UNAVAILABLE",
+                "details": [
+                    {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "7s"}
+                ],
+            }
+        },
+    )
+
+    translated = client._translate_error(error)
+
+    assert isinstance(translated, GeminiOverloadedError)
+    assert translated.retry_after_seconds == 7.0
+    assert translated.headers == {"Retry-After": "7"}
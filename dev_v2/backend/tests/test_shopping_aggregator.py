@@ -0,0 +1,173 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import ShoppingItem, ShoppingList, WeekMenus
+from app.services.shopping_aggregator import ShoppingAggregator, canonical_name
+from app.services.shopping_service import ShoppingService
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def _dish(dish_id: str, ingredients: list[tuple[str, float, str, str]]) -> dict:
+    return {
+        "id": dish_id,
+        "name": dish_id,
+        "ingredients": [
+            {"name": name, "quantity": quantity, "unit": unit, "category": category}
+            for name, quantity, unit, category in ingredients
+        ],
+        "instructions": "",
+        "estimatedTime": 10,
+        "servings": 2,
+        "difficulty": "easy",
+        "totalCalories": 0,
+        "source": "ai",
+    }
+
+
+def _menus() -> WeekMenus:
+    menus = {day: {"breakfast": [], "lunch": [], "dinner": []} for day in DAYS}
+    menus["monday"]["dinner"] = [
+        _dish(
+            "mon-dinner-001",
+            [
+                ("Chicken breast", 300, "g", "proteins"),
+                ("Carrots", 2, "", "vegetables"),
+                ("Onion", 1, "count", "vegetables"),
+                ("olive oil", 2, "tbsp", "seasonings"),
+                ("Tofu", 1, "block", "proteins"),
+            ],
+        )
+    ]
+    menus["tuesday"]["dinner"] = [
+        _dish(
+            "tue-dinner-001",
+            [
+                ("chicken breasts", 8, "oz", "proteins"),
+                ("carrot", 1, "piece", "vegetables"),
+                ("onions", 100, "g", "vegetables"),
+                ("milk", 0.5, "cup", "dairy"),
+                ("Milk", 4, "tbsp", "dairy"),
+                ("tofu", 200, "g", "proteins"),
+            ],
+        )
+    ]
+    return WeekMenus(**menus)
+
+
+def test_canonical_name_merges_plurals_and_synonyms() -> None:
+    assert canonical_name("Tomatoes") == canonical_name("tomato")
+    assert canonical_name("Scallions") == "green onion"
+    assert canonical_name("Chickpeas") == canonical_name("garbanzo beans")
+
+
+def test_non_ascii_ingredients_are_kept() -> None:
+    assert canonical_name("Jalapeños") == "jalapeño"
+    assert canonical_name("豆腐") == "豆腐"
+
+    menus = {day: {"breakfast": [], "lunch": [], "dinner": []} for day in DAYS}
+    menus["monday"]["dinner"] = [
+        _dish("mon-dinner-001", [("豆腐", 1, "block", "proteins"), ("Jalapeño", 2, "count", "vegetables")])
+    ]
+    menus["tuesday"]["dinner"] = [
+        _dish("tue-dinner-001", [("豆腐", 1, "block", "proteins"), ("jalapeños", 1, "count", "vegetables")])
+    ]
+    items, unresolved = ShoppingAggregator().aggregate(WeekMenus(**menus))
+    by_name = {item.name: item for item in items}
+
+    assert unresolved == []
+    assert by_name["豆腐"].totalQuantity == 2
+    assert by_name["Jalapeño"].totalQuantity == 3
+
+
+def test_aggregate_sums_quantities_in_target_units() -> None:
+    items, unresolved = ShoppingAggregator().aggregate(_menus())
+    by_name = {item.name: item for item in items}
+
+    assert by_name["Chicken breast"].totalQuantity == 1.2
+    assert by_name["Chicken breast"].unit == "lbs"
+    assert (by_name["Carrots"].totalQuantity, by_name["Carrots"].unit) == (3, "count")
+    assert (by_name["olive oil"].totalQuantity, by_name["olive oil"].unit) == (0, "")
+    assert (by_name["milk"].totalQuantity, by_name["milk"].unit) == (0.8, "cups")
+    assert (by_name["Onion"].totalQuantity, by_name["Onion"].unit) == (2, "count")
+    assert [[row["name"] for row in group] for group in unresolved] == [["Tofu", "tofu"]]
+
+
+def test_piece_counts_round_up_without_float_noise() -> None:
+    menus = {day: {"breakfast": [], "lunch": [], "dinner": []} for day in DAYS}
+    menus["monday"]["dinner"] = [
+        _dish("mon-dinner-001", [("carrot", quantity, "count", "vegetables") for quantity in (0.4, 2.2, 2.2, 2.2)]),
+        _dish("mon-dinner-002", [("leek", 1.5, "count", "vegetables")]),
+    ]
+    items, _ = ShoppingAggregator().aggregate(WeekMenus(**menus))
+
+    assert [(item.name, item.totalQuantity) for item in items] == [("carrot", 7), ("leek", 2)]
+
+
+@pytest.mark.asyncio
+async def test_service_lists_unresolved_names_per_unit_without_llm() -> None:
+    class NoCallClient:
+        async def generate_json(self, prompt: str) -> str:
+            raise AssertionError("Gemini should not be called")
+
+    service = ShoppingService(client=NoCallClient(), llm_fallback=False)
+    shopping_list = await service.generate("mb_test", _menus())
+
+    tofu = [(item.totalQuantity, item.unit) for item in shopping_list.items if item.name == "Tofu"]
+    assert tofu == [(1, "block"), (7.1, "oz")]
+
+
+def test_update_applies_menu_delta_and_keeps_flags() -> None:
+    service = ShoppingService(client=object(), llm_fallback=False)
+    previous = _menus()
+    shopping_list = ShoppingList(
+        id="sl_1",
+        menuBookId="mb_test",
+        createdAt=datetime.now(timezone.utc),
+        items=[
+            ShoppingItem(id="i1", name="Chicken breasts", category="proteins", totalQuantity=1.2, unit="lbs", purchased=True),
+            ShoppingItem(id="i2", name="Carrots", category="vegetables", totalQuantity=3, unit="count"),
+            ShoppingItem(id="i3", name="Milk", category="dairy", totalQuantity=1, unit="cups"),
+            ShoppingItem(id="i4", name="Tofu", category="proteins", totalQuantity=1, unit="block", isManuallyAdded=True),
+        ],
+    )
+    data = previous.model_dump(mode="json")
+    data["tuesday"]["dinner"] = [
+        _dish("tue-dinner-001", [("chicken breast", 16, "oz", "proteins"), ("spinach", 1, "bunch", "vegetables")])
+    ]
+    updated = service.update(shopping_list, previous, WeekMenus(**data))
+
+    by_id = {item.id: item for item in updated.items}
+    assert updated.id == "sl_1"
+    assert (by_id["i1"].totalQuantity, by_id["i1"].unit, by_id["i1"].purchased) == (1.7, "lbs", True)
+    assert by_id["i2"].totalQuantity == 2
+    assert "i3" not in by_id
+    assert by_id["i4"].isManuallyAdded is True
+    assert [(item.name, item.totalQuantity, item.unit) for item in updated.items[-1:]] == [("spinach", 1, "bunch")]
+
+
+def test_update_merges_new_items_into_matching_manual_rows() -> None:
+    service = ShoppingService(client=object(), llm_fallback=False)
+    previous = _menus()
+    shopping_list = ShoppingList(
+        id="sl_1",
+        menuBookId="mb_test",
+        createdAt=datetime.now(timezone.utc),
+        items=[
+            ShoppingItem(id="m1", name="Spinach", category="vegetables", totalQuantity=1, unit="bunch", purchased=True, isManuallyAdded=True),
+            ShoppingItem(id="m2", name="eggs", category="proteins", totalQuantity=12, unit="count", isManuallyAdded=True),
+        ],
+    )
+    data = previous.model_dump(mode="json")
+    data["friday"]["dinner"] = [
+        _dish("fri-dinner-001", [("spinach", 3, "bunch", "vegetables"), ("Egg", 4, "count", "proteins")])
+    ]
+    updated = service.update(shopping_list, previous, WeekMenus(**data))
+
+    assert [item.id for item in updated.items] == ["m1", "m2"]
+    spinach, eggs = updated.items
+    assert (spinach.name, spinach.totalQuantity, spinach.unit) == ("Spinach", 3, "bunch")
+    assert spinach.purchased is True and spinach.isManuallyAdded is True
+    assert (eggs.totalQuantity, eggs.unit, eggs.isManuallyAdded) == (12, "count", True)
+
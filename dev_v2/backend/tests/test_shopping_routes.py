@@ -103,3 +103,30 @@ async def test_generate_shopping_list_timeout(async_client, monkeypatch, sample_
     assert response.status_code == 504
     body = response.json()
     assert body["detail"]["code"] == "GEMINI_TIMEOUT"
+
+
+@pytest.mark.asyncio
+async def test_update_shopping_list_route(async_client, monkeypatch, sample_menus):
+    shopping_list = {
+        "id": "sl_test",
+        "menuBookId": "mb_existing",
+        "createdAt": "2025-01-01T00:00:00Z",
+        "items": [],
+    }
+    calls = []
+
+    class FakeShoppingService:
+        def update(self, shopping_list, previous_menus, menus):  # noqa: D401
+            calls.append((previous_menus, menus))
+            return shopping_list
+
+    monkeypatch.setattr(shopping_router, "get_shopping_service", lambda: FakeShoppingService())
+
+    response = await async_client.post(
+        "/api/shopping-lists/update",
+        json={"shoppingList": shopping_list, "previousMenus": sample_menus, "menus": sample_menus},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["id"] == "sl_test"
+    assert len(calls) == 1
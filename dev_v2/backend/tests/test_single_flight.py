@@ -0,0 +1,62 @@
+import anyio
+import pytest
+
+from app.core.metrics import get_metrics
+
+from app.services.ai import client as client_module
+from app.services.ai.client import GeminiClient
+from app.services.ai.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_upstream_call(monkeypatch) -> None:
+    monkeypatch.setattr(client_module.settings, "gemini_api_key", "test-key")
+    single_flight: SingleFlight[str] = SingleFlight()
+    client = GeminiClient(model_name="gemini-test", single_flight=single_flight)
+    calls: list[str] = []
+
+    async def fake_call_model(prompt, base_config, timeout):
+        calls.append(prompt)
+        await anyio.sleep(0.05)
+        return f"result for {prompt}"
+
+    monkeypatch.setattr(client, "_call_model", fake_call_model)
+
+    results: list[str] = []
+
+    async def run(prompt: str) -> None:
+        results.append(await client.generate_json(prompt))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(run, "same")
+        tg.start_soon(run, "different")
+
+    assert sorted(calls) == ["different", "same"]
+    assert results.count("result for same") == 3
+    assert single_flight.stats() == {"in_flight": 0, "leaders": 2, "collapsed": 2}
+    assert get_metrics().value("omenu_gemini_single_flight_total", outcome="collapsed") >= 2
+    assert "omenu_gemini_single_flight_total" in get_metrics().render()
+
+
+@pytest.mark.asyncio
+async def test_waiters_receive_leader_exception() -> None:
+    single_flight: SingleFlight[str] = SingleFlight()
+    errors: list[Exception] = []
+
+    async def failing() -> str:
+        await anyio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    async def run() -> None:
+        try:
+            await single_flight.do("key", failing)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run)
+        tg.start_soon(run)
+
+    assert len(errors) == 2
+    assert single_flight.stats()["collapsed"] == 1
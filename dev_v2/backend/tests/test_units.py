@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.units import convert, convert_batch, normalize_unit, parse_amount, parse_quantity
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("1 1/2 cups", (1.5, "cup")),
+        ("½ cup", (0.5, "cup")),
+        ("2-3 cloves", (2.0, "clove")),
+        ("about 2 lbs", (2.0, "lb")),
+        ("200g", (200.0, "g")),
+        ("1.5 Tablespoons", (1.5, "tbsp")),
+        (3, (3.0, "")),
+    ],
+)
+def test_parse_amount(text, expected) -> None:
+    assert parse_amount(text) == expected
+
+
+def test_parse_quantity_falls_back_to_default() -> None:
+    assert parse_quantity("to taste") == 0.0
+    assert parse_quantity(None, default=1.0) == 1.0
+    assert parse_quantity("3/4") == 0.75
+
+
+def test_normalize_unit_aliases_and_plurals() -> None:
+    assert [normalize_unit(unit) for unit in ("Pounds", "tsp.", "pieces", "", "Cans", "bunches")] == [
+        "lb",
+        "tsp",
+        "count",
+        "count",
+        "can",
+        "bunch",
+    ]
+
+
+def test_convert_within_and_across_dimensions() -> None:
+    assert convert(2, "lb", "oz") == pytest.approx(32)
+    assert convert(3, "tsp", "tbsp") == pytest.approx(1)
+    assert convert(1, "cup", "g", "all-purpose flour") == pytest.approx(125.4, abs=0.1)
+    assert convert(300, "g", "count", "onion") == pytest.approx(2)
+    assert convert(1, "cup", "g") is None
+    assert convert(1, "can", "g", "tomato") is None
+
+
+def test_convert_batch_reuses_factors_per_unit() -> None:
+    assert convert_batch([1, 2, 0.5], ["cup", "cups", "block"], "tbsp") == [
+        pytest.approx(16),
+        pytest.approx(32),
+        None,
+    ]
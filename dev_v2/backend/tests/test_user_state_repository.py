@@ -0,0 +1,279 @@
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+import anyio
+import pytest
+
+from app.core.exceptions import PreconditionFailedError
+from app.models import MenuBook, MenuBookStatus, UserState
+from app.repositories import (
+    AsyncUserStateRepository,
+    SQLiteUserStateRepository,
+    UserStateRepository,
+    check_precondition,
+    state_etag,
+)
+
+
+def _book(book_id: str) -> MenuBook:
+    day = {"breakfast": [], "lunch": [], "dinner": []}
+    days = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    meals = {"breakfast": False, "lunch": False, "dinner": True}
+    return MenuBook.model_validate(
+        {
+            "id": book_id,
+            "createdAt": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "status": "ready",
+            "preferences": {"cookSchedule": {name: meals for name in days}},
+            "menus": {name: day for name in days},
+            "shoppingList": {
+                "id": f"sl_{book_id}",
+                "menuBookId": book_id,
+                "createdAt": datetime(2025, 1, 1, tzinfo=timezone.utc),
+                "items": [
+                    {
+                        "id": "item_rice",
+                        "name": "rice",
+                        "category": "pantry_staples",
+                        "totalQuantity": 2,
+                        "unit": "cups",
+                    }
+                ],
+            },
+        }
+    )
+
+
+def test_sqlite_repository_round_trips_per_user(tmp_path) -> None:
+    repository = SQLiteUserStateRepository(tmp_path / "state.sqlite3")
+    repository.save(UserState(menuBooks=[_book("mb_a"), _book("mb_b")], currentDayIndex=3), "alice")
+    repository.save(UserState(menuBooks=[_book("mb_c")]), "bob")
+
+    # Reordering and dropping books is reflected; other users are untouched.
+    repository.save(UserState(menuBooks=[_book("mb_b")], currentWeekId="mb_b"), "alice")
+
+    other_process = SQLiteUserStateRepository(tmp_path / "state.sqlite3")
+    alice = other_process.load("alice")
+    assert [book.id for book in alice.menuBooks] == ["mb_b"]
+    assert alice.currentWeekId == "mb_b"
+    assert [book.id for book in other_process.load("bob").menuBooks] == ["mb_c"]
+    assert other_process.load("carol") == UserState()
+
+
+def test_sqlite_repository_migrates_json_state_once(tmp_path) -> None:
+    json_path = tmp_path / "state.json"
+    state = UserState(menuBooks=[_book("mb_legacy")], currentDayIndex=2)
+    json_path.write_text(json.dumps(state.model_dump(mode="json")), encoding="utf-8")
+
+    repository = SQLiteUserStateRepository(tmp_path / "state.sqlite3", json_path=json_path)
+    assert repository.load() == state
+
+    repository.save(UserState())
+    reopened = SQLiteUserStateRepository(tmp_path / "state.sqlite3", json_path=json_path)
+    assert reopened.load() == UserState()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "json":
+        return UserStateRepository(tmp_path / "state.json")
+    return SQLiteUserStateRepository(tmp_path / "state.sqlite3")
+
+
+def test_conditional_save_is_checked_against_the_store(repository, tmp_path) -> None:
+    repository.save(UserState(currentDayIndex=1))
+    seen = state_etag(repository.load())
+
+    # Another worker process with its own repository instance saves first.
+    other = type(repository)(
+        tmp_path / ("state.json" if isinstance(repository, UserStateRepository) else "state.sqlite3")
+    )
+    other.save(UserState(currentDayIndex=2), if_match=seen)
+
+    with pytest.raises(PreconditionFailedError):
+        repository.save(UserState(currentDayIndex=3), if_match=seen)
+    assert repository.load().currentDayIndex == 2
+
+    repository.save(UserState(currentDayIndex=3), if_match="*")
+    assert repository.load().currentDayIndex == 3
+
+
+def test_precondition_accepts_any_listed_or_weak_tag() -> None:
+    current = '"abc"'
+    check_precondition(current, '"other", "abc"')
+    check_precondition(current, 'W/"abc"')
+    check_precondition(current, '"other", *')
+    with pytest.raises(PreconditionFailedError):
+        check_precondition(current, '"other", W/"older"')
+
+
+def test_saving_unchanged_state_writes_nothing(repository, tmp_path) -> None:
+    state = UserState(menuBooks=[_book("mb_a")], currentDayIndex=1)
+    repository.save(state)
+    before = {path: path.stat().st_mtime_ns for path in tmp_path.iterdir()}
+
+    repository.save(state.model_copy(deep=True), if_match=state_etag(state))
+
+    assert {path: path.stat().st_mtime_ns for path in tmp_path.iterdir()} == before
+
+
+def test_conditional_save_does_not_reload_the_stored_state(
+    repository, monkeypatch
+) -> None:
+    repository.save(UserState(menuBooks=[_book("mb_a"), _book("mb_b")]))
+    repository.set_current_day_index(4)
+    seen = state_etag(repository.load())
+
+    def fail(*args, **kwargs):
+        raise AssertionError("stored state was reloaded")
+
+    reader = "_read" if isinstance(repository, UserStateRepository) else "_load"
+    monkeypatch.setattr(type(repository), reader, fail)
+
+    repository.save(UserState(menuBooks=[_book("mb_a")], currentDayIndex=4), if_match=seen)
+    with pytest.raises(PreconditionFailedError):
+        repository.save(UserState(), if_match=seen)
+
+
+def test_sqlite_repository_rebuilds_a_missing_etag(tmp_path) -> None:
+    db_path = tmp_path / "state.sqlite3"
+    repository = SQLiteUserStateRepository(db_path)
+    repository.save(UserState(menuBooks=[_book("mb_a")], currentDayIndex=1))
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.execute("UPDATE users SET etag = NULL")
+
+    seen = state_etag(repository.load())
+    repository.save(UserState(currentDayIndex=2), if_match=seen)
+
+    assert repository.load().currentDayIndex == 2
+
+
+def test_json_repository_keeps_one_file_per_user(tmp_path) -> None:
+    repository = UserStateRepository(tmp_path / "state.json")
+    repository.save(UserState(menuBooks=[_book("mb_a")], currentDayIndex=1))
+    repository.save(UserState(menuBooks=[_book("mb_b")], currentDayIndex=2), "alice")
+    repository.set_current_day_index(5, "alice")
+
+    assert repository.load().currentDayIndex == 1
+    alice = repository.load("alice")
+    assert alice.currentDayIndex == 5
+    assert [book.id for book in alice.menuBooks] == ["mb_b"]
+    assert (tmp_path / "state.alice.json").exists()
+    assert repository.load("bob") == UserState()
+    with pytest.raises(ValueError):
+        repository.load("../alice")
+
+
+def test_partial_updates_touch_only_their_fields(repository) -> None:
+    repository.save(UserState(menuBooks=[_book("mb_a")], currentWeekId="mb_a"))
+
+    repository.set_current_day_index(4)
+    item = repository.set_item_purchased("mb_a", "item_rice", True)
+    assert item is not None and item.purchased
+    assert repository.set_item_purchased("mb_a", "item_missing", True) is None
+    assert repository.set_item_purchased("mb_missing", "item_rice", True) is None
+
+    state = repository.load()
+    assert state.currentDayIndex == 4
+    assert state.currentWeekId == "mb_a"
+    assert state.menuBooks[0].shoppingList.items[0].purchased
+
+
+def test_append_and_page_menu_books(repository) -> None:
+    for book_id in ("mb_a", "mb_b", "mb_c"):
+        repository.append_menu_book(_book(book_id))
+    replaced = _book("mb_b").model_copy(update={"status": MenuBookStatus.generating})
+    repository.append_menu_book(replaced)
+
+    assert [book.id for book in repository.load().menuBooks] == ["mb_a", "mb_b", "mb_c"]
+    page, total = repository.list_menu_books(offset=1, limit=1)
+    assert total == 3
+    assert [(book.id, book.status) for book in page] == [("mb_b", MenuBookStatus.generating)]
+    assert repository.list_menu_books(offset=3)[0] == []
+
+
+def test_json_repository_write_is_atomic(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "state.json"
+    repository = UserStateRepository(path)
+    repository.save(UserState(currentDayIndex=1))
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("app.repositories.user_state.os.replace", crash)
+    with pytest.raises(OSError):
+        repository.save(UserState(currentDayIndex=2))
+
+    assert repository.load().currentDayIndex == 1
+    assert sorted(tmp_path.iterdir()) == [path, tmp_path / "state.json.lock"]
+
+
+class CountingRepository(UserStateRepository):
+    def __init__(self, data_path) -> None:
+        super().__init__(data_path)
+        self.saves = 0
+
+    def save(self, state: UserState, user_id: str = "default", if_match=None) -> None:
+        self.saves += 1
+        super().save(state, user_id, if_match)
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_saves_and_flushes(tmp_path) -> None:
+    inner = CountingRepository(tmp_path / "state.json")
+    repository = AsyncUserStateRepository(inner, write_behind_seconds=0.05)
+
+    async with anyio.create_task_group() as tg:
+        await repository.start(tg)
+        for index in range(5):
+            await repository.save(UserState(currentDayIndex=index))
+        assert inner.saves == 0
+        assert (await repository.load()).currentDayIndex == 4
+
+        await anyio.sleep(0.2)
+        assert inner.saves == 1
+        assert inner.load().currentDayIndex == 4
+
+        await repository.save(UserState(currentDayIndex=6))
+        await repository.flush()
+        assert inner.saves == 2
+        tg.cancel_scope.cancel()
+
+    assert inner.load().currentDayIndex == 6
+
+
+class FailingRepository(UserStateRepository):
+    def __init__(self, data_path, failing_user: str) -> None:
+        super().__init__(data_path)
+        self.failing_user = failing_user
+
+    def save(self, state: UserState, user_id: str = "default", if_match=None) -> None:
+        if user_id == self.failing_user:
+            raise OSError("disk full")
+        super().save(state, user_id, if_match)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_every_unwritten_state_buffered(tmp_path) -> None:
+    inner = FailingRepository(tmp_path / "state.json", failing_user="alice")
+    repository = AsyncUserStateRepository(inner, write_behind_seconds=60)
+
+    async with anyio.create_task_group() as tg:
+        await repository.start(tg)
+        await repository.save(UserState(currentDayIndex=1), "alice")
+        await repository.save(UserState(currentDayIndex=2), "bob")
+
+        with pytest.raises(OSError):
+            await repository.flush()
+        assert (await repository.load("alice")).currentDayIndex == 1
+        assert (await repository.load("bob")).currentDayIndex == 2
+
+        inner.failing_user = ""
+        await repository.flush()
+        tg.cancel_scope.cancel()
+
+    assert inner.load("alice").currentDayIndex == 1
+    assert inner.load("bob").currentDayIndex == 2
+
@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.v1 import user_state as user_state_router
+from app.models import MenuBook, UserState
+from app.repositories import AsyncUserStateRepository, SQLiteUserStateRepository
+
+
+def _book(book_id: str) -> dict:
+    day = {"breakfast": [], "lunch": [], "dinner": []}
+    days = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+    meals = {"breakfast": False, "lunch": False, "dinner": True}
+    return MenuBook.model_validate(
+        {
+            "id": book_id,
+            "createdAt": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "status": "ready",
+            "preferences": {"cookSchedule": {name: meals for name in days}},
+            "menus": {name: day for name in days},
+            "shoppingList": {
+                "id": f"sl_{book_id}",
+                "menuBookId": book_id,
+                "createdAt": datetime(2025, 1, 1, tzinfo=timezone.utc),
+                "items": [
+                    {
+                        "id": "item_rice",
+                        "name": "rice",
+                        "category": "pantry_staples",
+                        "totalQuantity": 2,
+                        "unit": "cups",
+                    }
+                ],
+            },
+        }
+    ).model_dump(mode="json")
+
+
+@pytest.fixture
+def repository(monkeypatch, tmp_path) -> SQLiteUserStateRepository:
+    repository = SQLiteUserStateRepository(tmp_path / "state.sqlite3")
+    monkeypatch.setattr(
+        user_state_router,
+        "get_async_user_state_repository",
+        lambda: AsyncUserStateRepository(repository),
+    )
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_patch_current_day(async_client, repository):
+    response = await async_client.patch(
+        "/api/user-state/current-day",
+        json={"currentDayIndex": 5},
+        headers={"X-User-Id": "alice"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"currentDayIndex": 5}
+    assert repository.load("alice").currentDayIndex == 5
+
+    invalid = await async_client.patch("/api/user-state/current-day", json={"currentDayIndex": 7})
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_append_toggle_and_list_menu_books(async_client, repository):
+    for book_id in ("mb_a", "mb_b"):
+        response = await async_client.post("/api/user-state/menu-books", json=_book(book_id))
+        assert response.status_code == 201
+
+    toggled = await async_client.patch(
+        "/api/user-state/menu-books/mb_a/shopping-items/item_rice",
+        json={"purchased": True},
+    )
+    assert toggled.status_code == 200
+    assert toggled.json()["purchased"] is True
+
+    missing = await async_client.patch(
+        "/api/user-state/menu-books/mb_a/shopping-items/item_none",
+        json={"purchased": True},
+    )
+    assert missing.status_code == 404
+    assert missing.json()["detail"]["code"] == "NOT_FOUND"
+
+    page = await async_client.get("/api/user-state/menu-books", params={"limit": 1})
+    assert page.status_code == 200
+    body = page.json()
+    assert body["total"] == 2
+    assert [book["id"] for book in body["items"]] == ["mb_b"]
+
+    state = repository.load()
+    assert isinstance(state, UserState)
+    assert state.menuBooks[0].shoppingList.items[0].purchased
+
+
+@pytest.mark.asyncio
+async def test_user_state_etag_and_conditional_save(async_client, repository):
+    saved = await async_client.put("/api/user-state", json={"currentDayIndex": 2})
+    etag = saved.headers["ETag"]
+
+    loaded = await async_client.get("/api/user-state")
+    assert loaded.headers["ETag"] == etag
+
+    not_modified = await async_client.get("/api/user-state", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    updated = await async_client.put(
+        "/api/user-state", json={"currentDayIndex": 3}, headers={"If-Match": etag}
+    )
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+
+    stale = await async_client.put(
+        "/api/user-state", json={"currentDayIndex": 4}, headers={"If-Match": etag}
+    )
+    assert stale.status_code == 412
+    assert stale.json()["detail"]["code"] == "PRECONDITION_FAILED"
+    assert repository.load().currentDayIndex == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("enabled", [False, True])
+async def test_reads_mark_user_seen_only_when_precomputing(
+    async_client, monkeypatch, repository, enabled
+):
+    seen: list[str] = []
+    monkeypatch.setattr(repository, "mark_seen", seen.append)
+    monkeypatch.setattr(
+        user_state_router,
+        "get_menu_book_precomputer",
+        lambda: SimpleNamespace(enabled=enabled),
+    )
+
+    response = await async_client.get("/api/user-state", headers={"X-User-Id": "u1"})
+
+    assert response.status_code == 200
+    assert seen == (["u1"] if enabled else [])
@@ -1,6 +1,7 @@
 """Synchronous Gemini API client for Vercel serverless functions."""
 
 import os
+from contextlib import contextmanager
 from functools import lru_cache
 
 from _shared.exceptions import (
@@ -9,7 +10,9 @@ from _shared.exceptions import (
     GeminiQuotaExceededError,
     GeminiSafetyError,
     GeminiTimeoutError,
+    ParseError,
 )
+from _shared.cache import ResponseCache, get_response_cache
 
 try:
     import google.genai as genai
@@ -25,9 +28,15 @@ GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT_SECONDS", "120"))
 
 
 class GeminiClient:
-    def __init__(self, model_name: str | None = None, timeout_seconds: float | None = None):
+    def __init__(
+        self,
+        model_name: str | None = None,
+        timeout_seconds: float | None = None,
+        cache: ResponseCache | None = None,
+    ):
         self._model_name = model_name or GEMINI_MODEL
         self._timeout_seconds = timeout_seconds or GEMINI_TIMEOUT
+        self._cache = cache
         self._model = None
         self._client = None
 
@@ -52,6 +61,36 @@ class GeminiClient:
         if not GEMINI_API_KEY:
             raise GeminiError("GEMINI_API_KEY is not configured.")
 
+        base_config = self._build_config(response_mime_type, response_schema)
+
+        cache_key = None
+        if self._cache is not None:
+            cache_key = self._cache.make_key(self._model_name, prompt, base_config, response_schema)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        text = self._call_model(prompt, base_config)
+        if cache_key is not None:
+            self._cache.set(cache_key, text)
+        return text
+
+    def discard_json(self, prompt: str) -> None:
+        """Evict a cached JSON response the caller could not parse, so a retry asks Gemini again."""
+        if self._cache is None:
+            return
+        base_config = self._build_config("application/json", None)
+        self._cache.delete(self._cache.make_key(self._model_name, prompt, base_config, None))
+
+    @contextmanager
+    def discard_on_parse_error(self, prompt: str):
+        try:
+            yield
+        except ParseError:
+            self.discard_json(prompt)
+            raise
+
+    def _build_config(self, response_mime_type: str | None, response_schema) -> dict:
         base_config = {
             "temperature": 0.7,
             "max_output_tokens": 65536,
@@ -61,7 +100,9 @@ class GeminiClient:
             base_config["response_mime_type"] = response_mime_type
         if response_schema:
             base_config["response_schema"] = response_schema
+        return base_config
 
+    def _call_model(self, prompt: str, base_config: dict) -> str:
         try:
             if _USING_NEW_SDK:
                 response = self.client.models.generate_content(
@@ -167,5 +208,5 @@ _client_instance = None
 def get_gemini_client() -> GeminiClient:
     global _client_instance
     if _client_instance is None:
-        _client_instance = GeminiClient()
+        _client_instance = GeminiClient(cache=get_response_cache())
     return _client_instance
@@ -0,0 +1,168 @@
+"""Content-addressed Gemini response cache for Vercel serverless functions."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+
+GEMINI_CACHE_BACKEND = os.environ.get("GEMINI_CACHE_BACKEND", "none").lower()
+GEMINI_CACHE_TTL_SECONDS = float(os.environ.get("GEMINI_CACHE_TTL_SECONDS", "3600"))
+GEMINI_CACHE_MAX_ENTRIES = int(os.environ.get("GEMINI_CACHE_MAX_ENTRIES", "256"))
+GEMINI_CACHE_PATH = os.environ.get("GEMINI_CACHE_PATH", "/tmp/omenu_gemini_cache.sqlite3")
+
+
+class MemoryCacheBackend:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self._ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    def __init__(self, db_path: str, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        self._db_path = db_path
+        self._max_entries = max(1, max_entries)
+        self._ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self._db_path, timeout=5.0, isolation_level=None))
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self._ttl_seconds, now),
+            )
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, config: dict, response_schema=None) -> str:
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "config": {k: v for k, v in config.items() if k != "response_schema"},
+            "schema": response_schema,
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=repr)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        try:
+            value = self._backend.get(key)
+        except Exception:
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            self._backend.set(key, value)
+        except Exception:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._backend.delete(key)
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_cache_instance = None
+_cache_initialized = False
+
+def get_response_cache() -> ResponseCache | None:
+    global _cache_instance, _cache_initialized
+    if not _cache_initialized:
+        _cache_initialized = True
+        if GEMINI_CACHE_BACKEND == "memory":
+            _cache_instance = ResponseCache(
+                MemoryCacheBackend(GEMINI_CACHE_MAX_ENTRIES, GEMINI_CACHE_TTL_SECONDS)
+            )
+        elif GEMINI_CACHE_BACKEND == "sqlite":
+            _cache_instance = ResponseCache(
+                SQLiteCacheBackend(GEMINI_CACHE_PATH, GEMINI_CACHE_MAX_ENTRIES, GEMINI_CACHE_TTL_SECONDS)
+            )
+    return _cache_instance
@@ -24,12 +24,13 @@ class MenuService:
         ingredient_limit = self._estimate_ingredient_limit(preferences)
         outline_prompt = self._prompts.meal_outline(preferences, ingredient_limit)
         outline_response = self._client.generate_json(outline_prompt)
-        outline_payload = self._parser.parse_json(outline_response)
+        with self._client.discard_on_parse_error(outline_prompt):
+            outline_payload = self._parser.parse_json(outline_response)
 
-        meal_outline = outline_payload.get("mealOutline")
-        draft_list = outline_payload.get("draftShoppingList")
-        if not isinstance(meal_outline, dict) or not isinstance(draft_list, list):
-            raise ParseError("Invalid outline payload from AI")
+            meal_outline = outline_payload.get("mealOutline")
+            draft_list = outline_payload.get("draftShoppingList")
+            if not isinstance(meal_outline, dict) or not isinstance(draft_list, list):
+                raise ParseError("Invalid outline payload from AI")
 
         normalized_list = self._normalize_draft_list(draft_list)
 
@@ -39,13 +40,14 @@ class MenuService:
             preferences=preferences,
         )
         structured_response = self._client.generate_json(structure_prompt)
-        menu_data = self._parser.parse_json(structured_response)
+        with self._client.discard_on_parse_error(structure_prompt):
+            menu_data = self._parser.parse_json(structured_response)
 
-        normalized = self._normalize_menus(
-            menu_data,
-            schedule=preferences.get("cookSchedule"),
-            preferences=preferences,
-        )
+            normalized = self._normalize_menus(
+                menu_data,
+                schedule=preferences.get("cookSchedule"),
+                preferences=preferences,
+            )
 
         book_id = f"mb_{uuid.uuid4().hex[:12]}"
         now = datetime.now(timezone.utc).isoformat()
@@ -75,12 +77,13 @@ class MenuService:
         )
 
         response_text = self._client.generate_json(prompt)
-        menu_data = self._parser.parse_json(response_text)
-        normalized = self._normalize_menus(
-            menu_data,
-            schedule=preferences.get("cookSchedule"),
-            preferences=preferences,
-        )
+        with self._client.discard_on_parse_error(prompt):
+            menu_data = self._parser.parse_json(response_text)
+            normalized = self._normalize_menus(
+                menu_data,
+                schedule=preferences.get("cookSchedule"),
+                preferences=preferences,
+            )
 
         return {
             "id": book_id,
@@ -20,11 +20,12 @@ class ShoppingService:
     def generate(self, menu_book_id: str, menus: dict) -> dict:
         prompt = self._prompts.shopping_list(menus)
         response_text = self._client.generate_json(prompt)
-        data = self._parser.parse_json(response_text)
+        with self._client.discard_on_parse_error(prompt):
+            data = self._parser.parse_json(response_text)
 
-        raw_items = data.get("items", [])
-        if not isinstance(raw_items, list):
-            raise ParseError("Shopping list items must be an array")
+            raw_items = data.get("items", [])
+            if not isinstance(raw_items, list):
+                raise ParseError("Shopping list items must be an array")
 
         items = []
         for idx, raw_item in enumerate(raw_items):